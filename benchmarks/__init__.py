@@ -0,0 +1,14 @@
+# benchmarks/__init__.py
+"""
+Mediciones de rendimiento reproducibles.
+
+Cada módulo se ejecuta con `python -m benchmarks.<modulo>` y trabaja sobre una
+base temporal generada desde database/esquemas.sql: nunca toca data/inventario.db
+ni data/system_log.txt.
+
+- datos: generador determinista de bases grandes (en caché entre corridas).
+- suite: tiempos de los controladores, guardados en JSON para comparar commits.
+- wal_concurrencia: lectura/escritura concurrente, rollback vs WAL.
+- terminales_pos: varias terminales de venta (procesos) contra la misma base:
+  throughput, latencias, bloqueos y sobreventa.
+"""
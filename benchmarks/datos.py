@@ -0,0 +1,205 @@
+# benchmarks/datos.py
+"""
+Generador determinista de bases sintéticas grandes y realistas.
+
+- Catálogo: productos con nombre, categoría, descripción con vehículos,
+  códigos originales y medidas JSON acordes a la categoría.
+- Historial: ventas repartidas en varios años y vendedores, con más
+  movimiento en días hábiles y en los productos más populares.
+- Misma semilla + mismos parámetros = misma base, byte a byte en contenido,
+  así los resultados son comparables entre commits.
+- Las bases generadas se guardan en una caché (carpeta temporal del sistema)
+  y se reutilizan: generar millones de ventas toma su tiempo.
+
+Uso:
+    python -m benchmarks.datos salida.db [--productos 100000] [--ventas 2000000] [--semilla 42]
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Iterator, List, Tuple
+
+from database import db
+from database.migraciones import aplicar_migraciones
+
+ESQUEMA = os.path.join(db.BASE_DIR, "database", "esquemas.sql")
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "autopartes_bench")
+LOTE = 50_000   # Filas por executemany
+
+# Categoría -> (nombres de pieza, medidas con su rango en mm)
+CATEGORIAS = {
+    "Palier": (["Palier delantero izquierdo", "Palier delantero derecho", "Palier trasero"],
+               {"A": (20, 35), "B": (18, 30), "C": (55, 75), "H": (85, 110), "L": (450, 750)}),
+    "Amortiguador": (["Amortiguador delantero", "Amortiguador trasero"],
+                     {"Largo Extendido": (380, 560), "Largo Comprimido": (250, 380), "Rosca": (10, 14)}),
+    "Bieleta": (["Bieleta de suspensión", "Bieleta estabilizadora"],
+                {"Largo": (80, 320), "Rosca": (10, 14)}),
+    "Terminal": (["Terminal de dirección", "Rótula de dirección"],
+                 {"Rosca": (12, 16), "Largo": (120, 260), "Cono": (12, 18)}),
+    "Filtro": (["Filtro de aceite", "Filtro de aire", "Filtro de combustible"],
+               {"Diámetro": (60, 110), "Altura": (50, 140), "Rosca": (16, 22)}),
+    "Otro": (["Buje de suspensión", "Soporte de motor", "Bujía"], {}),
+}
+MARCAS = ["Toyota", "Nissan", "Suzuki", "Mitsubishi", "Hyundai", "Kia", "Ford", "Chevrolet", "Mazda", "Honda"]
+MODELOS = ["1.3", "1.5", "1.6", "1.8", "2.0", "2.4", "3.0", "3.2"]
+VARIANTES = ["con ABS", "sin ABS", "reforzado", "estándar", "4x4", "4x2"]
+
+def codigo(i: int) -> str:
+    """Código del producto sintético número i (0-based)."""
+    return f"BEN-{i:06d}"
+
+def _productos(n: int, rnd: random.Random) -> Iterator[Tuple]:
+    categorias = list(CATEGORIAS)
+    for i in range(n):
+        categoria = rnd.choice(categorias)
+        piezas, medidas = CATEGORIAS[categoria]
+        marca = rnd.choice(MARCAS)
+        nombre = f"{rnd.choice(piezas)} {marca} {rnd.choice(VARIANTES)}"
+        desde = rnd.randint(1995, 2020)
+        descripcion = (
+            f"{marca}: {rnd.choice(MODELOS)} del {desde} al {desde + rnd.randint(1, 8)}; "
+            f"{rnd.choice(MARCAS)} {rnd.choice(MODELOS)} rango completo."
+        )
+        originales = "/".join(f"{rnd.randint(100000, 9999999)}{rnd.choice('ABCDEFGH')}" for _ in range(rnd.randint(1, 4)))
+        valores = {k: round(rnd.uniform(a, b), 1) for k, (a, b) in medidas.items()}
+        yield (
+            codigo(i), nombre, descripcion, originales, categoria, categoria,
+            json.dumps(valores, ensure_ascii=False), rnd.randint(0, 200), round(rnd.uniform(15, 1500), 2),
+        )
+
+def _ventas(n: int, ids: List[int], precios: List[float], vendedores: List[int],
+            desde: date, dias: int, rnd: random.Random) -> Iterator[Tuple]:
+    # Popularidad tipo Pareto: pocos productos concentran muchas ventas
+    pesos = [1.0 / (k + 1) ** 0.8 for k in range(len(ids))]
+    acumulados, total = [], 0.0
+    for p in pesos:
+        total += p
+        acumulados.append(total)
+    elegidos = rnd.choices(range(len(ids)), cum_weights=acumulados, k=n)
+    for k in elegidos:
+        dia = desde + timedelta(days=rnd.randrange(dias))
+        if dia.weekday() == 6 and rnd.random() < 0.7:   # Domingo: poco movimiento
+            dia -= timedelta(days=1)
+        cantidad = rnd.choice((1, 1, 1, 2, 2, 3, 4))
+        precio = precios[k]
+        hora = f"{rnd.randint(8, 19):02d}:{rnd.randint(0, 59):02d}:{rnd.randint(0, 59):02d}"
+        yield (ids[k], cantidad, precio, round(cantidad * precio, 2), rnd.choice(vendedores), f"{dia.isoformat()} {hora}")
+
+def _por_lotes(filas: Iterator[Tuple]) -> Iterator[List[Tuple]]:
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= LOTE:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def generar_base(
+    ruta: str,
+    productos: int = 100_000,
+    ventas: int = 2_000_000,
+    vendedores: int = 8,
+    anios: int = 3,
+    hasta: date = date(2024, 12, 31),
+    semilla: int = 42
+) -> None:
+    """
+    Crea en `ruta` una base completa (esquema + datos + migraciones).
+    Los datos se cargan antes de las migraciones: ventas_diarias y productos_fts
+    se construyen de una vez al final en lugar de fila por fila con triggers.
+    """
+    rnd = random.Random(semilla)
+    if os.path.exists(ruta):
+        os.remove(ruta)
+    conn = sqlite3.connect(ruta)
+    try:
+        # Carga masiva: sin diario ni fsync (si falla, se vuelve a generar)
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        with open(ESQUEMA, "r", encoding="utf-8") as f:
+            conn.executescript(f.read())
+
+        conn.executemany(
+            "INSERT INTO usuarios (nombre, usuario, contrasena, rol) VALUES (?, ?, ?, 'vendedor')",
+            [(f"Vendedor {i}", f"vendedor{i}", "bench") for i in range(1, vendedores + 1)]
+        )
+        ids_vendedores = [r[0] for r in conn.execute("SELECT id FROM usuarios")]
+
+        for lote in _por_lotes(_productos(productos, rnd)):
+            conn.executemany(
+                "INSERT INTO productos (codigo, nombre, descripcion, cod_original, tipo_repuesto, categoria, "
+                "medidas, stock, precio) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", lote
+            )
+        filas = conn.execute("SELECT id, precio FROM productos WHERE codigo LIKE 'BEN-%' ORDER BY id").fetchall()
+        ids = [r[0] for r in filas]
+        precios = [r[1] for r in filas]
+
+        desde = date(hasta.year - anios + 1, 1, 1)
+        dias = (hasta - desde).days + 1
+        for lote in _por_lotes(_ventas(ventas, ids, precios, ids_vendedores, desde, dias, rnd)):
+            conn.executemany(
+                "INSERT INTO ventas (id_producto, cantidad, precio_unitario, total, vendido_por, fecha_venta) "
+                "VALUES (?, ?, ?, ?, ?, ?)", lote
+            )
+        conn.commit()
+
+        aplicar_migraciones(conn)
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+
+def base_cacheada(productos: int, ventas: int, semilla: int = 42, **kwargs) -> str:
+    """
+    Ruta de una base generada con estos parámetros (la genera si no está en caché).
+    No escribir sobre ella: copiarla antes (ver copiar_base).
+    """
+    extra = "".join(f"_{k}{v}" for k, v in sorted(kwargs.items()))
+    nombre = f"p{productos}_v{ventas}_s{semilla}{extra}_m{_version_esquema()}.db"
+    ruta = os.path.join(CACHE_DIR, nombre)
+    if not os.path.exists(ruta):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        temporal = f"{ruta}.tmp"
+        generar_base(temporal, productos, ventas, semilla=semilla, **kwargs)
+        os.replace(temporal, ruta)
+    return ruta
+
+def copiar_base(origen: str, destino: str) -> str:
+    shutil.copyfile(origen, destino)
+    return destino
+
+def _version_esquema() -> str:
+    """Cambia si cambian esquemas.sql o las migraciones: invalida la caché."""
+    from database.migraciones import MIGRACIONES
+    with open(ESQUEMA, "rb") as f:
+        huella = hashlib.blake2b(f.read(), digest_size=4).hexdigest()
+    return f"{huella}-{MIGRACIONES[-1][0]}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera una base sintética para benchmarks.")
+    parser.add_argument("salida", help="Archivo .db a crear")
+    parser.add_argument("--productos", type=int, default=100_000)
+    parser.add_argument("--ventas", type=int, default=2_000_000)
+    parser.add_argument("--vendedores", type=int, default=8)
+    parser.add_argument("--anios", type=int, default=3)
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    # El log de las migraciones va junto a la base generada, no a data/
+    db.configure_log(path=f"{args.salida}.log")
+    inicio = time.perf_counter()
+    generar_base(args.salida, args.productos, args.ventas, args.vendedores, args.anios, semilla=args.semilla)
+    print(f"[OK] {args.salida}: {args.productos} productos, {args.ventas} ventas "
+          f"en {time.perf_counter() - inicio:.1f}s")
+    db.close_log()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# benchmarks/suite.py
+"""
+Suite de tiempos de los controladores sobre una base sintética grande.
+
+- Mide obtener_todos, obtener_pagina, obtener_por_codigo, ventas_por_fecha,
+  obtener_kpis y registrar_venta (en ese orden: la escritura va al final).
+- Cada caso se repite durante un presupuesto de tiempo (mínimo de rondas
+  garantizado) y se informa min / mediana / media / desvío / máx / ops/s,
+  con los mismos nombres de campo que pytest-benchmark.
+- Los resultados se guardan en JSON (con el commit actual) para comparar
+  entre versiones: --comparar base.json marca las regresiones.
+
+Uso:
+    python -m benchmarks.suite [--rapido] [--guardar resultados.json] [--comparar base.json]
+    python -m benchmarks.suite --comparar base.json --con nueva.json     # sin medir
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from database import db
+from benchmarks.datos import base_cacheada, codigo, copiar_base
+
+RESULTADOS_DIR = os.path.join(db.BASE_DIR, "benchmarks", "resultados")
+UMBRAL_REGRESION = 0.10    # +10% en la mediana = regresión
+
+PRESETS = {
+    "completo": {"productos": 100_000, "ventas": 2_000_000},
+    "rapido": {"productos": 10_000, "ventas": 200_000},
+}
+
+def medir(fn: Callable[[], Any], tiempo: float = 1.0, min_rondas: int = 5, max_rondas: int = 10_000,
+          calentamiento: int = 1) -> Dict[str, float]:
+    """Repite fn() hasta agotar `tiempo` segundos (con al menos min_rondas) y resume los tiempos."""
+    for _ in range(calentamiento):
+        fn()
+    tiempos: List[float] = []
+    fin = time.perf_counter() + tiempo
+    while len(tiempos) < max_rondas and (len(tiempos) < min_rondas or time.perf_counter() < fin):
+        t0 = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - t0)
+    return _estadisticas(tiempos)
+
+def _estadisticas(tiempos: List[float]) -> Dict[str, float]:
+    media = statistics.fmean(tiempos)
+    return {
+        "min": min(tiempos),
+        "max": max(tiempos),
+        "mean": media,
+        "stddev": statistics.stdev(tiempos) if len(tiempos) > 1 else 0.0,
+        "median": statistics.median(tiempos),
+        "ops": 1.0 / media if media else 0.0,
+        "rounds": len(tiempos),
+    }
+
+def casos(productos: int, semilla: int = 42) -> List[Tuple[str, Callable[[], Any]]]:
+    """(nombre, función sin argumentos) de cada caso; el pool ya debe apuntar a la base de prueba."""
+    from controllers.producto_controller import ProductoController
+    from controllers.reporte_controller import ReporteVentasController
+    from controllers.venta_controller import VentaController
+
+    rnd = random.Random(semilla)
+    codigos = [codigo(rnd.randrange(productos)) for _ in range(1000)]
+    siguiente = iter(range(10 ** 9))
+
+    def por_codigo():
+        ProductoController.obtener_por_codigo(codigos[next(siguiente) % len(codigos)])
+
+    def venta():
+        r = VentaController.registrar_venta(codigos[next(siguiente) % len(codigos)], 1, 10.0, 1)
+        if not r["status"]:
+            raise RuntimeError(r["message"])
+
+    return [
+        ("obtener_todos", ProductoController.obtener_todos),
+        ("obtener_pagina", lambda: ProductoController.obtener_pagina(limit=200)),
+        ("obtener_por_codigo", por_codigo),
+        ("ventas_por_fecha (1 mes)", lambda: ReporteVentasController.ventas_por_fecha("2024-03-01", "2024-03-31")),
+        ("obtener_kpis (1 año)", lambda: ReporteVentasController.obtener_kpis("2024-01-01", "2024-12-31")),
+        ("registrar_venta", venta),
+    ]
+
+def ejecutar(productos: int, ventas: int, tiempo: float, semilla: int = 42,
+             filtro: Optional[str] = None) -> Dict[str, Any]:
+    """Genera (o toma de la caché) la base, corre los casos y arma el documento de resultados."""
+    carpeta = tempfile.mkdtemp(prefix="bench_suite_")
+    # El log del benchmark (y de las migraciones al generar) queda en la carpeta temporal, no en data/
+    db.configure_log(path=os.path.join(carpeta, "bench_log.txt"))
+    try:
+        base = base_cacheada(productos, ventas, semilla)
+        ruta = copiar_base(base, os.path.join(carpeta, "suite.db"))
+        conn = sqlite3.connect(ruta)
+        # registrar_venta no debe quedarse sin stock a mitad de la medición
+        conn.execute("UPDATE productos SET stock = 1000000")
+        conn.commit()
+        conn.close()
+        db.configure_pool(db_path=ruta)
+
+        resultados = []
+        for nombre, fn in casos(productos, semilla):
+            if filtro and filtro not in nombre:
+                continue
+            stats = medir(fn, tiempo)
+            resultados.append({"name": nombre, "stats": stats})
+            print(f"{nombre:<28}{stats['median'] * 1000:>12.3f}{stats['min'] * 1000:>12.3f}"
+                  f"{stats['stddev'] * 1000:>12.3f}{stats['ops']:>12.1f}{stats['rounds']:>8}")
+        db.get_pool().close_all()
+    finally:
+        db.close_log()
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    return {
+        "datetime": datetime.now().isoformat(timespec="seconds"),
+        "commit_info": _commit_info(),
+        "machine_info": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "parametros": {"productos": productos, "ventas": ventas, "semilla": semilla, "tiempo": tiempo},
+        "benchmarks": resultados,
+    }
+
+def _commit_info() -> Dict[str, Any]:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=db.BASE_DIR, capture_output=True,
+                                  text=True, timeout=10).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
+    return {"id": git("rev-parse", "HEAD"), "branch": git("rev-parse", "--abbrev-ref", "HEAD"),
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+def comparar(base: Dict[str, Any], nueva: Dict[str, Any], umbral: float = UMBRAL_REGRESION) -> List[str]:
+    """Imprime la variación de la mediana por caso. Retorna los casos que empeoraron más que `umbral`."""
+    previos = {b["name"]: b["stats"] for b in base.get("benchmarks", [])}
+    if base.get("parametros", {}).get("productos") != nueva.get("parametros", {}).get("productos") or \
+            base.get("parametros", {}).get("ventas") != nueva.get("parametros", {}).get("ventas"):
+        print("[AVISO] Las dos corridas usan bases de distinto tamaño: la comparación no es directa.")
+
+    print(f"{'caso':<28}{'antes ms':>12}{'ahora ms':>12}{'cambio':>10}")
+    regresiones = []
+    for b in nueva.get("benchmarks", []):
+        antes = previos.get(b["name"])
+        if not antes:
+            continue
+        cambio = b["stats"]["median"] / antes["median"] - 1 if antes["median"] else 0.0
+        marca = ""
+        if cambio > umbral:
+            regresiones.append(b["name"])
+            marca = "  <-- regresión"
+        print(f"{b['name']:<28}{antes['median'] * 1000:>12.3f}{b['stats']['median'] * 1000:>12.3f}"
+              f"{cambio * 100:>9.1f}%{marca}")
+    return regresiones
+
+def _leer(ruta: str) -> Dict[str, Any]:
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempos de los controladores sobre una base sintética.")
+    parser.add_argument("--rapido", action="store_true", help="Base chica (10k productos, 200k ventas)")
+    parser.add_argument("--productos", type=int, help="Sobrescribe el tamaño del catálogo")
+    parser.add_argument("--ventas", type=int, help="Sobrescribe el tamaño del historial")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--tiempo", type=float, default=1.0, help="Segundos de medición por caso")
+    parser.add_argument("-k", dest="filtro", help="Solo los casos cuyo nombre contiene este texto")
+    parser.add_argument("--guardar", help="Archivo JSON de resultados (por defecto benchmarks/resultados/, fuera de git)")
+    parser.add_argument("--comparar", metavar="BASE", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--con", metavar="NUEVA", help="Comparar BASE con este JSON sin volver a medir")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_REGRESION * 100, help="%% de regresión tolerado")
+    args = parser.parse_args()
+
+    if args.con:
+        if not args.comparar:
+            parser.error("--con requiere --comparar BASE")
+        regresiones = comparar(_leer(args.comparar), _leer(args.con), args.umbral / 100)
+        sys.exit(1 if regresiones else 0)
+
+    preset = PRESETS["rapido" if args.rapido else "completo"]
+    productos = args.productos or preset["productos"]
+    ventas = args.ventas or preset["ventas"]
+
+    print(f"Base: {productos} productos, {ventas} ventas (semilla {args.semilla})")
+    print(f"{'caso':<28}{'mediana ms':>12}{'min ms':>12}{'desvío ms':>12}{'ops/s':>12}{'rondas':>8}")
+    resultado = ejecutar(productos, ventas, args.tiempo, args.semilla, args.filtro)
+
+    ruta = args.guardar
+    if not ruta:
+        os.makedirs(RESULTADOS_DIR, exist_ok=True)
+        commit = (resultado["commit_info"]["id"] or "sin-git")[:8]
+        ruta = os.path.join(RESULTADOS_DIR, f"{datetime.now():%Y%m%d_%H%M%S}_{commit}.json")
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"[OK] Resultados guardados en {ruta}")
+
+    if args.comparar:
+        regresiones = comparar(_leer(args.comparar), resultado, args.umbral / 100)
+        sys.exit(1 if regresiones else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+# benchmarks/terminales_pos.py
+"""
+Prueba de carga con varias terminales de venta (POS) sobre la misma base.
+
+- Cada terminal es un PROCESO aparte (como cada caja del local, cada una con
+  su propia instancia de la aplicación), con su propio pool de conexiones.
+- Bucle de cada terminal: `--consultas` búsquedas con
+  ProductoController.obtener_por_codigo y una VentaController.registrar_venta,
+  a `--tasa` operaciones por segundo (0 = lo más rápido posible).
+- Un grupo de productos "calientes" arranca con poco stock y concentra la
+  mayoría de las ventas: ahí es donde compiten las terminales.
+
+Informa throughput, latencia p50/p99 por operación, errores "database is
+locked" y sobreventa: productos con stock negativo, unidades vendidas por
+encima del stock inicial y descuentos de stock que no cuadran con las ventas.
+
+Uso:
+    python -m benchmarks.terminales_pos [--terminales 4] [--segundos 10] [--tasa 0]
+                                        [--perfil wal|rollback] [--timeout 20] [--verificar]
+
+Con --verificar termina con código 1 si hubo sobreventa o descuadre de stock
+(prueba de estrés para VentaController).
+
+Todas las terminales corren en esta máquina: el resultado del perfil WAL no
+aplica a cajas en PCs distintas contra una carpeta compartida (ahí solo rollback).
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from database import db
+from benchmarks.datos import base_cacheada, codigo, copiar_base
+from benchmarks.wal_concurrencia import PERFILES, _percentil
+
+PROPORCION_CALIENTE = 0.8   # Fracción de las ventas que van a productos calientes
+
+def preparar_base(ruta: str, calientes: int, stock_caliente: int) -> Dict[int, int]:
+    """Stock de sobra para todo el catálogo salvo los calientes. Retorna {id: stock inicial} de estos."""
+    conn = sqlite3.connect(ruta)
+    try:
+        conn.execute("UPDATE productos SET stock = ?", (10 ** 6,))
+        conn.executemany(
+            "UPDATE productos SET stock = ? WHERE codigo = ?",
+            [(stock_caliente, codigo(i)) for i in range(calientes)]
+        )
+        conn.commit()
+        filas = conn.execute(
+            "SELECT id, stock FROM productos WHERE codigo IN (%s)" % ",".join("?" * calientes),
+            [codigo(i) for i in range(calientes)]
+        ).fetchall()
+        return {r[0]: r[1] for r in filas}
+    finally:
+        conn.close()
+
+def terminal(n: int, ruta: str, pragmas: Dict[str, Any], timeout: float, segundos: float, tasa: float,
+             consultas: int, productos: int, calientes: int, carpeta: str, barrera, cola) -> None:
+    """Proceso de una terminal: corre el bucle y deja sus mediciones en `cola`."""
+    db.configure_log(path=os.path.join(carpeta, f"terminal_{n}.log"))
+    db.configure_pool(db_path=ruta, max_size=2, timeout=timeout, pragmas=pragmas)
+    # Importados aquí para que usen el pool ya configurado
+    from controllers.producto_controller import ProductoController
+    from controllers.venta_controller import VentaController
+
+    rnd = random.Random(n)
+    vendedor = n % 8 + 1
+    lecturas: List[float] = []
+    ventas: List[float] = []
+    conteo = {"ok": 0, "sin_stock": 0, "bloqueos": 0, "otros": 0, "bloqueos_lectura": 0}
+    mensajes: Dict[str, int] = {}
+
+    barrera.wait()   # Todas las terminales arrancan a la vez
+    inicio = time.perf_counter()
+    fin = inicio + segundos
+    ciclo = 0
+    while time.perf_counter() < fin:
+        if tasa > 0:
+            # Ritmo fijo: si una operación se demora, las siguientes no se corren
+            espera = inicio + ciclo * (consultas + 1) / tasa - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+        ciclo += 1
+
+        for _ in range(consultas):
+            t0 = time.perf_counter()
+            try:
+                ProductoController.obtener_por_codigo(codigo(rnd.randrange(productos)))
+            except sqlite3.OperationalError as e:
+                # obtener_por_codigo no atrapa errores: un lock en modo rollback llega hasta acá
+                if not db.is_busy_error(e):
+                    raise
+                conteo["bloqueos_lectura"] += 1
+            lecturas.append(time.perf_counter() - t0)
+
+        if rnd.random() < PROPORCION_CALIENTE:
+            elegido = codigo(rnd.randrange(calientes))
+        else:
+            elegido = codigo(rnd.randrange(calientes, productos))
+        t0 = time.perf_counter()
+        r = VentaController.registrar_venta(elegido, rnd.choice((1, 1, 2)), 10.0, vendedor)
+        ventas.append(time.perf_counter() - t0)
+
+        if r["status"]:
+            conteo["ok"] += 1
+        elif r["message"].startswith("Stock insuficiente"):
+            conteo["sin_stock"] += 1
+        elif "locked" in r["message"] or "busy" in r["message"]:
+            conteo["bloqueos"] += 1
+        else:
+            conteo["otros"] += 1
+            mensajes[r["message"]] = mensajes.get(r["message"], 0) + 1
+
+    db.get_pool().close_all()
+    db.close_log()
+    cola.put({"terminal": n, "lecturas": lecturas, "ventas": ventas, "conteo": conteo, "mensajes": mensajes})
+
+def sobreventa(ruta: str, iniciales: Dict[int, int], ultima_venta: int) -> Dict[str, int]:
+    """Compara stock final y ventas registradas de los productos calientes contra su stock inicial."""
+    conn = sqlite3.connect(ruta)
+    try:
+        negativos = conn.execute("SELECT COUNT(*) FROM productos WHERE stock < 0").fetchone()[0]
+        marcas = ",".join("?" * len(iniciales))
+        vendidas = dict(conn.execute(
+            f"SELECT id_producto, SUM(cantidad) FROM ventas WHERE id > ? AND id_producto IN ({marcas}) "
+            f"GROUP BY id_producto", [ultima_venta, *iniciales]
+        ).fetchall())
+        finales = dict(conn.execute(
+            f"SELECT id, stock FROM productos WHERE id IN ({marcas})", list(iniciales)
+        ).fetchall())
+    finally:
+        conn.close()
+
+    excedente, descuadres = 0, 0
+    for id_prod, inicial in iniciales.items():
+        vendido = vendidas.get(id_prod, 0)
+        excedente += max(0, vendido - inicial)
+        # Stock final distinto de inicial - vendido: un descuento se perdió o se aplicó dos veces
+        if finales.get(id_prod) != inicial - vendido:
+            descuadres += 1
+    return {"stock_negativo": negativos, "unidades_sobrevendidas": excedente, "productos_descuadrados": descuadres}
+
+def ejecutar(ruta: str, perfil: str, terminales: int, segundos: float, tasa: float, consultas: int,
+             productos: int, calientes: int, stock_caliente: int, timeout: float, carpeta: str) -> Dict[str, Any]:
+    """Prepara la base, lanza las terminales y junta los resultados."""
+    iniciales = preparar_base(ruta, calientes, stock_caliente)
+    conn = sqlite3.connect(ruta)
+    ultima_venta = conn.execute("SELECT COALESCE(MAX(id), 0) FROM ventas").fetchone()[0]
+    conn.close()
+
+    # spawn: igual que en Windows, cada terminal arranca un intérprete limpio
+    ctx = multiprocessing.get_context("spawn")
+    barrera = ctx.Barrier(terminales)
+    cola = ctx.Queue()
+    procesos = [
+        ctx.Process(target=terminal, args=(n, ruta, PERFILES[perfil], timeout, segundos, tasa, consultas,
+                                           productos, calientes, carpeta, barrera, cola))
+        for n in range(terminales)
+    ]
+    for p in procesos:
+        p.start()
+    # Leer la cola antes del join: un proceso con datos pendientes en la cola no termina
+    resultados = []
+    for _ in procesos:
+        try:
+            resultados.append(cola.get(timeout=segundos + 60))
+        except queue.Empty:
+            break   # Una terminal murió (el error quedó en la consola)
+    for p in procesos:
+        if len(resultados) < terminales and p.is_alive():
+            p.terminate()
+    for p in procesos:
+        p.join()
+    if len(resultados) < terminales:
+        raise RuntimeError(f"Solo {len(resultados)} de {terminales} terminales terminaron la prueba.")
+
+    lecturas = [t for r in resultados for t in r["lecturas"]]
+    ventas = [t for r in resultados for t in r["ventas"]]
+    conteo = {k: sum(r["conteo"][k] for r in resultados) for k in resultados[0]["conteo"]}
+    mensajes: Dict[str, int] = {}
+    for r in resultados:
+        for m, c in r["mensajes"].items():
+            mensajes[m] = mensajes.get(m, 0) + c
+
+    return {
+        "perfil": perfil,
+        "consultas_s": len(lecturas) / segundos,
+        "ventas_s": len(ventas) / segundos,
+        "p50_consulta_ms": _percentil(lecturas, 50) * 1000,
+        "p99_consulta_ms": _percentil(lecturas, 99) * 1000,
+        "p50_venta_ms": _percentil(ventas, 50) * 1000,
+        "p99_venta_ms": _percentil(ventas, 99) * 1000,
+        **conteo,
+        "otros_mensajes": mensajes,
+        **sobreventa(ruta, iniciales, ultima_venta),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga con varias terminales de venta concurrentes.")
+    parser.add_argument("--terminales", type=int, default=4, help="Procesos (cajas) simultáneos")
+    parser.add_argument("--segundos", type=float, default=10.0)
+    parser.add_argument("--tasa", type=float, default=0.0,
+                        help="Operaciones por segundo de cada terminal (0 = sin límite)")
+    parser.add_argument("--consultas", type=int, default=3, help="Búsquedas por código antes de cada venta")
+    parser.add_argument("--calientes", type=int, default=20, help="Productos con poco stock que todos venden")
+    parser.add_argument("--stock-caliente", type=int, default=100)
+    parser.add_argument("--perfil", choices=[*PERFILES, "ambos"], default="ambos")
+    parser.add_argument("--timeout", type=float, default=db.POOL_TIMEOUT,
+                        help="Segundos de espera ante una base bloqueada (busy timeout)")
+    parser.add_argument("--productos", type=int, default=2000)
+    parser.add_argument("--ventas", type=int, default=20000)
+    parser.add_argument("--verificar", action="store_true",
+                        help="Salir con código 1 si hubo sobreventa o descuadre de stock")
+    args = parser.parse_args()
+    if not 0 < args.calientes < args.productos:
+        parser.error("--calientes debe ser mayor a 0 y menor que --productos")
+
+    fallas = 0
+    carpeta = tempfile.mkdtemp(prefix="bench_pos_")
+    # El log del benchmark (y de las migraciones al generar) queda en la carpeta temporal, no en data/
+    db.configure_log(path=os.path.join(carpeta, "bench_log.txt"))
+    try:
+        base = base_cacheada(args.productos, args.ventas)
+        perfiles = list(PERFILES) if args.perfil == "ambos" else [args.perfil]
+
+        print(f"{args.terminales} terminales, {args.segundos:.0f}s por perfil, "
+              f"tasa {args.tasa or 'sin límite'}, {args.calientes} productos calientes con stock {args.stock_caliente}")
+        print(f"{'perfil':<10}{'vent/s':>8}{'cons/s':>8}{'p50 v ms':>10}{'p99 v ms':>10}{'p50 c ms':>10}"
+              f"{'p99 c ms':>10}{'ok':>7}{'s/stock':>8}{'locked':>8}{'lock c':>8}{'otros':>7}{'neg':>5}{'sobrev':>8}"
+              f"{'descuad':>8}")
+        for perfil in perfiles:
+            ruta = copiar_base(base, os.path.join(carpeta, f"{perfil}.db"))
+            r = ejecutar(ruta, perfil, args.terminales, args.segundos, args.tasa, args.consultas,
+                         args.productos, args.calientes, args.stock_caliente, args.timeout, carpeta)
+            print(
+                f"{perfil:<10}{r['ventas_s']:>8.1f}{r['consultas_s']:>8.1f}{r['p50_venta_ms']:>10.2f}"
+                f"{r['p99_venta_ms']:>10.2f}{r['p50_consulta_ms']:>10.2f}{r['p99_consulta_ms']:>10.2f}"
+                f"{r['ok']:>7}{r['sin_stock']:>8}{r['bloqueos']:>8}{r['bloqueos_lectura']:>8}{r['otros']:>7}{r['stock_negativo']:>5}"
+                f"{r['unidades_sobrevendidas']:>8}{r['productos_descuadrados']:>8}"
+            )
+            for mensaje, veces in r["otros_mensajes"].items():
+                print(f"    [{veces}x] {mensaje}")
+            fallas += r["stock_negativo"] + r["unidades_sobrevendidas"] + r["productos_descuadrados"]
+    finally:
+        db.close_log()
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    if args.verificar:
+        print("[OK] Sin sobreventa." if not fallas else "[ERROR] Hubo sobreventa o descuadre de stock.")
+        sys.exit(1 if fallas else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/wal_concurrencia.py
+"""
+Throughput concurrente de lectura/escritura: modo rollback vs perfil WAL.
+
+- Lectores: ReporteVentasController.ventas_por_fecha de un mes del historial.
+- Escritores: VentaController.registrar_venta en bucle.
+- Cada perfil corre sobre su propia copia de la misma base generada.
+
+Uso:
+    python -m benchmarks.wal_concurrencia [--segundos 5] [--lectores 3] [--escritores 2]
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List
+
+from database import db
+from benchmarks.datos import codigo, generar_base
+
+PERFILES: Dict[str, Dict[str, Any]] = {
+    # Perfil por defecto (apto para carpeta compartida) vs WAL (todas las cajas en una máquina)
+    "rollback": dict(db.PRAGMAS_ROLLBACK),
+    "wal": dict(db.PRAGMAS_WAL),
+}
+
+def crear_base(ruta: str, productos: int, ventas: int, semilla: int = 42) -> None:
+    """Base de prueba (benchmarks/datos.py) con el historial en 2024 y stock de sobra."""
+    generar_base(ruta, productos, ventas, anios=1, semilla=semilla)
+    conn = sqlite3.connect(ruta)
+    try:
+        conn.execute("UPDATE productos SET stock = ?", (10 ** 6,))
+        conn.commit()
+    finally:
+        conn.close()
+
+def medir(ruta: str, pragmas: Dict[str, Any], segundos: float, lectores: int, escritores: int) -> Dict[str, Any]:
+    # Importados aquí para que usen el pool ya configurado
+    from controllers.reporte_controller import ReporteVentasController
+    from controllers.venta_controller import VentaController
+
+    db.configure_pool(db_path=ruta, max_size=lectores + escritores + 1, pragmas=pragmas)
+    codigos = [codigo(i) for i in range(100)]
+    fin = time.monotonic() + segundos
+    lecturas: List[float] = []
+    escrituras: List[float] = []
+    errores = [0]
+    lock = threading.Lock()
+
+    def lector():
+        propias = []
+        while time.monotonic() < fin:
+            t0 = time.perf_counter()
+            ReporteVentasController.ventas_por_fecha("2024-03-01", "2024-03-31")
+            propias.append(time.perf_counter() - t0)
+        with lock:
+            lecturas.extend(propias)
+
+    def escritor(n: int):
+        rnd = random.Random(n)
+        propias, fallos = [], 0
+        while time.monotonic() < fin:
+            t0 = time.perf_counter()
+            r = VentaController.registrar_venta(rnd.choice(codigos), 1, 10.0, 1)
+            propias.append(time.perf_counter() - t0)
+            if not r["status"]:
+                fallos += 1
+        with lock:
+            escrituras.extend(propias)
+            errores[0] += fallos
+
+    hilos = [threading.Thread(target=lector) for _ in range(lectores)]
+    hilos += [threading.Thread(target=escritor, args=(i,)) for i in range(escritores)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    db.get_pool().close_all()
+
+    return {
+        "lecturas_s": len(lecturas) / segundos,
+        "escrituras_s": len(escrituras) / segundos,
+        "p95_escritura_ms": _percentil(escrituras, 95) * 1000,
+        "p95_lectura_ms": _percentil(lecturas, 95) * 1000,
+        "errores": errores[0],
+    }
+
+def _percentil(valores: List[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    orden = sorted(valores)
+    return orden[min(len(orden) - 1, int(len(orden) * p / 100))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara lectura/escritura concurrente: rollback vs WAL.")
+    parser.add_argument("--segundos", type=float, default=5.0)
+    parser.add_argument("--lectores", type=int, default=3)
+    parser.add_argument("--escritores", type=int, default=2)
+    parser.add_argument("--productos", type=int, default=2000)
+    parser.add_argument("--ventas", type=int, default=20000)
+    args = parser.parse_args()
+
+    carpeta = tempfile.mkdtemp(prefix="bench_wal_")
+    # El log del benchmark queda en la carpeta temporal, no en data/
+    db.configure_log(path=os.path.join(carpeta, "bench_log.txt"))
+    try:
+        base = os.path.join(carpeta, "base.db")
+        crear_base(base, args.productos, args.ventas)
+
+        print(f"{args.lectores} lectores + {args.escritores} escritores, {args.segundos:.0f}s por perfil")
+        print(f"{'perfil':<10}{'lect/s':>10}{'escr/s':>10}{'p95 lect ms':>14}{'p95 escr ms':>14}{'errores':>10}")
+        for nombre, pragmas in PERFILES.items():
+            ruta = os.path.join(carpeta, f"{nombre}.db")
+            shutil.copy2(base, ruta)
+            r = medir(ruta, pragmas, args.segundos, args.lectores, args.escritores)
+            print(
+                f"{nombre:<10}{r['lecturas_s']:>10.1f}{r['escrituras_s']:>10.1f}"
+                f"{r['p95_lectura_ms']:>14.1f}{r['p95_escritura_ms']:>14.1f}{r['errores']:>10}"
+            )
+    finally:
+        db.close_log()
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -2,35 +2,321 @@
 import os
 import sqlite3
 import json
-from typing import Optional, Dict, Any, List
-from database.db import get_connection, log_db
+import re
+from typing import Optional, Dict, Any, List, Tuple
+from database.db import get_pool, pooled_connection, log_db
+from database.schema_cache import columnas_productos
+from database.catalogo_cache import get_catalogo_cache
+from database.migraciones import actualizar_referencias
+from models.medidas import CAMPOS_TEXTO, PREFIJO_COLUMNA, campo_por_clave, columna_medida, valor_numerico
+from models.referencias import normalizar_codigo
+from utils.busqueda_difusa import get_indice
 
-def _get_columns() -> List[str]:
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("PRAGMA table_info('productos')")
-    cols = [r[1] for r in cur.fetchall()]
-    conn.close()
-    return cols
+def _get_columns(conn: Optional[sqlite3.Connection] = None) -> List[str]:
+    # Cacheado por proceso; se recarga solo si cambia PRAGMA schema_version
+    return columnas_productos(conn)
+
+def _columnas_listado(cols: List[str]) -> str:
+    """Columnas del listado (codigo, nombre, categoria, stock, precio) tolerando esquemas viejos."""
+    select_map = {
+        "codigo": "codigo" if "codigo" in cols else "'' AS codigo",
+        "nombre": "nombre" if "nombre" in cols else "'' AS nombre",
+        "categoria": "categoria" if "categoria" in cols else "'' AS categoria",
+        "stock": "stock" if "stock" in cols else "0 AS stock",
+        "precio": "precio" if "precio" in cols else "0.0 AS precio",
+    }
+    return ", ".join(select_map.values())
+
+FILTROS_PAGINA = ("categoria", "stock_min", "stock_max")
+
+def sql_pagina(
+    columnas_sql: str,
+    after_key: Optional[Tuple[str, int]],
+    filtros: Optional[Dict[str, Any]],
+    limit: int
+) -> Tuple[str, list]:
+    """
+    Arma la consulta de una página del listado ordenado por (nombre COLLATE NOCASE, id).
+    Usa idx_productos_nombre, o idx_productos_categoria_nombre si se filtra por categoría.
+    """
+    filtros = {k: v for k, v in (filtros or {}).items() if v is not None and v != ""}
+    desconocidos = set(filtros) - set(FILTROS_PAGINA)
+    if desconocidos:
+        raise ValueError(f"Filtros no soportados: {', '.join(sorted(desconocidos))}")
+
+    condiciones, params = [], []
+    if "categoria" in filtros:
+        condiciones.append("categoria = ?")
+        params.append(filtros["categoria"])
+    if "stock_min" in filtros:
+        condiciones.append("stock >= ?")
+        params.append(int(filtros["stock_min"]))
+    if "stock_max" in filtros:
+        condiciones.append("stock <= ?")
+        params.append(int(filtros["stock_max"]))
+    if after_key is not None:
+        # La colación va en el parámetro: así SQLite busca en el índice en vez de recorrerlo
+        condiciones.append("(nombre, id) > (? COLLATE NOCASE, ?)")
+        params.extend([after_key[0], int(after_key[1])])
+
+    where = f"WHERE {' AND '.join(condiciones)} " if condiciones else ""
+    sql = (
+        f"SELECT {columnas_sql}, nombre AS clave_nombre, id AS clave_id FROM productos "
+        f"{where}ORDER BY nombre COLLATE NOCASE, id LIMIT ?"
+    )
+    params.append(int(limit))
+    return sql, params
+
+def sql_medidas(
+    filtros: Dict[str, Any],
+    categoria: Optional[str] = None,
+    limit: int = 200
+) -> Tuple[str, list]:
+    """
+    Arma la búsqueda por medidas sobre las columnas generadas med_* (migración 6).
+
+    :param filtros: {campo: valor}. El campo se acepta en cualquier forma ('largo', 'Diámetro').
+                    valor = número o texto ('M20') para igualdad, o (mínimo, máximo) para
+                    un rango (None = sin límite de ese lado). Los campos de texto ('Tipo')
+                    se comparan sin distinguir mayúsculas.
+    """
+    condiciones, params = [], []
+    for clave, valor in filtros.items():
+        campo = campo_por_clave(clave)
+        if campo is None:
+            raise ValueError(f"Medida no soportada: {clave}")
+        columna = columna_medida(campo)
+
+        if campo in CAMPOS_TEXTO:
+            condiciones.append(f"{columna} = lower(trim(?))")
+            params.append(str(valor))
+        elif isinstance(valor, (tuple, list)):
+            if len(valor) != 2:
+                raise ValueError(f"El rango de '{campo}' debe ser (mínimo, máximo).")
+            for limite, operador in zip(valor, (">=", "<=")):
+                if limite is None:
+                    continue
+                numero = valor_numerico(limite)
+                if numero is None:
+                    raise ValueError(f"Valor no numérico para '{campo}': {limite}")
+                condiciones.append(f"{columna} {operador} ?")
+                params.append(numero)
+            if valor[0] is None and valor[1] is None:
+                condiciones.append(f"{columna} IS NOT NULL")
+        else:
+            numero = valor_numerico(valor)
+            if numero is None:
+                raise ValueError(f"Valor no numérico para '{campo}': {valor}")
+            condiciones.append(f"{columna} = ?")
+            params.append(numero)
+
+    if categoria:
+        condiciones.append("? IN (categoria, tipo_repuesto)")
+        params.append(categoria)
+    if not condiciones:
+        raise ValueError("Indique al menos una medida o categoría.")
+
+    sql = (
+        f"SELECT * FROM productos WHERE {' AND '.join(condiciones)} "
+        f"ORDER BY nombre COLLATE NOCASE, id LIMIT ?"
+    )
+    params.append(int(limit))
+    return sql, params
+
+# Búsqueda exacta por código OEM / de competencia (PRIMARY KEY de producto_codigos)
+SQL_BUSCAR_REFERENCIA = """
+    SELECT p.*, pc.fabricante AS referencia_fabricante
+    FROM producto_codigos pc
+    JOIN productos p ON p.id = pc.id_producto
+    WHERE pc.codigo_norm = ?
+    ORDER BY p.nombre COLLATE NOCASE, p.id
+    LIMIT ?
+"""
+
+# Pesos bm25 por columna de productos_fts: codigo, nombre, descripcion, cod_original, aplicacion
+PESOS_BUSQUEDA = "10.0, 5.0, 1.0, 8.0, 2.0"
+
+# catalogo_escaner: segundos de updated_at que se releen en la lectura siguiente
+MARGEN_ESCANER_SEGUNDOS = 5
+
+def _consulta_fts(texto: str) -> str:
+    """
+    Convierte lo que escribe el usuario en una consulta FTS5 segura:
+    cada palabra entre comillas (sin operadores) y con '*' para buscar por prefijo.
+    "GSP-2183" -> '"GSP"* "2183"*'
+    """
+    palabras = re.findall(r"\w+", texto or "")
+    return " ".join(f'"{p}"*' for p in palabras)
+
+def _producto_desde_fila(row) -> Dict[str, Any]:
+    """Fila de productos -> dict con medidas decodificadas y campos de texto garantizados."""
+    # Las columnas generadas med_* (SELECT *) son solo para buscar: el dict usa "medidas"
+    producto = {k: v for k, v in dict(row).items() if not k.startswith(PREFIJO_COLUMNA)}
+    medidas_val = producto.get("medidas")
+    if isinstance(medidas_val, str) and medidas_val.strip() != "":
+        try:
+            producto["medidas"] = json.loads(medidas_val)
+        except json.JSONDecodeError:
+            producto["medidas"] = {}
+    else:
+        producto["medidas"] = producto.get("medidas") or {}
+
+    for campo in ["aplicacion", "cod_original", "tipo_repuesto", "categoria", "descripcion"]:
+        producto.setdefault(campo, "")
+
+    producto["imagen_path"] = producto.get("imagen") or None
+    return producto
 
 class ProductoController:
     @staticmethod
     def obtener_todos() -> List[tuple]:
-        cols = _get_columns()
-        select_map = {
-            "codigo": "codigo" if "codigo" in cols else "'' AS codigo",
-            "nombre": "nombre" if "nombre" in cols else "'' AS nombre",
-            "categoria": "categoria" if "categoria" in cols else "'' AS categoria",
-            "stock": "stock" if "stock" in cols else "0 AS stock",
-            "precio": "precio" if "precio" in cols else "0.0 AS precio",
-        }
-        sql = f"SELECT {', '.join(select_map.values())} FROM productos ORDER BY nombre COLLATE NOCASE"
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute(sql)
-        rows = [tuple(r) for r in cur.fetchall()]
-        conn.close()
-        return rows
+        with pooled_connection() as conn:
+            sql = f"SELECT {_columnas_listado(_get_columns(conn))} FROM productos ORDER BY nombre COLLATE NOCASE"
+            cur = conn.cursor()
+            cur.execute(sql)
+            return [tuple(r) for r in cur.fetchall()]
+
+    @staticmethod
+    def obtener_pagina(
+        after_key: Optional[Tuple[str, int]] = None,
+        limit: int = 200,
+        filtros: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[tuple], Optional[Tuple[str, int]]]:
+        """
+        Una página del listado (mismo formato y orden que obtener_todos).
+
+        Paginación por clave: en vez de OFFSET se continúa desde la última clave
+        (nombre, id) entregada, así cada página cuesta lo mismo sin importar
+        cuántos productos haya antes.
+
+        :param after_key: clave devuelta por la página anterior (None = primera página).
+        :param filtros: {"categoria": str, "stock_min": int, "stock_max": int} (todos opcionales).
+        :return: (filas, clave_siguiente); clave_siguiente es None si no hay más páginas.
+        """
+        with pooled_connection() as conn:
+            sql, params = sql_pagina(_columnas_listado(_get_columns(conn)), after_key, filtros, limit)
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+
+        # Las dos últimas columnas son la clave (nombre, id); no forman parte de la fila del listado
+        filas = [tuple(r)[:-2] for r in rows]
+        siguiente = (rows[-1]["clave_nombre"], rows[-1]["clave_id"]) if len(rows) == int(limit) else None
+        return filas, siguiente
+
+    @staticmethod
+    def obtener_fila(codigo: str) -> Optional[tuple]:
+        """Una fila del listado por código (para refrescar solo lo que cambió)."""
+        if not codigo:
+            return None
+        with pooled_connection() as conn:
+            sql = f"SELECT {_columnas_listado(_get_columns(conn))} FROM productos WHERE codigo = ?"
+            cur = conn.cursor()
+            cur.execute(sql, (codigo,))
+            row = cur.fetchone()
+            return tuple(row) if row else None
+
+    @staticmethod
+    def buscar(texto: str, limit: int = 50) -> List[tuple]:
+        """
+        Búsqueda de texto completo (mismo formato de fila que obtener_todos).
+
+        - Cada palabra se busca como prefijo ("amort toyo" encuentra "Amortiguador Toyota")
+          y todas deben aparecer en algún campo indexado.
+        - Resultados ordenados por relevancia (bm25): pesa más coincidir en código,
+          códigos originales y nombre que en la descripción.
+        """
+        consulta = _consulta_fts(texto)
+        if not consulta:
+            return []
+
+        with pooled_connection() as conn:
+            cols = _columnas_listado(_get_columns(conn))
+            cur = conn.cursor()
+            try:
+                cur.execute(f"""
+                    SELECT {cols}
+                    FROM productos
+                    JOIN (
+                        SELECT rowid AS id_fts,
+                               bm25(productos_fts, {PESOS_BUSQUEDA}) AS rango
+                        FROM productos_fts
+                        WHERE productos_fts MATCH ?
+                        ORDER BY rango
+                        LIMIT ?
+                    ) r ON productos.id = r.id_fts
+                    ORDER BY r.rango
+                """, (consulta, int(limit)))
+            except sqlite3.OperationalError as e:
+                # Sin FTS5 (o índice aún no creado): búsqueda lineal por código/nombre
+                log_db(f"Búsqueda FTS no disponible, se usa LIKE: {e}")
+                patron = f"%{texto.strip()}%"
+                cur.execute(
+                    f"SELECT {cols} FROM productos WHERE codigo LIKE ? OR nombre LIKE ? "
+                    "ORDER BY nombre COLLATE NOCASE LIMIT ?",
+                    (patron, patron, int(limit))
+                )
+            return [tuple(r) for r in cur.fetchall()]
+
+    @staticmethod
+    def sugerir_similares(texto: str, limit: int = 5) -> List[tuple]:
+        """
+        Productos con código o nombre PARECIDO al texto (tolerando errores de tipeo),
+        en formato de listado y del más al menos parecido. Para cuando la búsqueda
+        exacta no encontró nada: "GSP-21832" sugiere "GSP-218322".
+        """
+        with pooled_connection() as conn:
+            indice = get_indice(get_pool().db_path)
+            indice.refrescar(conn)
+
+            ids = [ident for ident, _codigo, _d in indice.sugerir_codigos(texto, limit)]
+            filas: List[tuple] = []
+            if ids:
+                cols = _columnas_listado(_get_columns(conn))
+                cur = conn.cursor()
+                cur.execute(f"SELECT id, {cols} FROM productos WHERE id IN ({','.join('?' * len(ids))})", ids)
+                por_id = {r[0]: tuple(r)[1:] for r in cur.fetchall()}
+                filas = [por_id[i] for i in ids if i in por_id]
+
+        if len(filas) < limit:
+            # Nombres: palabras corregidas al vocabulario y búsqueda de texto completo
+            corregido = indice.corregir_palabras(texto)
+            if corregido:
+                ya = {f[0] for f in filas}
+                filas += [f for f in ProductoController.buscar(corregido, limit) if f[0] not in ya]
+        return filas[:limit]
+
+    @staticmethod
+    def catalogo_escaner(desde: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Catálogo mínimo para el modo escáner del punto de venta:
+        {"marca", "productos": [(id, codigo, nombre, precio, stock)], "total"}.
+
+        Sin `desde` trae todos los productos; con la "marca" de una lectura anterior,
+        solo los modificados después (idx_productos_updated_at). "total" permite
+        detectar bajas: si no coincide con el índice local, pedir todo de nuevo.
+        """
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            # Lo de los últimos segundos se vuelve a leer la próxima vez (updated_at tiene resolución de segundos)
+            cur.execute("SELECT datetime('now', ?)", (f"-{MARGEN_ESCANER_SEGUNDOS} seconds",))
+            marca = cur.fetchone()[0]
+            if desde is None:
+                cur.execute("SELECT id, codigo, nombre, precio, stock FROM productos")
+            else:
+                cur.execute(
+                    "SELECT id, codigo, nombre, precio, stock FROM productos WHERE updated_at > ?", (desde,)
+                )
+            productos = [tuple(r) for r in cur.fetchall()]
+            cur.execute("SELECT COUNT(*) FROM productos")
+            total = cur.fetchone()[0]
+        return {"marca": max(marca, desde or ""), "productos": productos, "total": total}
+
+    @staticmethod
+    def preparar_sugerencias() -> None:
+        """Construye el índice de sugerir_similares (~1-2 s con 100k productos) antes del primer uso."""
+        with pooled_connection() as conn:
+            get_indice(get_pool().db_path).refrescar(conn)
 
     @staticmethod
     def insertar(
@@ -49,122 +335,192 @@ class ProductoController:
         if not codigo or not nombre:
             raise ValueError("Código y nombre son obligatorios.")
 
-        columnas = _get_columns()
-        conn = get_connection()
-        cur = conn.cursor()
-        try:
-            medidas_json = json.dumps(medidas_dict or {}, ensure_ascii=False)
-            imagen_nombre = os.path.basename(imagen_path) if imagen_path else None
-
-            campos_validos = {
-                "codigo": codigo.strip(),
-                "nombre": nombre.strip(),
-                "tipo_repuesto": (tipo_repuesto or "").strip(),
-                "categoria": (categoria or "").strip(),
-                "aplicacion": (aplicacion or "").strip(),
-                "cod_original": (cod_original or "").strip(),
-                "descripcion": (descripcion or "").strip(),
-                "medidas": medidas_json,
-                "stock": int(stock or 0),
-                "precio": float(precio or 0.0),
-                "imagen": imagen_nombre
-            }
-
-            campos = [c for c in campos_validos.keys() if c in columnas]
-            valores = [campos_validos[c] for c in campos]
-
-            if not campos:
-                raise Exception("No hay campos válidos para insertar en la tabla productos.")
-
-            placeholders = ",".join(["?"] * len(campos))
-            sql = f"INSERT INTO productos ({','.join(campos)}) VALUES ({placeholders})"
-            cur.execute(sql, valores)
-            conn.commit()
-            return cur.lastrowid
-        except sqlite3.IntegrityError as ie:
-            conn.rollback()
-            raise Exception("El código de producto ya existe.") from ie
-        except Exception:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
+        with pooled_connection() as conn:
+            columnas = _get_columns(conn)
+            cur = conn.cursor()
+            try:
+                medidas_json = json.dumps(medidas_dict or {}, ensure_ascii=False)
+                imagen_nombre = os.path.basename(imagen_path) if imagen_path else None
+
+                campos_validos = {
+                    "codigo": codigo.strip(),
+                    "nombre": nombre.strip(),
+                    "tipo_repuesto": (tipo_repuesto or "").strip(),
+                    "categoria": (categoria or "").strip(),
+                    "aplicacion": (aplicacion or "").strip(),
+                    "cod_original": (cod_original or "").strip(),
+                    "descripcion": (descripcion or "").strip(),
+                    "medidas": medidas_json,
+                    "stock": int(stock or 0),
+                    "precio": float(precio or 0.0),
+                    "imagen": imagen_nombre
+                }
+
+                campos = [c for c in campos_validos.keys() if c in columnas]
+                valores = [campos_validos[c] for c in campos]
+
+                if not campos:
+                    raise Exception("No hay campos válidos para insertar en la tabla productos.")
+
+                placeholders = ",".join(["?"] * len(campos))
+                sql = f"INSERT INTO productos ({','.join(campos)}) VALUES ({placeholders})"
+                cur.execute(sql, valores)
+                nuevo_id = cur.lastrowid
+                if campos_validos["cod_original"] and "cod_original" in campos:
+                    actualizar_referencias(conn, [nuevo_id])
+                conn.commit()
+                get_catalogo_cache().descartar([campos_validos["codigo"]])
+                return nuevo_id
+            except sqlite3.IntegrityError as ie:
+                conn.rollback()
+                raise Exception("El código de producto ya existe.") from ie
+            except Exception:
+                conn.rollback()
+                raise
 
     @staticmethod
     def obtener_por_codigo(codigo: str) -> Optional[Dict[str, Any]]:
+        """
+        Producto completo por código. Los datos salen de la caché de catálogo
+        (database/catalogo_cache.py) si están; el stock siempre se lee de la base.
+        """
         if not codigo:
             return None
 
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM productos WHERE codigo = ?", (codigo,))
-        row = cur.fetchone()
-        conn.close()
+        cache = get_catalogo_cache()
+        with pooled_connection() as conn:
+            generacion = cache.validar(conn)
+            cur = conn.cursor()
+            producto = cache.obtener(codigo)
+            if producto is not None:
+                cur.execute("SELECT stock FROM productos WHERE id = ?", (producto["id"],))
+                fila = cur.fetchone()
+                if fila is not None:
+                    producto["stock"] = fila[0]
+                    return producto
+
+            cur.execute("SELECT * FROM productos WHERE codigo = ?", (codigo,))
+            row = cur.fetchone()
 
         if not row:
             return None
+        producto = _producto_desde_fila(row)
+        cache.guardar(producto, generacion)
+        return producto
 
-        producto = dict(row)
-        medidas_val = producto.get("medidas")
-        if isinstance(medidas_val, str) and medidas_val.strip() != "":
-            try:
-                producto["medidas"] = json.loads(medidas_val)
-            except json.JSONDecodeError:
-                producto["medidas"] = {}
-        else:
-            producto["medidas"] = producto.get("medidas") or {}
+    @staticmethod
+    def obtener_varios(
+        codigos: Optional[List[str]] = None,
+        categoria: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Productos completos (mismo formato que obtener_por_codigo) por lista de
+        códigos y/o categoría, en pocas consultas en vez de una por producto.
+        Sin filtros devuelve todo el catálogo. Orden: nombre.
+        """
+        condiciones, params = [], []
+        if categoria:
+            condiciones.append("categoria = ?")
+            params.append(categoria)
 
-        for campo in ["aplicacion", "cod_original", "tipo_repuesto", "categoria", "descripcion"]:
-            producto.setdefault(campo, "")
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            if codigos is None:
+                where = f" WHERE {' AND '.join(condiciones)}" if condiciones else ""
+                cur.execute(f"SELECT * FROM productos{where} ORDER BY nombre COLLATE NOCASE, id", params)
+                return [_producto_desde_fila(r) for r in cur.fetchall()]
 
-        producto["imagen_path"] = producto.get("imagen") or None
-        return producto
+            codigos = list(dict.fromkeys(c for c in codigos if c))
+            productos = []
+            # Por tandas: SQLite limita la cantidad de parámetros por consulta
+            for i in range(0, len(codigos), 500):
+                tanda = codigos[i:i + 500]
+                where = " AND ".join(condiciones + [f"codigo IN ({','.join('?' * len(tanda))})"])
+                cur.execute(f"SELECT * FROM productos WHERE {where}", params + tanda)
+                productos.extend(_producto_desde_fila(r) for r in cur.fetchall())
+        productos.sort(key=lambda p: ((p.get("nombre") or "").lower(), p.get("id") or 0))
+        return productos
+
+    @staticmethod
+    def buscar_por_medidas(
+        filtros: Dict[str, Any],
+        categoria: Optional[str] = None,
+        limit: int = 200
+    ) -> List[Dict[str, Any]]:
+        """
+        Productos completos cuyas medidas cumplen todos los filtros (ver sql_medidas).
+        Ej.: buscar_por_medidas({"Rosca": "M20", "L": (500, 520)}, categoria="Palier")
+        """
+        sql, params = sql_medidas(filtros, categoria, limit)
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            filas = cur.fetchall()
+        return [_producto_desde_fila(row) for row in filas]
+
+    @staticmethod
+    def buscar_por_referencia(codigo: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Productos cuyo cod_original incluye este código OEM / de competencia
+        (búsqueda exacta por índice en producto_codigos; "mb-998" encuentra "MB998").
+        Cada producto trae además "referencia_fabricante" (None si no se indicó).
+        """
+        codigo_norm = normalizar_codigo(codigo)
+        if not codigo_norm:
+            return []
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(SQL_BUSCAR_REFERENCIA, (codigo_norm, int(limit)))
+            filas = cur.fetchall()
+        return [_producto_desde_fila(row) for row in filas]
 
     @staticmethod
     def actualizar(codigo_original: str, **kwargs) -> bool:
         if not codigo_original:
             raise ValueError("Debe especificar el código original para actualizar.")
 
-        columnas = _get_columns()
-        conn = get_connection()
-        cur = conn.cursor()
-        try:
-            if "medidas" in kwargs and isinstance(kwargs["medidas"], dict):
-                kwargs["medidas"] = json.dumps(kwargs["medidas"], ensure_ascii=False)
+        with pooled_connection() as conn:
+            columnas = _get_columns(conn)
+            cur = conn.cursor()
+            try:
+                if "medidas" in kwargs and isinstance(kwargs["medidas"], dict):
+                    kwargs["medidas"] = json.dumps(kwargs["medidas"], ensure_ascii=False)
 
-            items = [(k, v) for k, v in kwargs.items() if k in columnas]
-            if not items:
-                raise ValueError("No hay campos válidos para actualizar.")
+                items = [(k, v) for k, v in kwargs.items() if k in columnas]
+                if not items:
+                    raise ValueError("No hay campos válidos para actualizar.")
 
-            cols_sql = ", ".join([f"{k}=?" for k, _ in items])
-            valores = [v for _, v in items]
-            valores.append(codigo_original)
+                cols_sql = ", ".join([f"{k}=?" for k, _ in items])
+                valores = [v for _, v in items]
+                valores.append(codigo_original)
 
-            sql = f"UPDATE productos SET {cols_sql} WHERE codigo = ?"
-            cur.execute(sql, valores)
-            if cur.rowcount == 0:
+                sql = f"UPDATE productos SET {cols_sql} WHERE codigo = ?"
+                cur.execute(sql, valores)
+                if cur.rowcount == 0:
+                    conn.rollback()
+                    return False
+                if "cod_original" in dict(items):
+                    codigo_final = dict(items).get("codigo", codigo_original)
+                    cur.execute("SELECT id FROM productos WHERE codigo = ?", (codigo_final,))
+                    actualizar_referencias(conn, [r[0] for r in cur.fetchall()])
+                conn.commit()
+                get_catalogo_cache().descartar([codigo_original, dict(items).get("codigo")])
+                return True
+            except Exception:
                 conn.rollback()
-                return False
-            conn.commit()
-            return True
-        except Exception:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
+                raise
 
     @staticmethod
     def eliminar(codigo: str) -> bool:
         if not codigo:
             return False
-        conn = get_connection()
-        cur = conn.cursor()
-        try:
-            cur.execute("DELETE FROM productos WHERE codigo = ?", (codigo,))
-            conn.commit()
-            return True
-        except Exception:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute("DELETE FROM productos WHERE codigo = ?", (codigo,))
+                conn.commit()
+                get_catalogo_cache().descartar([codigo])
+                return True
+            except Exception:
+                conn.rollback()
+                raise
@@ -1,6 +1,72 @@
 import sqlite3
-from database.db import get_connection, log_db
-from typing import List, Dict, Any
+from datetime import datetime, timedelta
+from database.db import pooled_connection, log_db
+from typing import List, Dict, Any, Iterator, Tuple
+
+# Rango semiabierto [inicio, fin) sobre la columna cruda: SQLite puede usar idx_ventas_fecha.
+# (Envolver la columna en date() obliga a recorrer toda la tabla ventas.)
+SQL_VENTAS_POR_FECHA = """
+    SELECT
+        v.id,
+        v.fecha_venta,
+        p.codigo AS codigo_producto,
+        p.nombre AS nombre_producto,
+        v.cantidad,
+        v.precio_unitario,
+        v.total,
+        u.nombre AS vendedor  -- Obtenemos el nombre real, no el usuario
+    FROM ventas v
+    INNER JOIN productos p ON v.id_producto = p.id
+    LEFT JOIN usuarios u ON v.vendido_por = u.id
+    WHERE v.fecha_venta >= ? AND v.fecha_venta < ?
+    ORDER BY v.fecha_venta DESC, v.id DESC
+"""
+
+# Exportación: orden cronológico ascendente = mismo orden que idx_ventas_fecha,
+# así SQLite entrega las filas a medida que recorre el índice (sin ordenar en memoria).
+SQL_EXPORTAR_VENTAS = """
+    SELECT
+        v.id,
+        v.id_cabecera AS ticket,
+        v.fecha_venta,
+        p.codigo AS codigo_producto,
+        p.nombre AS nombre_producto,
+        v.cantidad,
+        v.precio_unitario,
+        v.total,
+        u.nombre AS vendedor
+    FROM ventas v
+    INNER JOIN productos p ON v.id_producto = p.id
+    LEFT JOIN usuarios u ON v.vendido_por = u.id
+    WHERE v.fecha_venta >= ? AND v.fecha_venta < ?
+    ORDER BY v.fecha_venta, v.id
+"""
+
+COLUMNAS_EXPORTACION = [
+    "id", "ticket", "fecha_venta", "codigo_producto", "nombre_producto",
+    "cantidad", "precio_unitario", "total", "vendedor",
+]
+
+# Los KPIs se leen de ventas_totales_diarias (mantenida por triggers, ver
+# database/migraciones.py): una fila por día, no ventas crudas (un año = 365 filas).
+SQL_KPIS = """
+    SELECT
+        COALESCE(SUM(transacciones), 0) as total_transacciones,
+        COALESCE(SUM(ingresos), 0) as ingresos_totales,
+        COALESCE(SUM(unidades), 0) as productos_vendidos
+    FROM ventas_totales_diarias
+    WHERE dia >= ? AND dia < ?
+"""
+
+def rango_semiabierto(fecha_inicio: str, fecha_fin: str) -> Tuple[str, str]:
+    """
+    Convierte el rango inclusivo de días ('YYYY-MM-DD', 'YYYY-MM-DD') en los
+    límites [inicio, día siguiente a fin) comparables con fecha_venta
+    ('YYYY-MM-DD HH:MM:SS') como texto.
+    """
+    inicio = datetime.strptime(fecha_inicio[:10], "%Y-%m-%d").date()
+    fin = datetime.strptime(fecha_fin[:10], "%Y-%m-%d").date()
+    return inicio.isoformat(), (fin + timedelta(days=1)).isoformat()
 
 class ReporteVentasController:
     """
@@ -15,32 +81,43 @@ class ReporteVentasController:
         Retorna una lista de diccionarios lista para ser renderizada en tablas.
         """
         try:
-            with get_connection() as conn:
+            desde, hasta = rango_semiabierto(fecha_inicio, fecha_fin)
+            with pooled_connection() as conn:
                 cursor = conn.cursor()
                 # Query optimizada con JOINs explícitos
-                sql = """
-                    SELECT 
-                        v.id,
-                        v.fecha_venta,
-                        p.codigo AS codigo_producto,
-                        p.nombre AS nombre_producto,
-                        v.cantidad,
-                        v.precio_unitario,
-                        v.total,
-                        u.nombre AS vendedor  -- Obtenemos el nombre real, no el usuario
-                    FROM ventas v
-                    INNER JOIN productos p ON v.id_producto = p.id
-                    LEFT JOIN usuarios u ON v.vendido_por = u.id
-                    WHERE date(v.fecha_venta) BETWEEN date(?) AND date(?)
-                    ORDER BY v.fecha_venta DESC, v.id DESC
-                """
-                cursor.execute(sql, (fecha_inicio, fecha_fin))
+                cursor.execute(SQL_VENTAS_POR_FECHA, (desde, hasta))
                 return [dict(row) for row in cursor.fetchall()]
 
         except Exception as e:
             log_db(f"Error Reporte Detallado: {e}")
             return []
 
+    @staticmethod
+    def iterar_ventas(fecha_inicio: str, fecha_fin: str, tamano_lote: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre las ventas del rango sin cargarlas todas: lee del cursor con
+        fetchmany y entrega una fila (dict) a la vez. Memoria constante.
+
+        La conexión del pool queda prestada mientras se itera: consumir el
+        generador completo (o cerrarlo) en el mismo hilo que lo creó.
+        A diferencia de ventas_por_fecha, los errores se propagan.
+        """
+        desde, hasta = rango_semiabierto(fecha_inicio, fecha_fin)
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_EXPORTAR_VENTAS, (desde, hasta))
+            while True:
+                filas = cursor.fetchmany(tamano_lote)
+                if not filas:
+                    break
+                for row in filas:
+                    yield dict(row)
+
+    @staticmethod
+    def contar_ventas(fecha_inicio: str, fecha_fin: str) -> int:
+        """Número de ventas del rango (desde ventas_totales_diarias, sin recorrer ventas)."""
+        return int(ReporteVentasController.obtener_kpis(fecha_inicio, fecha_fin)["transacciones"])
+
     @staticmethod
     def obtener_kpis(fecha_inicio: str, fecha_fin: str) -> Dict[str, float]:
         """
@@ -48,19 +125,12 @@ class ReporteVentasController:
         Ideal para mostrar en tarjetas de resumen (Dashboard).
         """
         try:
-            with get_connection() as conn:
+            desde, hasta = rango_semiabierto(fecha_inicio, fecha_fin)
+            with pooled_connection() as conn:
                 cursor = conn.cursor()
-                sql = """
-                    SELECT 
-                        COUNT(*) as total_transacciones,
-                        COALESCE(SUM(total), 0) as ingresos_totales,
-                        COALESCE(SUM(cantidad), 0) as productos_vendidos
-                    FROM ventas 
-                    WHERE date(fecha_venta) BETWEEN date(?) AND date(?)
-                """
-                cursor.execute(sql, (fecha_inicio, fecha_fin))
+                cursor.execute(SQL_KPIS, (desde, hasta))
                 row = cursor.fetchone()
-                
+
                 if row:
                     return {
                         "transacciones": row["total_transacciones"],
@@ -71,4 +141,4 @@ class ReporteVentasController:
 
         except Exception as e:
             log_db(f"Error KPIs: {e}")
-            return {"transacciones": 0, "ingresos": 0.0, "productos": 0}
\ No newline at end of file
+            return {"transacciones": 0, "ingresos": 0.0, "productos": 0}
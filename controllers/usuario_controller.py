@@ -0,0 +1,26 @@
+# controllers/usuario_controller.py
+from typing import Optional, Dict, Any
+from database.db import pooled_connection, log_db
+
+class UsuarioController:
+
+    @staticmethod
+    def autenticar(usuario: str, contrasena: str) -> Optional[Dict[str, Any]]:
+        """
+        Valida credenciales. Retorna {"id", "nombre", "rol"} o None si no coinciden.
+        """
+        try:
+            with pooled_connection() as conn:
+                cursor = conn.cursor()
+                # Recuperamos ID para evitar errores en Ventas
+                cursor.execute(
+                    "SELECT id, nombre, rol FROM usuarios WHERE usuario=? AND contrasena=?",
+                    (usuario, contrasena)
+                )
+                row = cursor.fetchone()
+                if row:
+                    return {"id": row["id"], "nombre": row["nombre"], "rol": row["rol"]}
+                return None
+        except Exception as e:
+            log_db(f"Error Login: {e}")
+            return None
@@ -1,7 +1,10 @@
 # controllers/venta_controller.py
 import sqlite3
 from typing import Dict, Any, List
-from database.db import get_connection, log_db 
+from database.db import pooled_connection, run_write_transaction, log_db
+
+class VentaRechazada(Exception):
+    """Venta que no se puede registrar (producto inexistente, sin stock): revierte la transacción."""
 
 class VentaController:
 
@@ -9,83 +12,196 @@ class VentaController:
     def registrar_venta(codigo_producto: str, cantidad: int, precio_unitario: float, vendido_por: int) -> Dict[str, Any]:
         """
         Registra una venta de forma atómica (Todo o nada).
+        El stock se descuenta con un UPDATE condicional (stock >= cantidad): dos
+        terminales vendiendo la última unidad a la vez no pueden dejarlo negativo.
         """
-        if cantidad <= 0: 
+        if cantidad <= 0:
             return {"status": False, "message": "La cantidad debe ser mayor a 0."}
-        
-        conn = get_connection()
-        if not conn: 
-            return {"status": False, "message": "No hay conexión con la base de datos."}
+
+        total = precio_unitario * cantidad
+
+        def transaccion(conn: sqlite3.Connection) -> Dict[str, Any]:
+            cursor = conn.cursor()
+
+            # 1. Descontar stock solo si alcanza (verificación y descuento en una sola sentencia)
+            cursor.execute(
+                "UPDATE productos SET stock = stock - ? WHERE codigo = ? AND stock >= ?",
+                (cantidad, codigo_producto, cantidad)
+            )
+            descontado = cursor.rowcount == 1
+
+            cursor.execute("SELECT id, stock FROM productos WHERE codigo = ?", (codigo_producto,))
+            producto = cursor.fetchone()
+            if not producto:
+                raise VentaRechazada(f"El producto '{codigo_producto}' no existe.")
+            if not descontado:
+                raise VentaRechazada(f"Stock insuficiente. Disponible: {producto['stock']}.")
+
+            # 2. Insertar Venta (si 'vendido_por' no es un ID válido, falla la FK y se revierte el descuento)
+            cursor.execute("""
+                INSERT INTO ventas (id_producto, cantidad, precio_unitario, total, vendido_por, fecha_venta)
+                VALUES (?, ?, ?, ?, ?, datetime('now', 'localtime'))
+            """, (producto['id'], cantidad, precio_unitario, total, vendido_por))
+
+            return {"venta_id": cursor.lastrowid, "nuevo_stock": producto['stock']}
 
         try:
-            # 'with conn' maneja el commit/rollback automáticamente
-            with conn: 
-                cursor = conn.cursor()
-                
-                # 1. Verificar existencia y stock del producto
-                cursor.execute("SELECT id, stock, nombre FROM productos WHERE codigo = ?", (codigo_producto,))
-                producto = cursor.fetchone()
-                
-                if not producto:
-                    return {"status": False, "message": f"El producto '{codigo_producto}' no existe."}
-                
-                id_prod = producto['id']
-                stock_actual = producto['stock']
-                
-                if stock_actual < cantidad:
-                    return {"status": False, "message": f"Stock insuficiente. Disponible: {stock_actual}."}
-
-                # 2. Calcular total
-                total = precio_unitario * cantidad
-                
-                # 3. Insertar Venta
-                # Aquí es donde fallaba si 'vendido_por' no era un ID válido
-                cursor.execute("""
-                    INSERT INTO ventas (id_producto, cantidad, precio_unitario, total, vendido_por, fecha_venta)
-                    VALUES (?, ?, ?, ?, ?, datetime('now', 'localtime'))
-                """, (id_prod, cantidad, precio_unitario, total, vendido_por))
-                
-                venta_id = cursor.lastrowid
-
-                # 4. Descontar Stock
-                cursor.execute("UPDATE productos SET stock = stock - ? WHERE id = ?", (cantidad, id_prod))
-                
-                log_db(f"Venta ID {venta_id} OK. Prod: {codigo_producto}, Cant: {cantidad}, User: {vendido_por}")
-
-                return {
-                    "status": True, 
-                    "message": "Venta registrada correctamente.", 
-                    "total": total,
-                    "nuevo_stock": stock_actual - cantidad
-                }
+            resultado = run_write_transaction(transaccion)
+
+        except VentaRechazada as e:
+            return {"status": False, "message": str(e)}
 
         except sqlite3.IntegrityError as e:
             # Este mensaje saldrá si el usuario ID no existe en la tabla usuarios
             log_db(f"Error Integridad Venta: {e} | Usuario ID intentado: {vendido_por}")
             return {"status": False, "message": f"Error de Base de Datos: El usuario (ID {vendido_por}) no existe o el producto es inválido."}
-            
+
         except Exception as e:
             log_db(f"Error General Venta: {e}")
             return {"status": False, "message": f"Error inesperado: {str(e)}"}
-        finally:
-            conn.close()
+
+        log_db(f"Venta ID {resultado['venta_id']} OK. Prod: {codigo_producto}, Cant: {cantidad}, User: {vendido_por}")
+        return {
+            "status": True,
+            "message": "Venta registrada correctamente.",
+            "total": total,
+            "nuevo_stock": resultado["nuevo_stock"]
+        }
 
     @staticmethod
-    def obtener_historial() -> List[Dict[str, Any]]:
-        conn = get_connection()
-        if not conn: return []
-        try:
+    def registrar_venta_carrito(items: List[Dict[str, Any]], vendido_por: int) -> Dict[str, Any]:
+        """
+        Registra un ticket de varias líneas en UNA sola transacción (todo o nada).
+
+        :param items: [{"codigo": str, "cantidad": int, "precio_unitario": float (opcional)}, ...]
+                      Si falta precio_unitario se usa el precio actual del producto.
+                      Códigos repetidos se agrupan en una sola línea.
+        """
+        if not items:
+            return {"status": False, "message": "El carrito está vacío."}
+
+        # 1. Normalizar y agrupar líneas por código (validación sin tocar la DB)
+        lineas: Dict[str, Dict[str, Any]] = {}
+        for item in items:
+            codigo = str(item.get("codigo") or "").strip()
+            if not codigo:
+                return {"status": False, "message": "Hay una línea sin código de producto."}
+            try:
+                cantidad = int(item.get("cantidad") or 0)
+            except (TypeError, ValueError):
+                return {"status": False, "message": f"La cantidad de '{codigo}' no es válida."}
+            if cantidad <= 0:
+                return {"status": False, "message": f"La cantidad de '{codigo}' debe ser mayor a 0."}
+            if codigo in lineas:
+                lineas[codigo]["cantidad"] += cantidad
+            else:
+                lineas[codigo] = {"codigo": codigo, "cantidad": cantidad, "precio_unitario": item.get("precio_unitario")}
+
+        codigos = list(lineas.keys())
+
+        def transaccion(conn: sqlite3.Connection) -> Dict[str, Any]:
             cursor = conn.cursor()
+
+            # 2. Existencia y stock de TODAS las líneas en una sola consulta
+            placeholders = ",".join(["?"] * len(codigos))
+            cursor.execute(
+                f"SELECT id, codigo, stock, nombre, precio FROM productos WHERE codigo IN ({placeholders})",
+                codigos
+            )
+            productos = {row["codigo"]: row for row in cursor.fetchall()}
+
+            faltantes = [c for c in codigos if c not in productos]
+            if faltantes:
+                raise VentaRechazada(f"Productos inexistentes: {', '.join(faltantes)}.")
+
+            sin_stock = [
+                f"{c} (disponible {productos[c]['stock']})"
+                for c in codigos if productos[c]["stock"] < lineas[c]["cantidad"]
+            ]
+            if sin_stock:
+                raise VentaRechazada(f"Stock insuficiente: {', '.join(sin_stock)}.")
+
+            # 3. Calcular totales
+            detalle = []
+            for c in codigos:
+                linea = lineas[c]
+                precio = linea["precio_unitario"]
+                precio = float(productos[c]["precio"] if precio is None else precio)
+                detalle.append({
+                    "id_producto": productos[c]["id"],
+                    "codigo": c,
+                    "nombre": productos[c]["nombre"],
+                    "cantidad": linea["cantidad"],
+                    "precio_unitario": precio,
+                    "total": precio * linea["cantidad"],
+                    "nuevo_stock": productos[c]["stock"] - linea["cantidad"]
+                })
+            total = sum(d["total"] for d in detalle)
+
+            # 4. Descuento condicional línea por línea: si alguna no alcanza, se revierte todo el ticket
+            for d in detalle:
+                cursor.execute(
+                    "UPDATE productos SET stock = stock - ? WHERE id = ? AND stock >= ?",
+                    (d["cantidad"], d["id_producto"], d["cantidad"])
+                )
+                if cursor.rowcount != 1:
+                    raise VentaRechazada(f"Stock insuficiente: {d['codigo']}.")
+
+            # 5. Cabecera del ticket
             cursor.execute("""
-                SELECT v.id, p.codigo as codigo_producto, p.nombre as nombre_producto, 
-                       v.cantidad, v.precio_unitario, v.total, v.fecha_venta 
-                FROM ventas v
-                LEFT JOIN productos p ON v.id_producto = p.id
-                ORDER BY v.id DESC LIMIT 50
-            """)
-            return [dict(row) for row in cursor.fetchall()]
+                INSERT INTO venta_cabecera (fecha_venta, vendido_por, items, total)
+                VALUES (datetime('now', 'localtime'), ?, ?, ?)
+            """, (vendido_por, len(detalle), total))
+            id_cabecera = cursor.lastrowid
+
+            # 6. Líneas (misma fecha que la cabecera)
+            cursor.executemany("""
+                INSERT INTO ventas (id_producto, cantidad, precio_unitario, total, vendido_por, fecha_venta, id_cabecera)
+                VALUES (?, ?, ?, ?, ?, (SELECT fecha_venta FROM venta_cabecera WHERE id = ?), ?)
+            """, [
+                (d["id_producto"], d["cantidad"], d["precio_unitario"], d["total"], vendido_por, id_cabecera, id_cabecera)
+                for d in detalle
+            ])
+
+            return {
+                "status": True,
+                "message": "Venta registrada correctamente.",
+                "id_venta": id_cabecera,
+                "total": total,
+                "lineas": detalle
+            }
+
+        try:
+            resultado = run_write_transaction(transaccion)
+
+        except VentaRechazada as e:
+            return {"status": False, "message": str(e)}
+
+        except sqlite3.IntegrityError as e:
+            log_db(f"Error Integridad Ticket: {e} | Usuario ID intentado: {vendido_por}")
+            return {"status": False, "message": f"Error de Base de Datos: El usuario (ID {vendido_por}) no existe o un producto es inválido."}
+
+        except Exception as e:
+            log_db(f"Error General Ticket: {e}")
+            return {"status": False, "message": f"Error inesperado: {str(e)}"}
+
+        log_db(f"Ticket ID {resultado['id_venta']} OK. Líneas: {len(resultado['lineas'])}, "
+               f"Total: {resultado['total']:.2f}, User: {vendido_por}")
+        return resultado
+
+    @staticmethod
+    def obtener_historial() -> List[Dict[str, Any]]:
+        try:
+            with pooled_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT v.id, p.codigo as codigo_producto, p.nombre as nombre_producto,
+                           v.cantidad, v.precio_unitario, v.total, v.fecha_venta
+                    FROM ventas v
+                    LEFT JOIN productos p ON v.id_producto = p.id
+                    ORDER BY v.id DESC LIMIT 50
+                """)
+                return [dict(row) for row in cursor.fetchall()]
         except Exception as e:
             log_db(f"Error Historial: {e}")
             return []
-        finally:
-            conn.close()
\ No newline at end of file
@@ -0,0 +1,146 @@
+# database/catalogo_cache.py
+"""
+Caché de productos en memoria (lectura por código en el punto de venta).
+
+- LRU acotada (CAPACIDAD productos) por código, con índice id -> código.
+- Guarda el producto ya armado (medidas JSON decodificadas); el stock NO se
+  cachea: quien lee pide el stock actual a la base (por id, una fila), así las
+  ventas siguen validando contra el valor real.
+- Invalidación:
+    * Los controladores descartan el código que modifican (actualizar, eliminar,
+      insertar) apenas confirman.
+    * Escrituras de cualquier otra conexión (otro hilo, otra terminal, el
+      importador) se detectan con `PRAGMA data_version` sobre una conexión de
+      vigilancia propia: SQLite lo incrementa con cada commit ajeno. Si cambió,
+      se descartan los productos con updated_at reciente (idx_productos_updated_at).
+"""
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+from database.db import POOL_TIMEOUT, get_pool
+
+CAPACIDAD = 5000            # Productos en memoria (los menos usados salen primero)
+MARGEN_SEGUNDOS = 5         # updated_at tiene resolución de segundos: se relee esta ventana hacia atrás
+
+
+class CatalogoCache:
+    """Productos por código, invalidados por `data_version` y `updated_at`."""
+
+    def __init__(self, capacidad: int = CAPACIDAD):
+        self.capacidad = capacidad
+        self._lock = threading.Lock()
+        self._productos: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()   # código -> producto
+        self._codigo_por_id: Dict[int, str] = {}
+        self._db_path: Optional[str] = None
+        self._vigia: Optional[sqlite3.Connection] = None
+        self._version: Optional[int] = None
+        self._marca: Optional[str] = None     # updated_at hasta el que ya se invalidó
+        self._generacion = 0                  # cambia con cada invalidación
+        self.aciertos = 0
+        self.fallos = 0
+
+    # ------------------ Validez ------------------
+    def validar(self, conn: sqlite3.Connection) -> int:
+        """
+        Descarta lo que otra conexión haya modificado desde la última llamada.
+        Retorna la generación vigente (para `guardar`).
+        """
+        db_path = get_pool().db_path
+        with self._lock:
+            if db_path != self._db_path:
+                self._reiniciar(db_path)
+            version = self._vigia.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._version:
+                return self._generacion
+            self._version = version
+
+            corte = conn.execute("SELECT datetime('now', ?)", (f"-{MARGEN_SEGUNDOS} seconds",)).fetchone()[0]
+            if self._marca is None:
+                self._vaciar()
+            else:
+                for (ident,) in conn.execute("SELECT id FROM productos WHERE updated_at > ?", (self._marca,)):
+                    self._descartar(self._codigo_por_id.get(ident))
+            self._marca = max(self._marca or "", corte)
+            self._generacion += 1
+            return self._generacion
+
+    def _reiniciar(self, db_path: str) -> None:
+        if self._vigia is not None:
+            self._vigia.close()
+        # Solo lee data_version: sin PRAGMAs de la app ni transacciones
+        self._vigia = sqlite3.connect(db_path, timeout=POOL_TIMEOUT, check_same_thread=False)
+        self._db_path = db_path
+        self._version = None
+        self._marca = None
+        self._vaciar()
+
+    # ------------------ Lectura y escritura ------------------
+    def obtener(self, codigo: str) -> Optional[Dict[str, Any]]:
+        """Copia del producto cacheado (sin stock actualizado) o None."""
+        with self._lock:
+            producto = self._productos.get(codigo)
+            if producto is None:
+                self.fallos += 1
+                return None
+            self._productos.move_to_end(codigo)
+            self.aciertos += 1
+            return _copiar(producto)
+
+    def guardar(self, producto: Dict[str, Any], generacion: int) -> None:
+        """Cachea un producto leído después de `validar`; se ignora si hubo una invalidación en el medio."""
+        with self._lock:
+            if generacion != self._generacion:
+                return
+            codigo = producto["codigo"]
+            self._descartar(codigo)
+            self._productos[codigo] = _copiar(producto)
+            self._codigo_por_id[producto["id"]] = codigo
+            while len(self._productos) > self.capacidad:
+                _codigo, viejo = self._productos.popitem(last=False)
+                self._codigo_por_id.pop(viejo["id"], None)
+
+    def descartar(self, codigos: Iterable[Optional[str]]) -> None:
+        """Saca estos códigos (escrituras propias ya confirmadas)."""
+        with self._lock:
+            for codigo in codigos:
+                self._descartar(codigo)
+            self._generacion += 1
+
+    def invalidar(self) -> None:
+        """Descarta todo (la próxima lectura va a la base)."""
+        with self._lock:
+            self._vaciar()
+            self._generacion += 1
+
+    def _descartar(self, codigo: Optional[str]) -> None:
+        producto = self._productos.pop(codigo, None) if codigo is not None else None
+        if producto is not None:
+            self._codigo_por_id.pop(producto["id"], None)
+
+    def _vaciar(self) -> None:
+        self._productos.clear()
+        self._codigo_por_id.clear()
+
+
+def _copiar(producto: Dict[str, Any]) -> Dict[str, Any]:
+    # Quien recibe el dict puede modificarlo (formularios): medidas es el único valor mutable
+    return {**producto, "medidas": dict(producto.get("medidas") or {})}
+
+_cache = CatalogoCache()
+
+def get_catalogo_cache() -> CatalogoCache:
+    return _cache
+
+def invalidate_catalogo_cache() -> None:
+    _cache.invalidar()
+
+def _reiniciar_en_hijo() -> None:
+    # La conexión de vigilancia no se comparte entre procesos
+    global _cache
+    _cache = CatalogoCache(_cache.capacidad)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_en_hijo)
@@ -1,8 +1,16 @@
 # database/db.py
 import sqlite3
 import os
+import random
 import sys
+import time
+import atexit
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from database.log_writer import LogWriter
 
 def get_base_path():
     if getattr(sys, 'frozen', False):
@@ -15,6 +23,50 @@ DB_FOLDER = os.path.join(BASE_DIR, "data")
 DB_PATH = os.path.join(DB_FOLDER, "inventario.db")
 LOG_PATH = os.path.join(DB_FOLDER, "system_log.txt")
 
+# Parámetros por defecto del pool de conexiones
+POOL_MAX_CONEXIONES = 5          # Conexiones abiertas como máximo por proceso
+POOL_TIMEOUT = 20                # Segundos de espera (lock de SQLite y pool agotado)
+POOL_HEALTHCHECK_SEGUNDOS = 30   # Inactividad tras la cual se verifica la conexión
+POOL_CHECKPOINT_SEGUNDOS = 60    # Intervalo entre checkpoints PASSIVE del WAL
+
+# Reintentos de las transacciones de escritura (ver run_write_transaction)
+ESCRITURA_REINTENTOS = 4         # Reintentos ante SQLITE_BUSY después del busy_timeout
+ESCRITURA_ESPERA_BASE = 0.05     # Segundos antes del 1er reintento; se duplica en cada uno
+
+# Perfiles de PRAGMAs aplicados una vez a cada conexión nueva.
+# - Por defecto, modo rollback (journal_mode=DELETE): es el único seguro cuando varias
+#   cajas abren el mismo inventario.db desde una carpeta compartida en red.
+# - WAL (opcional): los reportes (lectores) no bloquean a las ventas (escritor) ni al
+#   revés, pero necesita memoria compartida entre los procesos (-shm), así que solo
+#   sirve si todos corren en la MISMA máquina; sobre una unidad de red (SMB/NFS) puede
+#   corromper la base. journal_mode queda guardado en el archivo: el primer cliente que
+#   lo activa lo cambia para todos, por eso se activa explícitamente (INVENTARIO_WAL=1
+#   o configure_pool(pragmas=PRAGMAS_WAL)).
+# - synchronous=NORMAL: con WAL no hay riesgo de corrupción; solo se puede perder
+#   la última transacción ante un corte de luz (fsync en cada checkpoint).
+# - cache_size negativo = KiB de caché de páginas por conexión.
+PRAGMAS_ROLLBACK: Dict[str, Any] = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "cache_size": -16000,          # ~16 MB
+    "temp_store": "MEMORY",
+}
+PRAGMAS_WAL: Dict[str, Any] = {
+    **PRAGMAS_ROLLBACK,
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+}
+USAR_WAL = os.environ.get("INVENTARIO_WAL", "").strip().lower() in ("1", "true", "si", "sí")
+PRAGMAS_CONEXION: Dict[str, Any] = PRAGMAS_WAL if USAR_WAL else PRAGMAS_ROLLBACK
+
+# Parámetros por defecto del log (ver database/log_writer.py)
+LOG_COLA_MAX = 10000             # Registros en espera antes de empezar a descartar
+LOG_LOTE = 200                   # Registros escritos por lote
+LOG_INTERVALO_SEGUNDOS = 0.5     # Espera máxima del hilo escritor entre revisiones
+LOG_MAX_BYTES = 5 * 1024 * 1024  # Tamaño a partir del cual se rota el archivo
+LOG_RESPALDOS = 5                # Archivos rotados que se conservan (.1 ... .N)
+
 # Aseguramos que la carpeta de datos exista
 if not os.path.exists(DB_FOLDER):
     try:
@@ -24,30 +76,498 @@ if not os.path.exists(DB_FOLDER):
         print(f"Error crítico: No se pudo crear carpeta de datos: {e}")
         raise
 
+def _abrir_conexion(
+    db_path: str,
+    timeout: float,
+    check_same_thread: bool = True,
+    pragmas: Optional[Dict[str, Any]] = None
+) -> sqlite3.Connection:
+    """Abre una conexión configurada igual para todo el sistema."""
+    conn = sqlite3.connect(db_path, timeout=timeout, check_same_thread=check_same_thread)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON;")
+    _aplicar_pragmas(conn, PRAGMAS_CONEXION if pragmas is None else pragmas)
+    return conn
+
+def _aplicar_pragmas(conn: sqlite3.Connection, pragmas: Dict[str, Any]) -> None:
+    """
+    Aplica el perfil de PRAGMAs. journal_mode es persistente en el archivo;
+    el resto vale solo para esta conexión. Un valor None deja el de SQLite.
+    """
+    for nombre, valor in pragmas.items():
+        if valor is None:
+            continue
+        if not nombre.isidentifier():
+            raise ValueError(f"PRAGMA inválido: {nombre!r}")
+        try:
+            conn.execute(f"PRAGMA {nombre} = {valor}").fetchall()
+        except sqlite3.OperationalError as e:
+            # Cambiar journal_mode requiere que nadie más tenga la base abierta
+            # en otro modo; se sigue con el modo actual y se reintenta en la próxima conexión.
+            if nombre != "journal_mode":
+                raise
+            log_db(f"No se pudo aplicar journal_mode={valor}: {e}")
+
 def get_connection() -> sqlite3.Connection:
     """
     Crea y retorna una conexión segura a la base de datos SQLite.
     Si ocurre un error, registra y propaga la excepción.
+
+    La conexión NO pertenece al pool: quien la pide debe cerrarla.
+    Para el trabajo habitual de los controladores usar `pooled_connection()`.
     """
     try:
-        conn = sqlite3.connect(DB_PATH, timeout=20)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA foreign_keys = ON;")
-        return conn
+        return _abrir_conexion(DB_PATH, POOL_TIMEOUT)
     except sqlite3.Error as e:
         # Registrar y propagar (no devolver None)
         log_db(f"ERROR CRÍTICO DE CONEXIÓN: {e}")
         raise
 
-def log_db(message: str) -> None:
+
+class _ConexionPool:
+    """Envoltura interna: conexión real + datos de control del pool."""
+
+    __slots__ = ("conn", "owner", "last_used", "depth")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.owner: Optional[int] = None   # Último hilo que la usó (afinidad)
+        self.last_used = time.monotonic()
+        self.depth = 0                     # Préstamos anidados en el mismo hilo
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones SQLite de larga duración, consciente de hilos.
+
+    - Cada hilo reutiliza preferentemente la última conexión que usó (afinidad),
+      y los préstamos anidados dentro del mismo hilo devuelven la misma conexión.
+    - Nunca se abren más de `max_size` conexiones; si el pool está agotado se
+      espera hasta `timeout` segundos y luego se lanza `sqlite3.OperationalError`.
+    - Las conexiones inactivas más de `healthcheck_interval` segundos se validan
+      con `SELECT 1` antes de entregarse y se reemplazan si fallan.
+    - Al devolver una conexión con una transacción abierta se hace rollback.
+    - Cada conexión nueva recibe el perfil `pragmas` (WAL, synchronous...); en modo
+      WAL, cada `checkpoint_interval` segundos un release hace un checkpoint PASSIVE
+      para que el archivo -wal no crezca sin límite mientras haya lectores.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DB_PATH,
+        max_size: int = POOL_MAX_CONEXIONES,
+        timeout: float = POOL_TIMEOUT,
+        healthcheck_interval: float = POOL_HEALTHCHECK_SEGUNDOS,
+        pragmas: Optional[Dict[str, Any]] = None,
+        checkpoint_interval: float = POOL_CHECKPOINT_SEGUNDOS
+    ):
+        if max_size < 1:
+            raise ValueError("El pool necesita al menos una conexión.")
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.healthcheck_interval = healthcheck_interval
+        self.pragmas = dict(PRAGMAS_CONEXION if pragmas is None else pragmas)
+        self.checkpoint_interval = checkpoint_interval
+        self._wal = str(self.pragmas.get("journal_mode") or "").upper() == "WAL"
+        self._ultimo_checkpoint = time.monotonic()
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle: List[_ConexionPool] = []
+        self._in_use: Dict[int, _ConexionPool] = {}   # id de hilo -> conexión prestada
+        self._total = 0
+        self._closed = False
+        self._migrado = False
+        self._migracion_lock = threading.Lock()
+
+    # ------------------ Préstamo y devolución ------------------
+    def acquire(self) -> sqlite3.Connection:
+        """Presta una conexión al hilo actual (bloquea si el pool está agotado)."""
+        ident = threading.get_ident()
+        deadline = time.monotonic() + self.timeout
+
+        with self._cond:
+            if self._closed:
+                raise sqlite3.ProgrammingError("El pool de conexiones está cerrado.")
+
+            # Préstamo anidado: el mismo hilo ya tiene una conexión
+            actual = self._in_use.get(ident)
+            if actual is not None:
+                actual.depth += 1
+                return actual.conn
+
+            while True:
+                item = self._take_idle(ident)
+                if item is not None:
+                    break
+                if self._total < self.max_size:
+                    self._total += 1
+                    item = None
+                    break
+                restante = deadline - time.monotonic()
+                if restante <= 0:
+                    raise sqlite3.OperationalError(
+                        f"Pool de conexiones agotado ({self.max_size}) tras {self.timeout}s de espera."
+                    )
+                self._cond.wait(restante)
+
+        # Apertura y health check fuera del lock para no frenar a otros hilos
+        try:
+            if item is None:
+                item = _ConexionPool(self._abrir())
+            elif time.monotonic() - item.last_used > self.healthcheck_interval:
+                item = self._revalidar(item)
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+        item.owner = ident
+        item.depth = 1
+        with self._cond:
+            self._in_use[ident] = item
+
+        if not self._migrado:
+            try:
+                self._migrar(item.conn)
+            except Exception:
+                self.release(item.conn)
+                raise
+        return item.conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Devuelve al pool la conexión prestada al hilo actual."""
+        ident = threading.get_ident()
+        with self._cond:
+            item = self._in_use.get(ident)
+            if item is None or item.conn is not conn:
+                raise sqlite3.ProgrammingError("La conexión no fue prestada a este hilo.")
+            item.depth -= 1
+            if item.depth > 0:
+                return
+            del self._in_use[ident]
+
+        # Nunca dejamos transacciones colgadas en una conexión reutilizable
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(item)
+            return
+
+        if self._wal and self._toca_checkpoint():
+            self._checkpoint(conn, "PASSIVE")
+
+        with self._cond:
+            if self._closed:
+                self._total -= 1
+                conn.close()
+            else:
+                item.last_used = time.monotonic()
+                self._idle.append(item)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Context manager: `with pool.connection() as conn: ...`"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self) -> None:
+        """Cierra las conexiones inactivas; las prestadas se cierran al devolverse."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._cond.notify_all()
+        # Al cerrar se vuelca el WAL completo y se trunca el archivo -wal
+        if self._wal and idle:
+            self._checkpoint(idle[0].conn, "TRUNCATE")
+        for item in idle:
+            try:
+                item.conn.close()
+            except sqlite3.Error:
+                pass
+
+    # ------------------ Internos ------------------
+    def _abrir(self) -> sqlite3.Connection:
+        return _abrir_conexion(self.db_path, self.timeout, check_same_thread=False, pragmas=self.pragmas)
+
+    def _toca_checkpoint(self) -> bool:
+        """True para un solo hilo cada checkpoint_interval segundos."""
+        ahora = time.monotonic()
+        with self._cond:
+            if ahora - self._ultimo_checkpoint < self.checkpoint_interval:
+                return False
+            self._ultimo_checkpoint = ahora
+            return True
+
+    def _checkpoint(self, conn: sqlite3.Connection, modo: str) -> None:
+        # PASSIVE no espera a nadie: copia lo que pueda sin bloquear lectores ni escritores
+        try:
+            conn.execute(f"PRAGMA wal_checkpoint({modo})").fetchall()
+        except sqlite3.Error as e:
+            log_db(f"Checkpoint WAL ({modo}) fallido: {e}")
+
+    def _migrar(self, conn: sqlite3.Connection) -> None:
+        """Aplica las migraciones pendientes una sola vez por pool."""
+        with self._migracion_lock:
+            if self._migrado:
+                return
+            from database.migraciones import aplicar_migraciones
+            aplicar_migraciones(conn)
+            self._migrado = True
+
+    def _take_idle(self, ident: int) -> Optional[_ConexionPool]:
+        """Saca una conexión inactiva, priorizando la que ya usó este hilo."""
+        if not self._idle:
+            return None
+        for i in range(len(self._idle) - 1, -1, -1):
+            if self._idle[i].owner == ident:
+                return self._idle.pop(i)
+        # Sin afinidad disponible: la menos usada recientemente
+        return self._idle.pop(0)
+
+    def _revalidar(self, item: _ConexionPool) -> _ConexionPool:
+        try:
+            item.conn.execute("SELECT 1").fetchone()
+            return item
+        except sqlite3.Error as e:
+            log_db(f"Conexión del pool descartada por health check: {e}")
+            try:
+                item.conn.close()
+            except sqlite3.Error:
+                pass
+            return _ConexionPool(self._abrir())
+
+    def _discard(self, item: _ConexionPool) -> None:
+        try:
+            item.conn.close()
+        except sqlite3.Error:
+            pass
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    """Retorna el pool global del proceso (se crea en el primer uso)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+def configure_pool(
+    db_path: Optional[str] = None,
+    max_size: Optional[int] = None,
+    timeout: Optional[float] = None,
+    healthcheck_interval: Optional[float] = None,
+    pragmas: Optional[Dict[str, Any]] = None,
+    checkpoint_interval: Optional[float] = None
+) -> ConnectionPool:
+    """
+    Reemplaza el pool global con una nueva configuración.
+    Útil para apuntar a otra base de datos (benchmarks, scripts) o ajustar el tamaño.
+
+    :param pragmas: perfil de PRAGMAs que reemplaza a PRAGMAS_CONEXION
+                    (p. ej. PRAGMAS_WAL si todas las cajas corren en esta misma máquina).
+    """
+    global _pool
+    with _pool_lock:
+        anterior = _pool
+        _pool = ConnectionPool(
+            db_path=db_path or (anterior.db_path if anterior else DB_PATH),
+            max_size=max_size or (anterior.max_size if anterior else POOL_MAX_CONEXIONES),
+            timeout=timeout if timeout is not None else (anterior.timeout if anterior else POOL_TIMEOUT),
+            healthcheck_interval=(
+                healthcheck_interval if healthcheck_interval is not None
+                else (anterior.healthcheck_interval if anterior else POOL_HEALTHCHECK_SEGUNDOS)
+            ),
+            pragmas=pragmas if pragmas is not None else (anterior.pragmas if anterior else None),
+            checkpoint_interval=(
+                checkpoint_interval if checkpoint_interval is not None
+                else (anterior.checkpoint_interval if anterior else POOL_CHECKPOINT_SEGUNDOS)
+            )
+        )
+    if anterior is not None:
+        anterior.close_all()
+    return _pool
+
+@contextmanager
+def pooled_connection() -> Iterator[sqlite3.Connection]:
+    """
+    Presta una conexión del pool global durante el bloque `with`.
+    No hace commit: el llamador decide (`conn.commit()` o `with conn:`).
+    Si quedó una transacción abierta al salir, se revierte.
+    """
+    pool = get_pool()
+    try:
+        conn = pool.acquire()
+    except sqlite3.Error as e:
+        log_db(f"ERROR CRÍTICO DE CONEXIÓN: {e}")
+        raise
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+T = TypeVar("T")
+
+def is_busy_error(error: BaseException) -> bool:
+    """True si el error es SQLITE_BUSY / SQLITE_LOCKED ("database is locked")."""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    codigo = getattr(error, "sqlite_errorcode", None)   # Python 3.11+
+    if codigo is not None:
+        return codigo & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    mensaje = str(error).lower()
+    return "locked" in mensaje or "busy" in mensaje
+
+def run_write_transaction(
+    fn: Callable[[sqlite3.Connection], T],
+    retries: Optional[int] = None,
+    backoff: Optional[float] = None
+) -> T:
+    """
+    Ejecuta fn(conn) dentro de BEGIN IMMEDIATE ... COMMIT con una conexión del pool.
+
+    - BEGIN IMMEDIATE toma el lock de escritura al empezar: lo leído dentro de
+      fn no puede cambiar antes del commit, y no hay interbloqueo al pasar de
+      lector a escritor a mitad de la transacción.
+    - Si fn lanza una excepción se hace ROLLBACK y se propaga.
+    - Si la base sigue bloqueada tras el busy_timeout, la transacción completa se
+      reintenta con espera exponencial (con jitter, para que las terminales no
+      vuelvan a chocar a la vez). fn debe poder repetirse desde cero.
+    """
+    retries = ESCRITURA_REINTENTOS if retries is None else retries
+    backoff = ESCRITURA_ESPERA_BASE if backoff is None else backoff
+    intento = 0
+    while True:
+        try:
+            with pooled_connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    resultado = fn(conn)
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+                return resultado
+        except sqlite3.OperationalError as e:
+            if not is_busy_error(e) or intento >= retries:
+                raise
+            time.sleep(backoff * (2 ** intento) * random.uniform(0.5, 1.5))
+            intento += 1
+
+@atexit.register
+def _cerrar_pool() -> None:
+    if _pool is not None:
+        _pool.close_all()
+
+# ---------------------------------------------------------------------
+# Log de auditoría (escritura asíncrona por lotes)
+# ---------------------------------------------------------------------
+_log_writer: Optional[LogWriter] = None
+_log_lock = threading.Lock()
+
+def get_log_writer() -> LogWriter:
+    """Escritor de log del proceso (se crea con LOG_PATH en el primer uso)."""
+    global _log_writer
+    if _log_writer is None:
+        with _log_lock:
+            if _log_writer is None:
+                _log_writer = LogWriter(
+                    LOG_PATH, max_queue=LOG_COLA_MAX, batch_size=LOG_LOTE,
+                    flush_interval=LOG_INTERVALO_SEGUNDOS, max_bytes=LOG_MAX_BYTES,
+                    backup_count=LOG_RESPALDOS
+                )
+    return _log_writer
+
+def configure_log(
+    path: Optional[str] = None,
+    to_table: Optional[bool] = None,
+    max_bytes: Optional[int] = None,
+    backup_count: Optional[int] = None,
+    rotate_daily: Optional[bool] = None
+) -> LogWriter:
     """
-    Registra eventos y errores en un archivo de texto para auditoría.
+    Reemplaza el escritor de log (el anterior se vacía y se cierra).
+    Los parámetros omitidos conservan el valor del escritor anterior.
+
+    :param to_table: si es True, cada lote también se inserta en la tabla `logs`
+                     de la base del pool.
+    """
+    global _log_writer
+    with _log_lock:
+        anterior = _log_writer
+        if to_table is None:
+            db_path = anterior.db_path if anterior else None
+        else:
+            db_path = get_pool().db_path if to_table else None
+        _log_writer = LogWriter(
+            path or (anterior.path if anterior else LOG_PATH),
+            max_queue=LOG_COLA_MAX, batch_size=LOG_LOTE, flush_interval=LOG_INTERVALO_SEGUNDOS,
+            max_bytes=max_bytes if max_bytes is not None else (anterior.max_bytes if anterior else LOG_MAX_BYTES),
+            backup_count=(
+                backup_count if backup_count is not None
+                else (anterior.backup_count if anterior else LOG_RESPALDOS)
+            ),
+            rotate_daily=rotate_daily if rotate_daily is not None else (anterior.rotate_daily if anterior else True),
+            db_path=db_path
+        )
+    if anterior is not None:
+        anterior.close()
+    return _log_writer
+
+def flush_log(timeout: float = 5.0) -> bool:
+    """Bloquea hasta que lo registrado hasta ahora esté en disco."""
+    return _log_writer.flush(timeout) if _log_writer is not None else True
+
+@atexit.register
+def close_log() -> None:
+    """Vaciado síncrono al salir (atexit y QApplication.aboutToQuit)."""
+    if _log_writer is not None:
+        _log_writer.close()
+
+def _reiniciar_log_en_hijo() -> None:
+    # Tras fork el hilo escritor no existe en el hijo: se creará uno propio
+    global _log_writer, _log_lock
+    _log_writer = None
+    _log_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_log_en_hijo)
+
+def log_db(message: str, nivel: Optional[str] = None, **datos: Any) -> None:
+    """
+    Registra eventos y errores para auditoría (una línea JSON por evento).
+    Solo encola: la escritura la hace un hilo en segundo plano.
     No debe interrumpir la aplicación si falla (fallo silencioso en log).
+
+    :param nivel: "INFO", "WARNING" o "ERROR"; si se omite se deduce del mensaje.
+    :param datos: campos extra del registro (p. ej. accion=..., usuario_id=...).
     """
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     try:
-        with open(LOG_PATH, "a", encoding="utf-8") as f:
-            f.write(f"[{timestamp}] {message}\n")
+        if nivel is None:
+            nivel = "ERROR" if "error" in message.lower() else "INFO"
+        registro = {
+            "ts": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "nivel": nivel,
+            "mensaje": message,
+            "pid": os.getpid(),
+            "hilo": threading.current_thread().name,
+        }
+        registro.update(datos)
+        get_log_writer().write(registro)
     except Exception:
         # No propagamos errores del log para no enmascarar errores reales.
         pass
@@ -25,6 +25,17 @@
    INDICES:
    - productos.codigo
    - ventas.fecha_venta
+
+   MIGRACIONES (database/migraciones.py, aplicadas por reset_db.py y al conectar):
+   1. ventas_diarias + triggers de mantenimiento incremental (agregados para KPIs)
+   2. venta_cabecera + ventas.id_cabecera + vista venta_detalle (tickets multi-línea)
+   3. productos_fts (FTS5) + triggers de sincronización (búsqueda de texto completo)
+   4. idx_productos_nombre / idx_productos_categoria_nombre (listado paginado por clave)
+   5. imagenes + triggers de conteo de referencias (almacén de imágenes por contenido)
+   6. productos.med_* (columnas generadas desde medidas JSON) + índices parciales
+   7. producto_codigos (referencias OEM / competencia de cod_original, búsqueda exacta)
+   8. idx_productos_updated_at (cambios recientes para la búsqueda difusa)
+   9. ventas_totales_diarias (un total por día para los KPIs; mismos triggers que 1)
    ========================================================================================== */
 
 PRAGMA foreign_keys = ON;
@@ -0,0 +1,247 @@
+# database/log_writer.py
+"""
+Escritor de log en segundo plano.
+
+- log_db() solo encola el registro (no toca el disco): la escritura sale del
+  camino crítico de ventas e inserciones.
+- Un hilo vacía la cola por lotes sobre un archivo que queda abierto, en formato
+  JSON lines (un objeto por línea).
+- Rotación por tamaño y por día: system_log.txt -> system_log.txt.1 -> ... .N
+- Opcionalmente copia cada lote a la tabla `logs` con un solo executemany.
+- La cola es acotada: si se llena se descartan registros (se cuentan y se
+  informa cuántos) en lugar de frenar a quien registra.
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+_FIN = object()   # Marca de cierre para el hilo escritor
+
+
+class LogWriter:
+    def __init__(
+        self,
+        path: str,
+        max_queue: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        max_bytes: int = 5 * 1024 * 1024,
+        backup_count: int = 5,
+        rotate_daily: bool = True,
+        db_path: Optional[str] = None
+    ):
+        self.path = path
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self.max_bytes = int(max_bytes)
+        self.backup_count = max(0, int(backup_count))
+        self.rotate_daily = rotate_daily
+        self.db_path = db_path            # None = no escribir en la tabla logs
+
+        self._cola: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._lock = threading.Lock()     # Arranque del hilo y contador de descartes
+        self._io_lock = threading.Lock()  # Archivo y conexión (hilo escritor o vaciado final)
+        self._hilo: Optional[threading.Thread] = None
+        self._cerrado = False
+        self._descartados = 0
+
+        self._archivo = None
+        self._bytes = 0
+        self._dia_archivo: Optional[date] = None
+        self._conn: Optional[sqlite3.Connection] = None
+
+    # ------------------ API ------------------
+    def write(self, record: Dict[str, Any]) -> None:
+        """Encola un registro; nunca bloquea ni lanza excepciones."""
+        if self._cerrado:
+            # Mensajes tardíos (p. ej. al cerrar el pool): se escriben directo
+            self._escribir_lote([record])
+            return
+        self._asegurar_hilo()
+        try:
+            self._cola.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self._descartados += 1
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Espera a que todo lo encolado hasta ahora esté escrito. Retorna False si venció el tiempo."""
+        if self._hilo is None or not self._hilo.is_alive():
+            self._vaciar_cola()
+            return True
+        listo = threading.Event()
+        try:
+            self._cola.put(listo, timeout=timeout)
+        except queue.Full:
+            return False
+        return listo.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Vacía la cola de forma síncrona y libera archivo y conexión."""
+        if self._cerrado:
+            return
+        self._cerrado = True
+        if self._hilo is not None and self._hilo.is_alive():
+            try:
+                self._cola.put(_FIN, timeout=timeout)
+                self._hilo.join(timeout)
+            except queue.Full:
+                pass
+        # Lo que el hilo no alcanzó a escribir (o si nunca arrancó)
+        self._vaciar_cola()
+        with self._io_lock:
+            self._cerrar_archivo()
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except sqlite3.Error:
+                    pass
+                self._conn = None
+
+    # ------------------ Hilo escritor ------------------
+    def _asegurar_hilo(self) -> None:
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._hilo.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._cola.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            lote: List[Dict[str, Any]] = []
+            avisos: List[threading.Event] = []
+            fin = False
+            # Junta lo que ya esté en cola (hasta batch_size) para escribirlo de una vez
+            while True:
+                if item is _FIN:
+                    fin = True
+                elif isinstance(item, threading.Event):
+                    avisos.append(item)
+                else:
+                    lote.append(item)
+                if fin or len(lote) >= self.batch_size:
+                    break
+                try:
+                    item = self._cola.get_nowait()
+                except queue.Empty:
+                    break
+
+            self._escribir_lote(lote)
+            for aviso in avisos:
+                aviso.set()
+            if fin:
+                return
+
+    def _vaciar_cola(self) -> None:
+        lote = []
+        while True:
+            try:
+                item = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is not _FIN:
+                lote.append(item)
+        self._escribir_lote(lote)
+
+    # ------------------ Escritura ------------------
+    def _escribir_lote(self, lote: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            descartados, self._descartados = self._descartados, 0
+        if descartados:
+            lote = lote + [{
+                "ts": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "nivel": "WARNING",
+                "mensaje": f"{descartados} mensajes de log descartados (cola llena)",
+            }]
+        if not lote:
+            return
+        with self._io_lock:
+            # El log nunca debe interrumpir la aplicación (fallo silencioso)
+            try:
+                self._escribir_archivo(lote)
+            except Exception:
+                self._cerrar_archivo()
+            if self.db_path:
+                try:
+                    self._escribir_tabla(lote)
+                except Exception:
+                    pass
+
+    def _escribir_archivo(self, lote: List[Dict[str, Any]]) -> None:
+        texto = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in lote)
+        datos = texto.encode("utf-8")
+        self._rotar_si_corresponde(len(datos))
+        if self._archivo is None:
+            self._abrir_archivo()
+        self._archivo.write(datos)
+        self._archivo.flush()
+        self._bytes += len(datos)
+
+    def _abrir_archivo(self) -> None:
+        carpeta = os.path.dirname(self.path)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        self._archivo = open(self.path, "ab")
+        self._bytes = self._archivo.tell()
+        if self._bytes:
+            self._dia_archivo = datetime.fromtimestamp(os.path.getmtime(self.path)).date()
+        else:
+            self._dia_archivo = date.today()
+
+    def _cerrar_archivo(self) -> None:
+        if self._archivo is not None:
+            try:
+                self._archivo.close()
+            except OSError:
+                pass
+            self._archivo = None
+
+    def _rotar_si_corresponde(self, nuevos_bytes: int) -> None:
+        if self._archivo is None:
+            if not os.path.exists(self.path):
+                return
+            self._abrir_archivo()
+        por_tamano = self.max_bytes > 0 and self._bytes > 0 and self._bytes + nuevos_bytes > self.max_bytes
+        por_dia = self.rotate_daily and self._bytes > 0 and self._dia_archivo != date.today()
+        if not (por_tamano or por_dia):
+            return
+
+        self._cerrar_archivo()
+        if self.backup_count == 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            origen = f"{self.path}.{i}"
+            if os.path.exists(origen):
+                os.replace(origen, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def _escribir_tabla(self, lote: List[Dict[str, Any]]) -> None:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, timeout=5)
+            self._conn.execute("PRAGMA foreign_keys = ON;")
+        filas = [
+            (r.get("accion") or r.get("nivel") or "INFO", r.get("usuario_id"), r.get("ts"),
+             r.get("mensaje"))
+            for r in lote
+        ]
+        sql = "INSERT INTO logs (accion, usuario_id, fecha, detalles) VALUES (?, ?, ?, ?)"
+        try:
+            with self._conn:
+                self._conn.executemany(sql, filas)
+        except sqlite3.IntegrityError:
+            # usuario_id inexistente: se conserva el mensaje sin el usuario
+            with self._conn:
+                self._conn.executemany(sql, [(a, None, f, d) for a, _u, f, d in filas])
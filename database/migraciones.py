@@ -0,0 +1,599 @@
+# database/migraciones.py
+"""
+Migraciones incrementales del esquema.
+
+- esquemas.sql crea la estructura base; este módulo agrega los objetos
+  posteriores (tablas de agregados, triggers, índices...).
+- Cada migración es idempotente y se registra en PRAGMA user_version, por lo que
+  se aplica una sola vez por base de datos.
+- El pool de conexiones las aplica automáticamente en la primera conexión;
+  reset_db.py las aplica tras cargar esquemas.sql.
+
+Uso manual:
+    python -m database.migraciones [--db ruta] [--reconstruir-ventas-diarias] [--reconstruir-busqueda]
+                                   [--reconstruir-imagenes] [--sincronizar-medidas]
+                                   [--reconstruir-referencias]
+"""
+import argparse
+import sqlite3
+from typing import Callable, Iterable, List, Tuple
+
+from database.db import DB_PATH, log_db
+
+# ---------------------------------------------------------------------
+# 1. Agregados diarios de ventas (día, producto, vendedor)
+# ---------------------------------------------------------------------
+# vendido_por puede ser NULL; en la clave se usa 0 ("sin vendedor") porque
+# los NULL nunca colisionan en una PRIMARY KEY y romperían el UPSERT.
+# ventas_totales_diarias (migración 9) guarda una fila por día: es la que leen
+# los KPIs (un año = 365 filas como máximo). Los mismos triggers mantienen ambas.
+SQL_VENTAS_DIARIAS = """
+CREATE TABLE IF NOT EXISTS ventas_diarias (
+    dia TEXT NOT NULL,                         -- 'YYYY-MM-DD'
+    id_producto INTEGER NOT NULL,
+    id_vendedor INTEGER NOT NULL DEFAULT 0,    -- 0 = sin vendedor
+    transacciones INTEGER NOT NULL DEFAULT 0,
+    unidades INTEGER NOT NULL DEFAULT 0,
+    ingresos REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (dia, id_producto, id_vendedor)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS ventas_totales_diarias (
+    dia TEXT PRIMARY KEY,                      -- 'YYYY-MM-DD'
+    transacciones INTEGER NOT NULL DEFAULT 0,
+    unidades INTEGER NOT NULL DEFAULT 0,
+    ingresos REAL NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_ventas_diarias_insert
+AFTER INSERT ON ventas
+BEGIN
+    INSERT INTO ventas_diarias (dia, id_producto, id_vendedor, transacciones, unidades, ingresos)
+    VALUES (
+        COALESCE(date(NEW.fecha_venta), date('now', 'localtime')),
+        NEW.id_producto, COALESCE(NEW.vendido_por, 0), 1, NEW.cantidad, NEW.total
+    )
+    ON CONFLICT (dia, id_producto, id_vendedor) DO UPDATE SET
+        transacciones = transacciones + 1,
+        unidades = unidades + excluded.unidades,
+        ingresos = ingresos + excluded.ingresos;
+    INSERT INTO ventas_totales_diarias (dia, transacciones, unidades, ingresos)
+    VALUES (COALESCE(date(NEW.fecha_venta), date('now', 'localtime')), 1, NEW.cantidad, NEW.total)
+    ON CONFLICT (dia) DO UPDATE SET
+        transacciones = transacciones + 1,
+        unidades = unidades + excluded.unidades,
+        ingresos = ingresos + excluded.ingresos;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_ventas_diarias_delete
+AFTER DELETE ON ventas
+BEGIN
+    UPDATE ventas_diarias SET
+        transacciones = transacciones - 1,
+        unidades = unidades - OLD.cantidad,
+        ingresos = ingresos - OLD.total
+    WHERE dia = COALESCE(date(OLD.fecha_venta), date('now', 'localtime'))
+      AND id_producto = OLD.id_producto
+      AND id_vendedor = COALESCE(OLD.vendido_por, 0);
+    DELETE FROM ventas_diarias WHERE transacciones <= 0
+      AND dia = COALESCE(date(OLD.fecha_venta), date('now', 'localtime'))
+      AND id_producto = OLD.id_producto
+      AND id_vendedor = COALESCE(OLD.vendido_por, 0);
+    UPDATE ventas_totales_diarias SET
+        transacciones = transacciones - 1,
+        unidades = unidades - OLD.cantidad,
+        ingresos = ingresos - OLD.total
+    WHERE dia = COALESCE(date(OLD.fecha_venta), date('now', 'localtime'));
+    DELETE FROM ventas_totales_diarias WHERE transacciones <= 0
+      AND dia = COALESCE(date(OLD.fecha_venta), date('now', 'localtime'));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_ventas_diarias_update
+AFTER UPDATE OF id_producto, cantidad, total, fecha_venta, vendido_por ON ventas
+BEGIN
+    UPDATE ventas_diarias SET
+        transacciones = transacciones - 1,
+        unidades = unidades - OLD.cantidad,
+        ingresos = ingresos - OLD.total
+    WHERE dia = COALESCE(date(OLD.fecha_venta), date('now', 'localtime'))
+      AND id_producto = OLD.id_producto
+      AND id_vendedor = COALESCE(OLD.vendido_por, 0);
+    DELETE FROM ventas_diarias WHERE transacciones <= 0
+      AND dia = COALESCE(date(OLD.fecha_venta), date('now', 'localtime'))
+      AND id_producto = OLD.id_producto
+      AND id_vendedor = COALESCE(OLD.vendido_por, 0);
+    UPDATE ventas_totales_diarias SET
+        transacciones = transacciones - 1,
+        unidades = unidades - OLD.cantidad,
+        ingresos = ingresos - OLD.total
+    WHERE dia = COALESCE(date(OLD.fecha_venta), date('now', 'localtime'));
+    DELETE FROM ventas_totales_diarias WHERE transacciones <= 0
+      AND dia = COALESCE(date(OLD.fecha_venta), date('now', 'localtime'));
+    INSERT INTO ventas_diarias (dia, id_producto, id_vendedor, transacciones, unidades, ingresos)
+    VALUES (
+        COALESCE(date(NEW.fecha_venta), date('now', 'localtime')),
+        NEW.id_producto, COALESCE(NEW.vendido_por, 0), 1, NEW.cantidad, NEW.total
+    )
+    ON CONFLICT (dia, id_producto, id_vendedor) DO UPDATE SET
+        transacciones = transacciones + 1,
+        unidades = unidades + excluded.unidades,
+        ingresos = ingresos + excluded.ingresos;
+    INSERT INTO ventas_totales_diarias (dia, transacciones, unidades, ingresos)
+    VALUES (COALESCE(date(NEW.fecha_venta), date('now', 'localtime')), 1, NEW.cantidad, NEW.total)
+    ON CONFLICT (dia) DO UPDATE SET
+        transacciones = transacciones + 1,
+        unidades = unidades + excluded.unidades,
+        ingresos = ingresos + excluded.ingresos;
+END;
+"""
+
+def reconstruir_ventas_diarias(conn: sqlite3.Connection) -> int:
+    """
+    Recalcula ventas_diarias y ventas_totales_diarias desde cero a partir de la
+    tabla ventas. No hace commit (queda dentro de la transacción del llamador).
+    Retorna el número de filas de agregados por producto/vendedor generadas.
+    """
+    cur = conn.cursor()
+    cur.execute("DELETE FROM ventas_totales_diarias")
+    cur.execute("""
+        INSERT INTO ventas_totales_diarias (dia, transacciones, unidades, ingresos)
+        SELECT
+            COALESCE(date(fecha_venta), date('now', 'localtime')),
+            COUNT(*),
+            COALESCE(SUM(cantidad), 0),
+            COALESCE(SUM(total), 0)
+        FROM ventas
+        GROUP BY 1
+    """)
+    cur.execute("DELETE FROM ventas_diarias")
+    cur.execute("""
+        INSERT INTO ventas_diarias (dia, id_producto, id_vendedor, transacciones, unidades, ingresos)
+        SELECT
+            COALESCE(date(fecha_venta), date('now', 'localtime')),
+            id_producto,
+            COALESCE(vendido_por, 0),
+            COUNT(*),
+            COALESCE(SUM(cantidad), 0),
+            COALESCE(SUM(total), 0)
+        FROM ventas
+        GROUP BY 1, 2, 3
+    """)
+    return cur.rowcount
+
+def _m001_ventas_diarias(conn: sqlite3.Connection) -> None:
+    _ejecutar_script(conn, SQL_VENTAS_DIARIAS)
+    reconstruir_ventas_diarias(conn)
+
+# ---------------------------------------------------------------------
+# 2. Ventas multi-línea: cabecera de ticket + detalle
+# ---------------------------------------------------------------------
+# Las líneas siguen viviendo en `ventas` (reportes, historial y ventas_diarias
+# no cambian); cada línea apunta a su ticket por id_cabecera y la vista
+# venta_detalle expone solo las líneas que pertenecen a un ticket.
+SQL_VENTA_CABECERA = """
+CREATE TABLE IF NOT EXISTS venta_cabecera (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fecha_venta TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    vendido_por INTEGER,
+    items INTEGER NOT NULL DEFAULT 0,          -- Número de líneas del ticket
+    total REAL NOT NULL DEFAULT 0,
+
+    FOREIGN KEY (vendido_por)
+        REFERENCES usuarios(id)
+        ON DELETE SET NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_ventas_cabecera ON ventas(id_cabecera);
+
+CREATE VIEW IF NOT EXISTS venta_detalle AS
+SELECT
+    v.id,
+    v.id_cabecera,
+    v.id_producto,
+    v.cantidad,
+    v.precio_unitario,
+    v.total
+FROM ventas v
+WHERE v.id_cabecera IS NOT NULL;
+"""
+
+def _m002_venta_cabecera(conn: sqlite3.Connection) -> None:
+    cols = [r[1] for r in conn.execute("PRAGMA table_info('ventas')").fetchall()]
+    if "id_cabecera" not in cols:
+        conn.execute("""
+            ALTER TABLE ventas ADD COLUMN id_cabecera INTEGER
+                REFERENCES venta_cabecera(id) ON DELETE SET NULL
+        """)
+    _ejecutar_script(conn, SQL_VENTA_CABECERA)
+
+# ---------------------------------------------------------------------
+# 3. Búsqueda de texto completo (FTS5) sobre productos
+# ---------------------------------------------------------------------
+# Tabla FTS5 normal (guarda su propia copia del texto): rowid = productos.id.
+# Las columnas de productos que no existan en una base vieja (p. ej. aplicacion)
+# se indexan como '' para que la tabla FTS tenga siempre la misma forma.
+# remove_diacritics: "bujia" encuentra "bujía"; prefix '2 3' acelera "amo*".
+FTS_COLUMNAS = ("codigo", "nombre", "descripcion", "cod_original", "aplicacion")
+
+SQL_PRODUCTOS_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+    codigo, nombre, descripcion, cod_original, aplicacion,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+"""
+
+def _sql_triggers_productos_fts(cols: List[str]) -> str:
+    """Triggers de sincronización según las columnas que realmente tiene productos."""
+    nuevos = ", ".join(f"NEW.{c}" if c in cols else "''" for c in FTS_COLUMNAS)
+    vigiladas = ", ".join(c for c in FTS_COLUMNAS if c in cols)
+    columnas = ", ".join(FTS_COLUMNAS)
+    return f"""
+DROP TRIGGER IF EXISTS trg_productos_fts_insert;
+DROP TRIGGER IF EXISTS trg_productos_fts_delete;
+DROP TRIGGER IF EXISTS trg_productos_fts_update;
+
+CREATE TRIGGER trg_productos_fts_insert
+AFTER INSERT ON productos
+BEGIN
+    INSERT INTO productos_fts (rowid, {columnas}) VALUES (NEW.id, {nuevos});
+END;
+
+CREATE TRIGGER trg_productos_fts_delete
+AFTER DELETE ON productos
+BEGIN
+    DELETE FROM productos_fts WHERE rowid = OLD.id;
+END;
+
+-- Solo columnas indexadas: los cambios de stock/precio no tocan el índice
+CREATE TRIGGER trg_productos_fts_update
+AFTER UPDATE OF {vigiladas} ON productos
+BEGIN
+    DELETE FROM productos_fts WHERE rowid = OLD.id;
+    INSERT INTO productos_fts (rowid, {columnas}) VALUES (NEW.id, {nuevos});
+END;
+"""
+
+def reconstruir_productos_fts(conn: sqlite3.Connection) -> int:
+    """
+    Recrea los triggers y vuelve a indexar todos los productos en productos_fts.
+    Útil tras agregar columnas a productos. No hace commit.
+    Retorna el número de productos indexados.
+    """
+    cols = [r[1] for r in conn.execute("PRAGMA table_info('productos')").fetchall()]
+    _ejecutar_script(conn, _sql_triggers_productos_fts(cols))
+    origen = ", ".join(f"COALESCE({c}, '')" if c in cols else "''" for c in FTS_COLUMNAS)
+    cur = conn.cursor()
+    cur.execute("DELETE FROM productos_fts")
+    cur.execute(f"INSERT INTO productos_fts (rowid, {', '.join(FTS_COLUMNAS)}) SELECT id, {origen} FROM productos")
+    cur.execute("INSERT INTO productos_fts (productos_fts) VALUES ('optimize')")
+    return conn.execute("SELECT COUNT(*) FROM productos_fts").fetchone()[0]
+
+def _m003_productos_fts(conn: sqlite3.Connection) -> None:
+    try:
+        _ejecutar_script(conn, SQL_PRODUCTOS_FTS)
+    except sqlite3.OperationalError as e:
+        # SQLite compilado sin FTS5: ProductoController.buscar usa LIKE como respaldo
+        if "fts5" not in str(e).lower():
+            raise
+        log_db(f"FTS5 no disponible, búsqueda sin índice de texto: {e}")
+        return
+    reconstruir_productos_fts(conn)
+
+# ---------------------------------------------------------------------
+# 4. Índices del listado paginado de productos (keyset)
+# ---------------------------------------------------------------------
+# La clave de orden del listado es (nombre COLLATE NOCASE, id): con estos índices
+# cada página es un SEARCH que lee solo `limit` filas, sin ordenar la tabla.
+SQL_INDICES_LISTADO = """
+CREATE INDEX IF NOT EXISTS idx_productos_nombre
+    ON productos(nombre COLLATE NOCASE, id);
+
+CREATE INDEX IF NOT EXISTS idx_productos_categoria_nombre
+    ON productos(categoria, nombre COLLATE NOCASE, id);
+"""
+
+def _m004_indices_listado(conn: sqlite3.Connection) -> None:
+    _ejecutar_script(conn, SQL_INDICES_LISTADO)
+
+# ---------------------------------------------------------------------
+# 5. Conteo de referencias de imágenes (almacén por contenido, utils/file_manager.py)
+# ---------------------------------------------------------------------
+# archivo = nombre en assets/imagenes_productos (productos.imagen). Los triggers
+# mantienen cuántos productos usan cada archivo; los que quedan en 0 son
+# huérfanos que recolectar_imagenes() puede borrar del disco.
+SQL_IMAGENES = """
+CREATE TABLE IF NOT EXISTS imagenes (
+    archivo TEXT PRIMARY KEY,
+    referencias INTEGER NOT NULL DEFAULT 0,
+    creado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_imagenes_huerfanas ON imagenes(archivo) WHERE referencias <= 0;
+"""
+
+SQL_TRIGGERS_IMAGENES = """
+CREATE TRIGGER IF NOT EXISTS trg_imagenes_ai AFTER INSERT ON productos
+WHEN NEW.imagen IS NOT NULL AND NEW.imagen <> ''
+BEGIN
+    INSERT INTO imagenes (archivo, referencias) VALUES (NEW.imagen, 1)
+    ON CONFLICT(archivo) DO UPDATE SET referencias = referencias + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_imagenes_ad AFTER DELETE ON productos
+WHEN OLD.imagen IS NOT NULL AND OLD.imagen <> ''
+BEGIN
+    UPDATE imagenes SET referencias = referencias - 1 WHERE archivo = OLD.imagen;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_imagenes_au AFTER UPDATE OF imagen ON productos
+WHEN OLD.imagen IS NOT NEW.imagen
+BEGIN
+    UPDATE imagenes SET referencias = referencias - 1
+    WHERE archivo = OLD.imagen;
+    INSERT INTO imagenes (archivo, referencias)
+    SELECT NEW.imagen, 1 WHERE NEW.imagen IS NOT NULL AND NEW.imagen <> ''
+    ON CONFLICT(archivo) DO UPDATE SET referencias = referencias + 1;
+END;
+"""
+
+def reconstruir_imagenes(conn: sqlite3.Connection) -> int:
+    """Recalcula los conteos desde productos (las filas en 0 se conservan para la recolección)."""
+    conn.execute("UPDATE imagenes SET referencias = 0")
+    cur = conn.execute("""
+        INSERT INTO imagenes (archivo, referencias)
+        SELECT imagen, COUNT(*) FROM productos
+        WHERE imagen IS NOT NULL AND imagen <> ''
+        GROUP BY imagen
+        ON CONFLICT(archivo) DO UPDATE SET referencias = excluded.referencias
+    """)
+    return cur.rowcount
+
+def _m005_imagenes(conn: sqlite3.Connection) -> None:
+    _ejecutar_script(conn, SQL_IMAGENES)
+    cols = [r[1] for r in conn.execute("PRAGMA table_info('productos')").fetchall()]
+    if "imagen" in cols:
+        _ejecutar_script(conn, SQL_TRIGGERS_IMAGENES)
+        reconstruir_imagenes(conn)
+
+# ---------------------------------------------------------------------
+# 6. Columnas generadas de medidas (búsqueda por medidas dentro de SQLite)
+# ---------------------------------------------------------------------
+# Una columna VIRTUAL por campo de models/medidas.py: no ocupa espacio en la
+# tabla, solo en su índice parcial (que cubre únicamente las filas con ese campo).
+def sincronizar_columnas_medidas(conn: sqlite3.Connection) -> List[str]:
+    """Agrega las columnas med_* e índices que falten. Retorna las columnas creadas."""
+    from models.medidas import campos_medidas, columna_medida, expresion_medida
+
+    # table_xinfo (no table_info) lista también las columnas generadas
+    existentes = {r[1] for r in conn.execute("PRAGMA table_xinfo('productos')").fetchall()}
+    creadas = []
+    for campo in campos_medidas():
+        columna = columna_medida(campo)
+        if columna not in existentes:
+            conn.execute(
+                f"ALTER TABLE productos ADD COLUMN {columna} "
+                f"GENERATED ALWAYS AS ({expresion_medida(campo)}) VIRTUAL"
+            )
+            creadas.append(columna)
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_productos_{columna} "
+            f"ON productos({columna}) WHERE {columna} IS NOT NULL"
+        )
+    return creadas
+
+def _m006_medidas(conn: sqlite3.Connection) -> None:
+    cols = [r[1] for r in conn.execute("PRAGMA table_info('productos')").fetchall()]
+    if "medidas" in cols:
+        sincronizar_columnas_medidas(conn)
+
+# ---------------------------------------------------------------------
+# 7. Referencias cruzadas (códigos OEM / competencia de cod_original)
+# ---------------------------------------------------------------------
+# El texto libre de cod_original se separa en Python (models/referencias.py):
+# insertar/actualizar, el importador y esta migración llenan la tabla. Los
+# triggers solo borran, así una referencia vieja nunca encuentra un producto.
+SQL_PRODUCTO_CODIGOS = """
+CREATE TABLE IF NOT EXISTS producto_codigos (
+    codigo_norm TEXT NOT NULL,                 -- 'MB998' (ver normalizar_codigo)
+    id_producto INTEGER NOT NULL,
+    fabricante TEXT,                           -- 'Mitsubishi' (si el texto lo indica)
+    PRIMARY KEY (codigo_norm, id_producto)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_producto_codigos_producto ON producto_codigos(id_producto);
+
+CREATE TRIGGER IF NOT EXISTS trg_producto_codigos_ad AFTER DELETE ON productos
+BEGIN
+    DELETE FROM producto_codigos WHERE id_producto = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_producto_codigos_au AFTER UPDATE OF cod_original ON productos
+WHEN OLD.cod_original IS NOT NEW.cod_original
+BEGIN
+    DELETE FROM producto_codigos WHERE id_producto = NEW.id;
+END;
+"""
+
+def actualizar_referencias(conn: sqlite3.Connection, ids: Iterable[int]) -> int:
+    """Vuelve a generar las referencias de estos productos (en la transacción actual). Retorna las filas."""
+    from models.referencias import extraer_referencias
+
+    ids = list(ids)
+    filas = 0
+    for i in range(0, len(ids), 500):
+        tanda = ids[i:i + 500]
+        marcas = ",".join("?" * len(tanda))
+        conn.execute(f"DELETE FROM producto_codigos WHERE id_producto IN ({marcas})", tanda)
+        productos = conn.execute(f"SELECT id, cod_original FROM productos WHERE id IN ({marcas})", tanda)
+        nuevas = [
+            (codigo, id_producto, fabricante)
+            for id_producto, cod_original in productos.fetchall()
+            for codigo, fabricante in extraer_referencias(cod_original)
+        ]
+        conn.executemany(
+            "INSERT OR IGNORE INTO producto_codigos (codigo_norm, id_producto, fabricante) VALUES (?, ?, ?)", nuevas
+        )
+        filas += len(nuevas)
+    return filas
+
+def reconstruir_referencias(conn: sqlite3.Connection) -> int:
+    """Regenera producto_codigos para todo el catálogo."""
+    conn.execute("DELETE FROM producto_codigos")
+    ids = [r[0] for r in conn.execute(
+        "SELECT id FROM productos WHERE cod_original IS NOT NULL AND cod_original <> ''"
+    ).fetchall()]
+    return actualizar_referencias(conn, ids)
+
+def _m007_producto_codigos(conn: sqlite3.Connection) -> None:
+    cols = [r[1] for r in conn.execute("PRAGMA table_info('productos')").fetchall()]
+    if "cod_original" in cols:
+        _ejecutar_script(conn, SQL_PRODUCTO_CODIGOS)
+        reconstruir_referencias(conn)
+
+# ---------------------------------------------------------------------
+# 8. Índice de productos.updated_at (refresco incremental de la búsqueda difusa)
+# ---------------------------------------------------------------------
+SQL_INDICE_UPDATED_AT = """
+CREATE INDEX IF NOT EXISTS idx_productos_updated_at ON productos(updated_at);
+"""
+
+def _m008_indice_updated_at(conn: sqlite3.Connection) -> None:
+    cols = [r[1] for r in conn.execute("PRAGMA table_info('productos')").fetchall()]
+    if "updated_at" in cols:
+        _ejecutar_script(conn, SQL_INDICE_UPDATED_AT)
+
+# ---------------------------------------------------------------------
+# 9. Totales por día (ventas_totales_diarias) para los KPIs
+# ---------------------------------------------------------------------
+TRIGGERS_VENTAS_DIARIAS = ("trg_ventas_diarias_insert", "trg_ventas_diarias_delete", "trg_ventas_diarias_update")
+
+def _m009_ventas_totales_diarias(conn: sqlite3.Connection) -> None:
+    # Los triggers de la migración 1 se recrean para que mantengan también la tabla nueva
+    for trigger in TRIGGERS_VENTAS_DIARIAS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    _ejecutar_script(conn, SQL_VENTAS_DIARIAS)
+    reconstruir_ventas_diarias(conn)
+
+# ---------------------------------------------------------------------
+# Registro de migraciones (número = valor final de PRAGMA user_version)
+# ---------------------------------------------------------------------
+MIGRACIONES: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "ventas_diarias", _m001_ventas_diarias),
+    (2, "venta_cabecera", _m002_venta_cabecera),
+    (3, "productos_fts", _m003_productos_fts),
+    (4, "indices_listado", _m004_indices_listado),
+    (5, "imagenes", _m005_imagenes),
+    (6, "medidas", _m006_medidas),
+    (7, "producto_codigos", _m007_producto_codigos),
+    (8, "indice_updated_at", _m008_indice_updated_at),
+    (9, "ventas_totales_diarias", _m009_ventas_totales_diarias),
+]
+
+def _ejecutar_script(conn: sqlite3.Connection, script: str) -> None:
+    """
+    Ejecuta varias sentencias dentro de la transacción actual.
+    (executescript haría COMMIT implícito, por eso se separan a mano.)
+    """
+    buffer = ""
+    for linea in script.splitlines(keepends=True):
+        buffer += linea
+        if sqlite3.complete_statement(buffer):
+            conn.execute(buffer)
+            buffer = ""
+    if buffer.strip():
+        conn.execute(buffer)
+
+def _esquema_base_presente(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ('productos', 'ventas')"
+    ).fetchone()
+    return row[0] == 2
+
+def aplicar_migraciones(conn: sqlite3.Connection) -> int:
+    """
+    Aplica las migraciones pendientes. Retorna la versión final del esquema.
+    Si la base aún no tiene el esquema base (reset_db.py no se ejecutó), no hace nada.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    ultima = MIGRACIONES[-1][0]
+    if version >= ultima or not _esquema_base_presente(conn):
+        return version
+
+    # BEGIN IMMEDIATE: si otro terminal migra a la vez, esperamos su lock
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for numero, nombre, migracion in MIGRACIONES:
+            if numero <= version:
+                continue
+            migracion(conn)
+            conn.execute(f"PRAGMA user_version = {int(numero)}")
+            log_db(f"Migración {numero} ({nombre}) aplicada.")
+            version = numero
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        log_db(f"Error aplicando migraciones: {e}")
+        raise
+    return version
+
+def main():
+    parser = argparse.ArgumentParser(description="Aplica migraciones del esquema.")
+    parser.add_argument("--db", default=DB_PATH, help="Ruta de la base de datos")
+    parser.add_argument(
+        "--reconstruir-ventas-diarias", action="store_true",
+        help="Recalcula los agregados ventas_diarias y ventas_totales_diarias desde la tabla ventas"
+    )
+    parser.add_argument(
+        "--reconstruir-busqueda", action="store_true",
+        help="Vuelve a indexar productos en la tabla de búsqueda productos_fts"
+    )
+    parser.add_argument(
+        "--reconstruir-imagenes", action="store_true",
+        help="Recalcula el conteo de referencias de la tabla imagenes desde productos"
+    )
+    parser.add_argument(
+        "--sincronizar-medidas", action="store_true",
+        help="Crea las columnas e índices de medidas que falten (tras agregar campos en models/medidas.py)"
+    )
+    parser.add_argument(
+        "--reconstruir-referencias", action="store_true",
+        help="Vuelve a generar la tabla producto_codigos desde productos.cod_original"
+    )
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        version = aplicar_migraciones(conn)
+        print(f"[OK] Esquema en versión {version}.")
+        if args.reconstruir_ventas_diarias:
+            conn.execute("BEGIN IMMEDIATE")
+            filas = reconstruir_ventas_diarias(conn)
+            conn.commit()
+            print(f"[OK] ventas_diarias y ventas_totales_diarias reconstruidas: {filas} filas por producto/vendedor.")
+        if args.reconstruir_busqueda:
+            conn.execute("BEGIN IMMEDIATE")
+            filas = reconstruir_productos_fts(conn)
+            conn.commit()
+            print(f"[OK] productos_fts reconstruida: {filas} productos.")
+        if args.reconstruir_imagenes:
+            conn.execute("BEGIN IMMEDIATE")
+            filas = reconstruir_imagenes(conn)
+            conn.commit()
+            print(f"[OK] imagenes reconstruida: {filas} archivos en uso.")
+        if args.sincronizar_medidas:
+            conn.execute("BEGIN IMMEDIATE")
+            creadas = sincronizar_columnas_medidas(conn)
+            conn.commit()
+            print(f"[OK] Columnas de medidas creadas: {', '.join(creadas) or 'ninguna'}.")
+        if args.reconstruir_referencias:
+            conn.execute("BEGIN IMMEDIATE")
+            filas = reconstruir_referencias(conn)
+            conn.commit()
+            print(f"[OK] producto_codigos reconstruida: {filas} referencias.")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
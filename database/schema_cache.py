@@ -0,0 +1,82 @@
+# database/schema_cache.py
+"""
+Caché de metadatos del esquema (columnas por tabla).
+
+Las columnas se leen con `PRAGMA table_info` una sola vez por proceso y base de
+datos. En cada consulta solo se compara `PRAGMA schema_version`, que SQLite
+incrementa ante cualquier cambio de esquema (ALTER TABLE, migraciones como
+migrate_add_categoria.py, etc.); si cambió, la caché se recarga completa.
+"""
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from database.db import get_pool, pooled_connection
+
+# Tablas que se precargan juntas en cada (re)carga
+TABLAS_CACHEADAS = ("productos", "ventas", "usuarios")
+
+
+class SchemaCache:
+    """Columnas por tabla, invalidadas automáticamente por `schema_version`."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # db_path -> (schema_version, {tabla: [columnas]})
+        self._por_db: Dict[str, Tuple[int, Dict[str, List[str]]]] = {}
+
+    def columnas(self, tabla: str, conn: Optional[sqlite3.Connection] = None) -> List[str]:
+        """Retorna las columnas de `tabla` (lista vacía si la tabla no existe)."""
+        if conn is None:
+            with pooled_connection() as c:
+                return self.columnas(tabla, c)
+
+        db_path = get_pool().db_path
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+
+        with self._lock:
+            entrada = self._por_db.get(db_path)
+            if entrada and entrada[0] == version and tabla in entrada[1]:
+                return list(entrada[1][tabla])
+
+        tablas = self._leer_tablas(conn, set(TABLAS_CACHEADAS) | {tabla})
+        with self._lock:
+            entrada = self._por_db.get(db_path)
+            if entrada and entrada[0] == version:
+                entrada[1].update(tablas)
+            else:
+                self._por_db[db_path] = (version, tablas)
+        return list(tablas[tabla])
+
+    def invalidar(self) -> None:
+        """Descarta todo lo cacheado (la próxima consulta relee el esquema)."""
+        with self._lock:
+            self._por_db.clear()
+
+    @staticmethod
+    def _leer_tablas(conn: sqlite3.Connection, tablas) -> Dict[str, List[str]]:
+        cur = conn.cursor()
+        resultado = {}
+        for tabla in tablas:
+            cur.execute(f"PRAGMA table_info('{tabla}')")
+            resultado[tabla] = [r[1] for r in cur.fetchall()]
+        return resultado
+
+
+_cache = SchemaCache()
+
+def get_table_columns(tabla: str, conn: Optional[sqlite3.Connection] = None) -> List[str]:
+    """Columnas cacheadas de cualquier tabla."""
+    return _cache.columnas(tabla, conn)
+
+def columnas_productos(conn: Optional[sqlite3.Connection] = None) -> List[str]:
+    return _cache.columnas("productos", conn)
+
+def columnas_ventas(conn: Optional[sqlite3.Connection] = None) -> List[str]:
+    return _cache.columnas("ventas", conn)
+
+def columnas_usuarios(conn: Optional[sqlite3.Connection] = None) -> List[str]:
+    return _cache.columnas("usuarios", conn)
+
+def invalidate_schema_cache() -> None:
+    _cache.invalidar()
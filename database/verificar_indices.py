@@ -0,0 +1,70 @@
+# database/verificar_indices.py
+"""
+Verifica con EXPLAIN QUERY PLAN que las consultas críticas usan sus índices.
+
+- Falla (código de salida 1) si alguna consulta hace SCAN de la tabla en lugar
+  de SEARCH con el índice esperado.
+- Uso: python -m database.verificar_indices [ruta/a/inventario.db]
+"""
+import sys
+import sqlite3
+from typing import List, Tuple
+
+from database.db import DB_PATH
+from database.migraciones import aplicar_migraciones
+from controllers.reporte_controller import SQL_VENTAS_POR_FECHA, SQL_KPIS, SQL_EXPORTAR_VENTAS
+from controllers.producto_controller import SQL_BUSCAR_REFERENCIA, sql_medidas, sql_pagina
+from utils.busqueda_difusa import SQL_CAMBIOS
+
+_SQL_PAGINA, _PARAMS_PAGINA = sql_pagina("codigo", ("Palier", 1), None, 200)
+_SQL_PAGINA_CAT, _PARAMS_PAGINA_CAT = sql_pagina(
+    "codigo", ("Palier", 1), {"categoria": "Transmisión", "stock_min": 1}, 200
+)
+_SQL_MEDIDAS, _PARAMS_MEDIDAS = sql_medidas({"L": (500, 520)}, "Palier")
+
+# (nombre, sql, parámetros de ejemplo, alias/tabla, índice esperado)
+CONSULTAS = [
+    ("ventas_por_fecha", SQL_VENTAS_POR_FECHA, ("2024-01-01", "2024-02-01"), "v", "idx_ventas_fecha"),
+    ("iterar_ventas", SQL_EXPORTAR_VENTAS, ("2024-01-01", "2025-01-01"), "v", "idx_ventas_fecha"),
+    ("obtener_kpis", SQL_KPIS, ("2024-01-01", "2024-02-01"), "ventas_totales_diarias", "PRIMARY KEY"),
+    ("obtener_pagina", _SQL_PAGINA, tuple(_PARAMS_PAGINA), "productos", "idx_productos_nombre"),
+    ("obtener_pagina (categoria)", _SQL_PAGINA_CAT, tuple(_PARAMS_PAGINA_CAT), "productos",
+     "idx_productos_categoria_nombre"),
+    ("buscar_por_medidas", _SQL_MEDIDAS, tuple(_PARAMS_MEDIDAS), "productos", "idx_productos_med_l"),
+    ("buscar_por_referencia", SQL_BUSCAR_REFERENCIA, ("MB998", 50), "pc", "PRIMARY KEY"),
+    ("busqueda_difusa (cambios)", SQL_CAMBIOS, ("2024-01-01 00:00:00",), "productos", "idx_productos_updated_at"),
+]
+
+def plan_de(conn: sqlite3.Connection, sql: str, params: Tuple) -> List[str]:
+    """Retorna las líneas de detalle del plan de ejecución."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+def verificar(conn: sqlite3.Connection) -> List[str]:
+    """Retorna la lista de errores encontrados (vacía si todo usa índices)."""
+    errores = []
+    for nombre, sql, params, tabla, indice in CONSULTAS:
+        plan = plan_de(conn, sql, params)
+        usa_indice = any(
+            linea.startswith(f"SEARCH {tabla} ") and indice in linea for linea in plan
+        )
+        if not usa_indice:
+            errores.append(f"{nombre}: no usa {indice} -> {plan}")
+    return errores
+
+def main():
+    ruta = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    conn = sqlite3.connect(ruta)
+    try:
+        aplicar_migraciones(conn)
+        errores = verificar(conn)
+    finally:
+        conn.close()
+
+    if errores:
+        for e in errores:
+            print(f"[ERROR] {e}")
+        sys.exit(1)
+    print(f"[OK] {len(CONSULTAS)} consultas usan sus índices.")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 import os
-import shutil
 from typing import Dict, Any, List, Optional
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QFormLayout, QComboBox, QLineEdit,
@@ -9,19 +8,14 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
 from controllers.producto_controller import ProductoController # Asegúrate de que este controlador exista
+from models.medidas import MEDIDAS_POR_CATEGORIA
+from utils.file_manager import asignar_imagen_async
 
 # --- CONSTANTES DE CONFIGURACIÓN ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 ASSETS_DIR = os.path.join(BASE_DIR, "assets", "imagenes_productos")
 os.makedirs(ASSETS_DIR, exist_ok=True)
 
-# Centralización de las medidas (debe coincidir con inventario.py)
-MEDIDAS_POR_CATEGORIA = {
-    "Palier": ["A", "B", "C", "H", "L", "ABS"],
-    "Amortiguador": ["Largo Extendido", "Largo Comprimido", "Rosca", "Tipo"],
-    "Filtro": ["Diámetro", "Altura", "Rosca"],
-    "Otro": []
-}
 
 # --- CLASE PRINCIPAL ---
 class AddProductWindow(QWidget):
@@ -204,20 +198,6 @@ class AddProductWindow(QWidget):
             if v.text().strip()
         }
         
-        # 2. Manejo y Copia de Imagen (si fue seleccionada)
-        imagen_relativa: Optional[str] = None
-        if self.imagen_path:
-            nombre_archivo = os.path.basename(self.imagen_path)
-            destino = os.path.join(ASSETS_DIR, nombre_archivo)
-            try:
-                # Copiar solo si el archivo de origen no está ya en el destino
-                if os.path.abspath(self.imagen_path) != os.path.abspath(destino):
-                    shutil.copy2(self.imagen_path, destino)
-                imagen_relativa = nombre_archivo
-            except Exception as e:
-                QMessageBox.warning(self, "Advertencia", f"No se pudo copiar la imagen: {e}")
-                imagen_relativa = None
-
         # 3. Estructura de Datos (CLAVE: usar 'descripcion' y 'medidas_dict')
         try:
             ProductoController.insertar(
@@ -236,10 +216,11 @@ class AddProductWindow(QWidget):
                 
                 stock=self.txt_stock.value(),
                 # 🟢 MEJORA: Usar el valor nativo del QDoubleSpinBox (ya es float)
-                precio=self.txt_precio.value(),
-                
-                imagen_path=imagen_relativa
+                precio=self.txt_precio.value()
             )
+            # 2. Imagen: se copia al almacén en segundo plano y se asigna al terminar
+            if self.imagen_path:
+                asignar_imagen_async(codigo, self.imagen_path)
             QMessageBox.information(self, "Éxito", "✅ Producto añadido correctamente.")
             self.close()
         except Exception as e:
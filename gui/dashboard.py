@@ -11,7 +11,8 @@ from PyQt5.QtWidgets import (
     QMessageBox, QFrame, QSizePolicy, QGraphicsDropShadowEffect, QSpacerItem
 )
 from PyQt5.QtCore import Qt, QSize, QPropertyAnimation, QEasingCurve
-from PyQt5.QtGui import QIcon, QPixmap, QFont, QColor
+from PyQt5.QtGui import QIcon, QFont, QColor
+from gui.imagenes import cargar_pixmap
 
 class DashboardWindow(QMainWindow):
     """
@@ -159,7 +160,7 @@ class DashboardWindow(QMainWindow):
         lbl_img = QLabel()
         logo_path = self._resource("assets/logo.ico")
         if os.path.exists(logo_path):
-            pix = QPixmap(logo_path).scaled(32, 32, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            pix = cargar_pixmap(logo_path, 32, 32)
             lbl_img.setPixmap(pix)
         
         # Texto
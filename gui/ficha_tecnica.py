@@ -6,8 +6,10 @@ from PyQt5.QtWidgets import (
     QPushButton, QFormLayout, QMessageBox, QScrollArea,
     QSizePolicy, QFrame, QSpacerItem, QGridLayout
 )
-from PyQt5.QtGui import QPixmap, QFont
+from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt, QSize
+from gui.imagenes import cargar_pixmap
+from models.medidas import normalizar_clave
 
 # --- CONFIGURACIÓN DE RUTA ---
 BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -23,13 +25,10 @@ def _coalesce_medida(medidas: Dict[str, Any], *keys: str) -> str:
     if not isinstance(medidas, dict):
         return "N/A"
     
-    low_map = {
-        str(k).lower().replace("á", "a").replace("í", "i").replace("ó", "o").replace("é", "e").replace("ú", "u"): v
-        for k, v in medidas.items()
-    }
+    low_map = {normalizar_clave(k): v for k, v in medidas.items()}
     
     for k in keys:
-        key_norm = str(k).lower().replace("á", "a").replace("í", "i").replace("ó", "o").replace("é", "e").replace("ú", "u")
+        key_norm = normalizar_clave(k)
         if key_norm in low_map and str(low_map[key_norm]).strip() not in ("", None, "N/A"):
             return str(low_map[key_norm])
             
@@ -203,10 +202,8 @@ class FichaTecnicaWindow(QWidget):
 
         ruta = _resolve_image_path(self.producto)
         if ruta and os.path.exists(ruta):
-            pix = QPixmap(ruta)
-            # Escalar proporcionalmente a un tamaño mayor
-            scaled_pix = pix.scaled(1000, 500, Qt.KeepAspectRatio, Qt.SmoothTransformation) 
-            img_lbl.setPixmap(scaled_pix)
+            # Miniatura cacheada, escalada proporcionalmente a un tamaño mayor
+            img_lbl.setPixmap(cargar_pixmap(ruta, 1000, 500))
         else:
             img_lbl.setText("🚫 Imagen no disponible")
             img_lbl.setFont(QFont("Segoe UI", 16))
@@ -404,15 +401,18 @@ class FichaTecnicaWindow(QWidget):
     def exportar_pdf(self):
         """Llama a la utilidad externa para generar el PDF."""
         try:
-            # Aquí debe ir la llamada a tu generador real de PDF
-            # from utils.pdf_generator import generar_ficha_pdf
-            # generar_ficha_pdf(self.producto)
-            
+            from utils.pdf_generator import generar_ficha_pdf
+            ruta = generar_ficha_pdf(self.producto)
+
             QMessageBox.information(
                 self, 
-                "PDF en proceso", 
-                "El módulo de generación de PDF se está ejecutando...\n(Simulación: Ficha guardada)"
+                "PDF generado", 
+                f"Ficha técnica guardada en:\n{ruta}"
             )
+            try:
+                os.startfile(ruta)
+            except:
+                pass
         except Exception as e:
              QMessageBox.critical(self, "Error al exportar PDF", f"❌ Ocurrió un error al generar el PDF: {e}")
 
@@ -6,8 +6,11 @@ from PyQt5.QtWidgets import (
     QComboBox, QMessageBox, QFileDialog, QSpinBox, QWidget, QFormLayout,
     QDoubleSpinBox # Uso de QDoubleSpinBox para manejar precios de forma nativa
 )
-from PyQt5.QtGui import QPixmap, QValidator
+from PyQt5.QtGui import QValidator
 from controllers.producto_controller import ProductoController
+from models.medidas import MEDIDAS_POR_CATEGORIA
+from gui.imagenes import cargar_pixmap
+from utils.file_manager import asignar_imagen_async
 from typing import Dict, Any, Optional
 
 # --- Constantes y Configuración de Rutas ---
@@ -15,13 +18,6 @@ from typing import Dict, Any, Optional
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 ASSETS_DIR = os.path.join(BASE_DIR, "assets", "imagenes_productos")
 
-# Definición de campos dinámicos para medidas (puede ser centralizado en un archivo de configuración si es grande)
-MEDIDAS_POR_CATEGORIA = {
-    "Palier": ["A", "B", "C", "H", "L", "ABS"],
-    "Amortiguador": ["Largo Extendido", "Largo Comprimido", "Rosca", "Tipo"],
-    "Filtro": ["Diámetro", "Altura", "Rosca"],
-    "Otro": []
-}
 
 # --- Clase Principal de la Forma ---
 
@@ -193,8 +189,7 @@ class ModificarProductoForm(QDialog):
             abs_img_path = path
 
         if os.path.exists(abs_img_path):
-            pix = QPixmap(abs_img_path).scaled(120, 120, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self.lbl_imagen.setPixmap(pix)
+            self.lbl_imagen.setPixmap(cargar_pixmap(abs_img_path, 120, 120))
             self.imagen_path_actual = abs_img_path
         else:
             self.lbl_imagen.setText("Imagen no encontrada")
@@ -242,16 +237,7 @@ class ModificarProductoForm(QDialog):
             if v.text().strip()
         }
         
-        # 2. Determinación del nombre de la imagen a guardar
-        imagen_nombre = None
-        if self.imagen_path_actual and self.nueva_imagen_seleccionada:
-            # Si se seleccionó una nueva imagen, guardamos su nombre de archivo.
-            imagen_nombre = os.path.basename(self.imagen_path_actual)
-        elif self.imagen_path_actual:
-             # Si no se cambió, pero ya tenía una, conservamos el nombre de archivo existente.
-             imagen_nombre = os.path.basename(self.imagen_path_actual)
-            
-        # 3. Creación del diccionario de datos
+        # 2. Creación del diccionario de datos
         data = {
             "nombre": self.nombre.text().strip(),
             "categoria": self.categoria.currentText(),
@@ -259,9 +245,13 @@ class ModificarProductoForm(QDialog):
             "cod_original": self.cod_original.text().strip(),
             "stock": self.stock.value(),
             "precio": self.precio.value(), # Usar el valor float del QDoubleSpinBox
-            "medidas": medidas,
-            "imagen": imagen_nombre
+            "medidas": medidas
         }
+
+        # 3. Imagen: si no se cambió se conserva el nombre existente. Una imagen nueva
+        #    no va aquí: _guardar la copia al almacén en segundo plano y la asigna al terminar.
+        if not self.nueva_imagen_seleccionada:
+            data["imagen"] = os.path.basename(self.imagen_path_actual) if self.imagen_path_actual else None
         
         return data
 
@@ -286,6 +276,8 @@ class ModificarProductoForm(QDialog):
             exito = ProductoController.actualizar(self.codigo_original, **data)
             
             if exito:
+                if self.nueva_imagen_seleccionada and self.imagen_path_actual:
+                    asignar_imagen_async(data.get("codigo", self.codigo_original), self.imagen_path_actual)
                 QMessageBox.information(self, "Éxito", "Producto actualizado correctamente.")
                 self.accept()
             else:
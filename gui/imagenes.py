@@ -0,0 +1,52 @@
+# gui/imagenes.py
+"""
+Carga de imágenes para las ventanas: miniatura en disco (utils/miniaturas.py)
++ caché LRU en memoria de QPixmap ya escalados.
+
+Reabrir una ficha o un formulario reutiliza el QPixmap de la última vez; la
+primera apertura decodifica una miniatura chica en vez del JPEG original.
+Usar solo desde el hilo de la interfaz (QPixmap no es seguro entre hilos).
+"""
+import os
+from collections import OrderedDict
+from typing import Tuple
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap
+
+from utils.miniaturas import hash_archivo, ruta_miniatura
+
+MAX_PIXMAPS = 64   # Entradas del LRU en memoria
+
+_cache: "OrderedDict[Tuple[str, int, int], QPixmap]" = OrderedDict()
+
+def cargar_pixmap(ruta: str, ancho: int, alto: int) -> QPixmap:
+    """
+    QPixmap de `ruta` escalado para caber en ancho x alto (manteniendo proporción).
+    Retorna un QPixmap nulo (isNull()) si la imagen no existe o no se puede leer.
+    """
+    if not ruta or not os.path.exists(ruta):
+        return QPixmap()
+    try:
+        clave = (hash_archivo(ruta), int(ancho), int(alto))
+    except OSError:
+        return QPixmap()
+
+    pix = _cache.get(clave)
+    if pix is not None:
+        _cache.move_to_end(clave)
+        return pix
+
+    pix = QPixmap(ruta_miniatura(ruta, ancho, alto))
+    if pix.isNull():
+        return pix
+    # Escalar una miniatura de pocos cientos de px es barato (mismo resultado que antes)
+    pix = pix.scaled(ancho, alto, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    _cache[clave] = pix
+    if len(_cache) > MAX_PIXMAPS:
+        _cache.popitem(last=False)
+    return pix
+
+def vaciar_cache() -> None:
+    _cache.clear()
@@ -1,15 +1,20 @@
 import os
-import shutil
-from typing import Dict, Any, Optional, Tuple, List
+from typing import Dict, Any, Optional, List
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem,
+    QWidget, QVBoxLayout, QLabel, QTableView,
     QPushButton, QHBoxLayout, QDialog, QFormLayout, QLineEdit,
     QSpinBox, QMessageBox, QFileDialog, QComboBox, QHeaderView,
-    QFrame, QDoubleSpinBox, QAbstractItemView
+    QFrame, QDoubleSpinBox, QAbstractItemView, QProgressDialog, QInputDialog
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont
 from controllers.producto_controller import ProductoController
+from models.medidas import MEDIDAS_POR_CATEGORIA
+from gui.modelo_productos import ProductosTableModel
+from gui.tareas import EjecutorTareas
+from utils.importador_catalogo import importar_catalogo
+from utils.pdf_generator import generar_fichas_lote
+from utils.file_manager import asignar_imagen_async
 from gui.ficha_tecnica import FichaTecnicaWindow  # Asumiendo que existe
 from gui.form_modificar_producto import ModificarProductoForm  # Importar la forma modificada
 
@@ -18,15 +23,10 @@ BASE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 ASSETS_DIR = os.path.join(BASE_PATH, "assets", "imagenes_productos")
 os.makedirs(ASSETS_DIR, exist_ok=True)
 
-# Definición de campos dinámicos para medidas (Debe coincidir con add_prod.py)
-MEDIDAS_POR_CATEGORIA = {
-    "Palier": ["A", "B", "C", "H", "L", "ABS"],
-    "Amortiguador": ["Largo Extendido", "Largo Comprimido", "Rosca", "Tipo"],
-    "Bieleta": ["Largo", "Rosca", "Tipo"],
-    "Terminal": ["Rosca", "Largo", "Cono"],
-    "Filtro": ["Diámetro", "Altura", "Rosca"],
-    "Otro": []
-}
+# Búsqueda al escribir: espera tras la última tecla y mínimo de letras
+BUSQUEDA_DEBOUNCE_MS = 250
+BUSQUEDA_MIN_CARACTERES = 2
+BUSQUEDA_LIMITE = 200
 
 
 def clear_layout(layout):
@@ -56,6 +56,7 @@ class InventarioWindow(QWidget):
         super().__init__()
         self.setWindowTitle("Sistema de Gestión de Inventario")
         self.setGeometry(100, 100, 1200, 700)
+        self.tareas = EjecutorTareas(self)
         self._set_styles()
         self._init_ui()
         self._conectar_eventos()
@@ -70,7 +71,7 @@ class InventarioWindow(QWidget):
                 font-family: 'Roboto', 'Segoe UI';
                 font-size: 11pt;
             }
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 border: 1px solid #dee2e6;
                 border-radius: 8px;
@@ -115,15 +116,30 @@ class InventarioWindow(QWidget):
         separator.setFrameShadow(QFrame.Sunken)
         main_layout.addWidget(separator)
 
-        # 🔹 Tabla de productos
-        self.table = QTableWidget(0, len(self.COLUMNAS_TABLA))
-        self.table.setHorizontalHeaderLabels(self.COLUMNAS_TABLA)
+        # 🔹 Buscador (texto completo: código, nombre, descripción, códigos originales)
+        self.txt_buscar = QLineEdit()
+        self.txt_buscar.setPlaceholderText("🔍 Buscar por código, nombre, aplicación o código original...")
+        self.txt_buscar.setClearButtonEnabled(True)
+        self.txt_buscar.setMinimumHeight(36)
+        main_layout.addWidget(self.txt_buscar)
+
+        self.timer_busqueda = QTimer(self)
+        self.timer_busqueda.setSingleShot(True)
+        self.timer_busqueda.setInterval(BUSQUEDA_DEBOUNCE_MS)
+
+        # 🔹 Tabla de productos (modelo virtual: carga filas por bloques al hacer scroll)
+        self.modelo = ProductosTableModel(self.COLUMNAS_TABLA, self)
+        self.table = QTableView()
+        self.table.setModel(self.modelo)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.verticalHeader().setVisible(False)
+        # Altura fija de fila: la vista no necesita medir cada fila
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(32)
         # Uso explícito de QAbstractItemView para mayor claridad
         self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table.setSelectionMode(QAbstractItemView.SingleSelection)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         main_layout.addWidget(self.table)
 
         # 🔹 Contenedor de botones
@@ -136,17 +152,23 @@ class InventarioWindow(QWidget):
         self.btn_edit = QPushButton("✏️ Modificar")
         self.btn_delete = QPushButton("🗑️ Eliminar")
         self.btn_ver = QPushButton("🔍 Ficha Técnica")
+        self.btn_importar = QPushButton("📥 Importar Lista")
+        self.btn_catalogo = QPushButton("📑 Catálogo PDF")
 
         self.btn_add.setObjectName("btnAdd")
         self.btn_edit.setObjectName("btnEdit")
         self.btn_delete.setObjectName("btnDelete")
         self.btn_ver.setObjectName("btnView")
+        self.btn_importar.setObjectName("btnView")
+        self.btn_catalogo.setObjectName("btnView")
 
         btn_layout.addStretch()
         btn_layout.addWidget(self.btn_add)
         btn_layout.addWidget(self.btn_edit)
         btn_layout.addWidget(self.btn_delete)
         btn_layout.addWidget(self.btn_ver)
+        btn_layout.addWidget(self.btn_importar)
+        btn_layout.addWidget(self.btn_catalogo)
         btn_layout.addStretch()
 
         main_layout.addLayout(btn_layout)
@@ -158,41 +180,57 @@ class InventarioWindow(QWidget):
         self.btn_edit.clicked.connect(self._handle_modificar_producto)
         self.btn_delete.clicked.connect(self._handle_eliminar_producto)
         self.btn_ver.clicked.connect(self._handle_ver_ficha_seleccionada)
+        self.btn_importar.clicked.connect(self._handle_importar_catalogo)
+        self.btn_catalogo.clicked.connect(self._handle_catalogo_pdf)
+        self.txt_buscar.textChanged.connect(lambda _: self.timer_busqueda.start())
+        self.txt_buscar.returnPressed.connect(self._buscar)
+        self.timer_busqueda.timeout.connect(self._buscar)
 
     # ------------------ Lógica de Datos ------------------
     def cargar_productos(self):
-        """Llama al controlador para obtener y mostrar todos los productos en la tabla."""
+        """Reinicia el listado; el modelo pide al controlador solo el primer bloque visible."""
+        if self.txt_buscar.text().strip():
+            self._buscar()
+            return
         try:
-            self.table.setRowCount(0)
-            productos = ProductoController.obtener_todos() or []
-            for fila in productos:
-                self._insertar_fila(fila)
+            self.modelo.recargar()
+            if self.modelo.canFetchMore():
+                self.modelo.fetchMore()
         except Exception as e:
             QMessageBox.critical(self, "Error de DB", f"Error al cargar productos:\n{e}")
 
-    def _insertar_fila(self, datos_fila: Tuple[Any, ...]):
-        """Inserta una única fila de producto en la tabla."""
-        row_idx = self.table.rowCount()
-        self.table.insertRow(row_idx)
+    def _buscar(self):
+        """Búsqueda en segundo plano; con el cuadro vacío vuelve al listado completo."""
+        self.timer_busqueda.stop()
+        texto = self.txt_buscar.text().strip()
+        if not texto:
+            self.tareas.cancelar("busqueda")
+            self.cargar_productos()
+            return
+        if len(texto) < BUSQUEDA_MIN_CARACTERES:
+            return
+        self.tareas.ejecutar(
+            ProductoController.buscar, texto, BUSQUEDA_LIMITE,
+            clave="busqueda",
+            al_terminar=self.modelo.mostrar_resultados,
+            al_fallar=lambda e: QMessageBox.critical(self, "Error de DB", f"Error al buscar productos:\n{e}")
+        )
 
-        # Mapeo a las 5 columnas visibles (si no hay suficientes columnas en datos_fila, se usan valores vacíos)
-        for col in range(len(self.COLUMNAS_TABLA)):
-            val = datos_fila[col] if col < len(datos_fila) else ""
-            item = QTableWidgetItem(str(val))
-            item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row_idx, col, item)
+    def closeEvent(self, event):
+        self.tareas.cancelar_todo()
+        super().closeEvent(event)
 
     def _obtener_codigo_seleccionado(self) -> Optional[str]:
         """Obtiene el código del producto seleccionado en la tabla."""
-        fila = self.table.currentRow()
+        fila = self.table.currentIndex().row()
         if fila < 0:
             QMessageBox.warning(self, "Selección", "Debe seleccionar un producto de la lista.")
             return None
-        item = self.table.item(fila, 0)
-        if not item:
+        codigo = self.modelo.codigo_en(fila)
+        if not codigo:
             QMessageBox.warning(self, "Selección", "Fila seleccionada inválida.")
             return None
-        return item.text()
+        return codigo
 
     # ------------------ Handlers de Acción ------------------
     def _handle_abrir_formulario_insertar(self):
@@ -222,17 +260,122 @@ class InventarioWindow(QWidget):
         if "medidas" in payload:
             payload["medidas_dict"] = payload.pop("medidas")
 
-        # 3. Mapeo de 'imagen' (UI) a 'imagen_path' (Controller)
-        if "imagen" in payload:
-            payload["imagen_path"] = payload.pop("imagen")
+        # 3. La imagen no va en el INSERT: se copia al almacén en segundo plano
+        #    y se asigna al producto cuando la copia termina
+        imagen_origen = payload.pop("imagen", None)
+
+        self.tareas.ejecutar(
+            ProductoController.insertar,
+            clave="insertar",
+            al_terminar=lambda _id: self._on_producto_insertado(payload["codigo"].strip(), imagen_origen),
+            al_fallar=lambda e: QMessageBox.critical(
+                self, "Error de Inserción", f"❌ No se pudo agregar el producto:\n{e}"
+            ),
+            **payload
+        )
 
-        try:
-            ProductoController.insertar(**payload)
-            self.cargar_productos()
-            QMessageBox.information(self, "Éxito", "✅ Producto agregado correctamente.")
+    def _on_producto_insertado(self, codigo: str, imagen_origen: Optional[str]):
+        if imagen_origen:
+            asignar_imagen_async(codigo, imagen_origen)
+        self.cargar_productos()
+        QMessageBox.information(self, "Éxito", "✅ Producto agregado correctamente.")
+
+    def _handle_importar_catalogo(self):
+        """Importa una lista de proveedor (CSV/XLSX) en segundo plano, con progreso y cancelación."""
+        ruta, _ = QFileDialog.getOpenFileName(
+            self, "Importar lista de productos", "", "Listas (*.csv *.xlsx);;CSV (*.csv);;Excel (*.xlsx)"
+        )
+        if not ruta:
             return
-        except Exception as e:
-            QMessageBox.critical(self, "Error de Inserción", f"❌ No se pudo agregar el producto:\n{e}")
+
+        self.progreso_importacion = QProgressDialog("Importando productos...", "Cancelar", 0, 100, self)
+        self.progreso_importacion.setWindowTitle("Importar Lista")
+        self.progreso_importacion.setWindowModality(Qt.WindowModal)
+        self.progreso_importacion.setMinimumDuration(0)
+        self.progreso_importacion.canceled.connect(self._cancelar_importacion)
+        self.btn_importar.setEnabled(False)
+
+        self.tareas.ejecutar(
+            importar_catalogo, ruta,
+            clave="importar",
+            al_progreso=self._on_progreso_importacion,
+            cancelable=True,
+            al_terminar=self._on_importacion_terminada,
+            al_fallar=lambda e: self._on_importacion_terminada({"status": False, "message": str(e)})
+        )
+
+    def _on_progreso_importacion(self, hecho: int, total: int):
+        if total:
+            self.progreso_importacion.setValue(min(99, int(100 * hecho / total)))
+
+    def _cancelar_importacion(self):
+        # Los lotes ya confirmados quedan guardados; el resto se descarta
+        self.tareas.cancelar("importar")
+        self.btn_importar.setEnabled(True)
+        self.cargar_productos()
+        QMessageBox.information(self, "Importación", "Importación cancelada. Los lotes ya procesados se conservan.")
+
+    def _on_importacion_terminada(self, resumen: Dict[str, Any]):
+        self.progreso_importacion.canceled.disconnect(self._cancelar_importacion)
+        self.progreso_importacion.close()
+        self.btn_importar.setEnabled(True)
+        self.cargar_productos()
+
+        mensaje = resumen.get("message", "")
+        if resumen.get("ruta_rechazos"):
+            mensaje += f"\n\nFilas rechazadas guardadas en:\n{resumen['ruta_rechazos']}"
+        if resumen.get("status"):
+            QMessageBox.information(self, "Importación", f"✅ {mensaje}")
+        else:
+            QMessageBox.critical(self, "Importación", f"❌ {mensaje}")
+
+    def _handle_catalogo_pdf(self):
+        """Genera las fichas técnicas de una categoría (en varios procesos) y las une en un catálogo."""
+        todas = "Todas las categorías"
+        categoria, ok = QInputDialog.getItem(
+            self, "Catálogo PDF", "Categoría:", [todas] + list(MEDIDAS_POR_CATEGORIA.keys()), 0, False
+        )
+        if not ok:
+            return
+        ruta, _ = QFileDialog.getSaveFileName(self, "Guardar Catálogo PDF", "Catalogo.pdf", "PDF (*.pdf)")
+        if not ruta:
+            return
+
+        self.progreso_catalogo = QProgressDialog("Generando fichas técnicas...", "Cancelar", 0, 100, self)
+        self.progreso_catalogo.setWindowTitle("Catálogo PDF")
+        self.progreso_catalogo.setWindowModality(Qt.WindowModal)
+        self.progreso_catalogo.setMinimumDuration(0)
+        self.progreso_catalogo.canceled.connect(self._cancelar_catalogo)
+        self.btn_catalogo.setEnabled(False)
+
+        self.tareas.ejecutar(
+            generar_fichas_lote,
+            categoria=None if categoria == todas else categoria,
+            unir_en=ruta,
+            clave="catalogo",
+            al_progreso=self._on_progreso_catalogo,
+            cancelable=True,
+            al_terminar=self._on_catalogo_terminado,
+            al_fallar=lambda e: self._on_catalogo_terminado({"status": False, "message": str(e)})
+        )
+
+    def _on_progreso_catalogo(self, hecho: int, total: int):
+        if total:
+            self.progreso_catalogo.setValue(min(99, int(100 * hecho / total)))
+
+    def _cancelar_catalogo(self):
+        # Las fichas ya generadas se conservan y se omiten la próxima vez
+        self.tareas.cancelar("catalogo")
+        self.btn_catalogo.setEnabled(True)
+
+    def _on_catalogo_terminado(self, resumen: Dict[str, Any]):
+        self.progreso_catalogo.canceled.disconnect(self._cancelar_catalogo)
+        self.progreso_catalogo.close()
+        self.btn_catalogo.setEnabled(True)
+        if resumen.get("status"):
+            QMessageBox.information(self, "Catálogo PDF", f"✅ {resumen.get('message', '')}")
+        else:
+            QMessageBox.critical(self, "Catálogo PDF", f"❌ {resumen.get('message', '')}")
 
     def _handle_modificar_producto(self):
         """Maneja el click en 'Modificar Producto'."""
@@ -240,8 +383,14 @@ class InventarioWindow(QWidget):
         if not codigo:
             return
 
-        producto = ProductoController.obtener_por_codigo(codigo)
+        self.tareas.ejecutar(
+            ProductoController.obtener_por_codigo, codigo,
+            clave="producto_seleccionado",
+            al_terminar=lambda producto: self._abrir_modificar(codigo, producto),
+            al_fallar=lambda e: QMessageBox.critical(self, "Error", f"No se pudo leer el producto:\n{e}")
+        )
 
+    def _abrir_modificar(self, codigo: str, producto: Optional[Dict[str, Any]]):
         if not producto:
             QMessageBox.critical(self, "Error", "No se encontró el producto en la base de datos.")
             return
@@ -250,7 +399,8 @@ class InventarioWindow(QWidget):
         ventana = ModificarProductoForm(self, producto)
 
         if ventana.exec_() == QDialog.Accepted:
-            self.cargar_productos()
+            # Solo se refresca la fila editada (el código pudo cambiar en el formulario)
+            self.modelo.actualizar_producto(codigo, ventana.codigo.text().strip() or codigo)
 
     def _handle_eliminar_producto(self):
         """Maneja el click en 'Eliminar Producto'."""
@@ -265,14 +415,20 @@ class InventarioWindow(QWidget):
         )
 
         if confirm == QMessageBox.Yes:
-            try:
-                if ProductoController.eliminar(codigo):
-                    self.cargar_productos()
-                    QMessageBox.information(self, "Eliminado", "🗑️ Producto eliminado correctamente.")
-                else:
-                    QMessageBox.warning(self, "Error", "El producto no existe o no pudo ser eliminado.")
-            except Exception as e:
-                QMessageBox.critical(self, "Error de Eliminación", f"No se pudo eliminar el producto:\n{e}")
+            self.tareas.ejecutar(
+                ProductoController.eliminar, codigo,
+                al_terminar=lambda eliminado: self._on_producto_eliminado(codigo, eliminado),
+                al_fallar=lambda e: QMessageBox.critical(
+                    self, "Error de Eliminación", f"No se pudo eliminar el producto:\n{e}"
+                )
+            )
+
+    def _on_producto_eliminado(self, codigo: str, eliminado: bool):
+        if eliminado:
+            self.modelo.quitar_producto(codigo)
+            QMessageBox.information(self, "Eliminado", "🗑️ Producto eliminado correctamente.")
+        else:
+            QMessageBox.warning(self, "Error", "El producto no existe o no pudo ser eliminado.")
 
     def _handle_ver_ficha_seleccionada(self):
         """Maneja el click en 'Ver Ficha Técnica'."""
@@ -280,8 +436,14 @@ class InventarioWindow(QWidget):
         if not codigo:
             return
 
-        producto = ProductoController.obtener_por_codigo(codigo)
+        self.tareas.ejecutar(
+            ProductoController.obtener_por_codigo, codigo,
+            clave="producto_seleccionado",
+            al_terminar=self._abrir_ficha,
+            al_fallar=lambda e: QMessageBox.warning(self, "Error", f"No se pudo leer la ficha técnica:\n{e}")
+        )
 
+    def _abrir_ficha(self, producto: Optional[Dict[str, Any]]):
         if not producto:
             QMessageBox.warning(self, "Error", "No se encontró la ficha técnica del producto.")
             return
@@ -430,20 +592,6 @@ class FormularioProducto(QDialog):
         Recolecta todos los datos del formulario.
         Devuelve claves UI que luego serán mapeadas por InventarioWindow a las esperadas por el controlador.
         """
-        imagen_relativa: Optional[str] = None
-        if self.imagen_path:
-            nombre_archivo = os.path.basename(self.imagen_path)
-            destino = os.path.join(ASSETS_DIR, nombre_archivo)
-
-            try:
-                # Copia profesional: solo si las rutas son diferentes
-                if os.path.abspath(self.imagen_path) != os.path.abspath(destino):
-                    shutil.copy2(self.imagen_path, destino)
-                imagen_relativa = nombre_archivo
-            except Exception as e:
-                QMessageBox.warning(self, "Advertencia", f"No se pudo copiar la imagen: {e}")
-                imagen_relativa = None
-
         medidas = {
             campo: widget.text().strip()
             for campo, widget in self.medidas_widgets.items()
@@ -467,5 +615,6 @@ class FormularioProducto(QDialog):
 
             "stock": int(self.txt_stock.value()),
             "precio": float(self.txt_precio.value()),
-            "imagen": imagen_relativa
+            # Ruta de origen: InventarioWindow la copia al almacén en segundo plano
+            "imagen": self.imagen_path
         }
@@ -1,19 +1,15 @@
 import os
-import sqlite3
 from PyQt5.QtWidgets import (
     QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout,
     QHBoxLayout, QMessageBox, QToolButton, QApplication, 
     QFrame, QGraphicsDropShadowEffect, QDesktopWidget
 )
 from PyQt5.QtCore import Qt, QPropertyAnimation, QEasingCurve, QRect
-from PyQt5.QtGui import QIcon, QFont, QPixmap, QColor, QCursor
+from PyQt5.QtGui import QIcon, QFont, QColor, QCursor
 
-# Importación segura de la base de datos
-try:
-    from database.db import get_connection, log_db
-except ImportError:
-    def get_connection(): return sqlite3.connect("data/inventario.db")
-    def log_db(msg): print(msg)
+from controllers.usuario_controller import UsuarioController
+from gui.tareas import EjecutorTareas
+from gui.imagenes import cargar_pixmap
 
 class LoginWindow(QWidget):
     """
@@ -33,6 +29,7 @@ class LoginWindow(QWidget):
     def __init__(self):
         super().__init__()
         self.user_data = None 
+        self.tareas = EjecutorTareas(self)
         self._configure_window()
         self._init_ui()
         self._setup_animation()
@@ -103,7 +100,7 @@ class LoginWindow(QWidget):
         self.logo_label = QLabel(alignment=Qt.AlignCenter)
         logo_path = self.resource_path("assets/logo.ico") 
         if os.path.exists(logo_path):
-            pixmap = QPixmap(logo_path).scaled(100, 100, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            pixmap = cargar_pixmap(logo_path, 100, 100)
             self.logo_label.setPixmap(pixmap)
         else:
             self.logo_label.setText("📦") 
@@ -245,10 +242,16 @@ class LoginWindow(QWidget):
 
         self.btn_login.setEnabled(False)
         self.btn_login.setText("Cargando...")
-        QApplication.processEvents()
 
-        user_data = self._authenticate_user(usuario, password)
+        # La consulta corre en el pool de hilos; la ventana sigue respondiendo
+        self.tareas.ejecutar(
+            UsuarioController.autenticar, usuario, password,
+            clave="login",
+            al_terminar=self._on_login_resultado,
+            al_fallar=lambda e: self._on_login_resultado(None)
+        )
 
+    def _on_login_resultado(self, user_data):
         if user_data:
             self._open_dashboard(user_data)
         else:
@@ -257,30 +260,6 @@ class LoginWindow(QWidget):
             self.btn_login.setEnabled(True)
             self.btn_login.setText("INICIAR SESIÓN")
 
-    def _authenticate_user(self, usuario, password):
-        try:
-            conn = get_connection()
-            if not conn: return None
-
-            cursor = conn.cursor()
-            # Recuperamos ID para evitar errores en Ventas
-            sql = "SELECT id, nombre, rol FROM usuarios WHERE usuario=? AND contrasena=?"
-            cursor.execute(sql, (usuario, password))
-            result = cursor.fetchone()
-            conn.close()
-
-            if result:
-                return {
-                    "id": result["id"],        
-                    "nombre": result["nombre"],
-                    "rol": result["rol"]
-                }
-            return None
-
-        except Exception as e:
-            log_db(f"Error Login: {e}")
-            return None
-
     def _open_dashboard(self, user_data):
         try:
             from gui.dashboard import DashboardWindow
@@ -0,0 +1,129 @@
+# gui/modelo_productos.py
+from typing import Any, Dict, List, Optional, Tuple
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
+from controllers.producto_controller import ProductoController
+
+
+class ProductosTableModel(QAbstractTableModel):
+    """
+    Modelo virtual del listado de inventario para un QTableView.
+
+    - Las filas se piden al controlador por páginas (canFetchMore/fetchMore):
+      la vista solo solicita más cuando el usuario se acerca al final. Cada página
+      continúa desde la clave (nombre, id) de la anterior, sin OFFSET.
+    - Cada producto se guarda como una tupla (codigo, nombre, categoria, stock, precio);
+      no se crean QTableWidgetItem, el texto se formatea al pintar.
+    - Tras editar un producto se recarga únicamente su fila.
+    """
+
+    TAMANO_BLOQUE = 200
+
+    def __init__(self, columnas: List[str], parent=None):
+        super().__init__(parent)
+        self._columnas = list(columnas)
+        self._filas: List[Tuple[Any, ...]] = []
+        self._indice: Dict[str, int] = {}   # codigo -> número de fila
+        self._hay_mas = True
+        self._clave_siguiente: Optional[Tuple[str, int]] = None
+        self._filtros: Dict[str, Any] = {}
+
+    # ------------------ API de QAbstractTableModel ------------------
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._filas)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._columnas)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        if role == Qt.DisplayRole:
+            fila = self._filas[index.row()]
+            col = index.column()
+            val = fila[col] if col < len(fila) else ""
+            if col == 4 and isinstance(val, (int, float)):
+                return f"{val:.2f}"
+            return "" if val is None else str(val)
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignCenter)
+        return QVariant()
+
+    def headerData(self, section: int, orientation: int, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and section < len(self._columnas):
+            return self._columnas[section]
+        return QVariant()
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and self._hay_mas
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        if parent.isValid() or not self._hay_mas:
+            return
+        bloque, self._clave_siguiente = ProductoController.obtener_pagina(
+            self._clave_siguiente, self.TAMANO_BLOQUE, self._filtros
+        )
+        self._hay_mas = self._clave_siguiente is not None
+        if not bloque:
+            return
+        inicio = len(self._filas)
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(bloque) - 1)
+        for i, fila in enumerate(bloque, start=inicio):
+            self._filas.append(fila)
+            self._indice[str(fila[0])] = i
+        self.endInsertRows()
+
+    # ------------------ Operaciones del inventario ------------------
+    def recargar(self, filtros: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Descarta lo cargado; la vista volverá a pedir la primera página.
+        :param filtros: ver ProductoController.obtener_pagina (categoria, stock_min, stock_max).
+        """
+        self.beginResetModel()
+        self._filas = []
+        self._indice = {}
+        self._hay_mas = True
+        self._clave_siguiente = None
+        if filtros is not None:
+            self._filtros = dict(filtros)
+        self.endResetModel()
+
+    def mostrar_resultados(self, filas: List[Tuple[Any, ...]]) -> None:
+        """Reemplaza el listado por un conjunto fijo de filas (resultados de búsqueda)."""
+        self.beginResetModel()
+        self._filas = list(filas)
+        self._indice = {str(f[0]): i for i, f in enumerate(self._filas)}
+        self._hay_mas = False
+        self._clave_siguiente = None
+        self.endResetModel()
+
+    def codigo_en(self, fila: int) -> Optional[str]:
+        if 0 <= fila < len(self._filas):
+            return str(self._filas[fila][0])
+        return None
+
+    def actualizar_producto(self, codigo_anterior: str, codigo_nuevo: Optional[str] = None) -> None:
+        """Relee solo la fila editada (el código puede haber cambiado)."""
+        fila_idx = self._indice.get(codigo_anterior)
+        if fila_idx is None:
+            return
+        fila = ProductoController.obtener_fila(codigo_nuevo or codigo_anterior)
+        if fila is None:
+            self.quitar_producto(codigo_anterior)
+            return
+
+        self._filas[fila_idx] = fila
+        if codigo_nuevo and codigo_nuevo != codigo_anterior:
+            del self._indice[codigo_anterior]
+            self._indice[str(fila[0])] = fila_idx
+        self.dataChanged.emit(
+            self.index(fila_idx, 0), self.index(fila_idx, len(self._columnas) - 1)
+        )
+
+    def quitar_producto(self, codigo: str) -> None:
+        fila_idx = self._indice.get(codigo)
+        if fila_idx is None:
+            return
+        self.beginRemoveRows(QModelIndex(), fila_idx, fila_idx)
+        del self._filas[fila_idx]
+        self._indice = {str(f[0]): i for i, f in enumerate(self._filas)}
+        self.endRemoveRows()
@@ -4,13 +4,15 @@ from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout,
     QTableWidget, QTableWidgetItem, QFileDialog, QDateEdit,
     QGroupBox, QHeaderView, QFrame, QStyle, QMessageBox,
-    QGraphicsDropShadowEffect, QAbstractItemView
+    QGraphicsDropShadowEffect, QAbstractItemView, QProgressDialog
 )
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QFont, QIcon, QColor, QCursor
 
 from controllers.reporte_controller import ReporteVentasController
 from utils.pdf_reporte import PDFReportes
+from gui.tareas import EjecutorTareas
+from utils.exportar_ventas import exportar_ventas, formato_por_extension
 
 class ReporteVentasWindow(QWidget):
     """
@@ -24,6 +26,8 @@ class ReporteVentasWindow(QWidget):
         self.resize(1100, 750)
         self.datos_actuales = []
         self.kpis_actuales = {}
+        self.rango_actual = None    # (inicio, fin) de la última búsqueda mostrada
+        self.tareas = EjecutorTareas(self)
 
         self._set_styles()
         self._init_ui()
@@ -134,11 +138,16 @@ class ReporteVentasWindow(QWidget):
         btn_buscar.setCursor(QCursor(Qt.PointingHandCursor)) # Cursor puesto por código Python
         btn_buscar.clicked.connect(self.buscar)
 
-        btn_pdf = QPushButton(" Exportar a PDF")
-        btn_pdf.setObjectName("btn_pdf")
-        btn_pdf.setIcon(self.style().standardIcon(QStyle.SP_DialogSaveButton))
-        btn_pdf.setCursor(QCursor(Qt.PointingHandCursor)) # Cursor puesto por código Python
-        btn_pdf.clicked.connect(self.exportar_pdf)
+        self.btn_pdf = QPushButton(" Exportar a PDF")
+        self.btn_pdf.setObjectName("btn_pdf")
+        self.btn_pdf.setIcon(self.style().standardIcon(QStyle.SP_DialogSaveButton))
+        self.btn_pdf.setCursor(QCursor(Qt.PointingHandCursor)) # Cursor puesto por código Python
+        self.btn_pdf.clicked.connect(self.exportar_pdf)
+
+        self.btn_datos = QPushButton(" Exportar CSV/JSONL")
+        self.btn_datos.setIcon(self.style().standardIcon(QStyle.SP_DialogSaveButton))
+        self.btn_datos.setCursor(QCursor(Qt.PointingHandCursor))
+        self.btn_datos.clicked.connect(self.exportar_datos)
 
         filter_layout.addWidget(QLabel("📅 Desde:"))
         filter_layout.addWidget(self.fecha_inicio)
@@ -147,7 +156,8 @@ class ReporteVentasWindow(QWidget):
         filter_layout.addSpacing(10)
         filter_layout.addWidget(btn_buscar)
         filter_layout.addStretch()
-        filter_layout.addWidget(btn_pdf)
+        filter_layout.addWidget(self.btn_datos)
+        filter_layout.addWidget(self.btn_pdf)
 
         main_layout.addWidget(filter_group)
 
@@ -215,17 +225,51 @@ class ReporteVentasWindow(QWidget):
         self.buscar()
 
     def buscar(self):
-        """Ejecuta la búsqueda y actualiza tabla y tarjetas."""
+        """Ejecuta la búsqueda en segundo plano y actualiza tabla y tarjetas al terminar."""
         f_inicio = self.fecha_inicio.date().toString("yyyy-MM-dd")
         f_fin = self.fecha_fin.date().toString("yyyy-MM-dd")
 
         self.setCursor(Qt.WaitCursor)
-        
-        # 1. Obtener Datos Tabla
-        self.datos_actuales = ReporteVentasController.ventas_por_fecha(f_inicio, f_fin)
-        
-        # 2. Obtener KPIs (Resumen)
-        self.kpis_actuales = ReporteVentasController.obtener_kpis(f_inicio, f_fin)
+
+        # Si se cambia el rango antes de que termine, solo se pinta el último pedido
+        self.tareas.ejecutar(
+            self._consultar_reporte, f_inicio, f_fin,
+            clave="reporte",
+            al_terminar=lambda resultado: self._mostrar_reporte(resultado, (f_inicio, f_fin)),
+            al_fallar=lambda e: self._mostrar_reporte(([], {}))
+        )
+
+    @staticmethod
+    def _consultar_reporte(f_inicio: str, f_fin: str):
+        """Corre en el pool de hilos: datos de la tabla + KPIs (resumen)."""
+        return (
+            ReporteVentasController.ventas_por_fecha(f_inicio, f_fin),
+            ReporteVentasController.obtener_kpis(f_inicio, f_fin),
+        )
+
+    @staticmethod
+    def _generar_pdf_ventas(f_inicio: str, f_fin: str, columnas, ruta: str, resumen,
+                            progreso=None, cancelado=None):
+        """
+        Corre en el pool de hilos: las ventas se leen del cursor a medida que el PDF
+        las pide (iterar_ventas se crea y se consume en este mismo hilo), sin tener
+        el rango completo en memoria.
+        """
+        filas = ReporteVentasController.iterar_ventas(f_inicio, f_fin)
+        try:
+            return PDFReportes.generar_pdf_por_bloques(
+                "Reporte Detallado de Ventas", filas, columnas, ruta,
+                resumen=resumen,
+                total=ReporteVentasController.contar_ventas(f_inicio, f_fin),
+                progreso=progreso, cancelado=cancelado
+            )
+        finally:
+            # Si se canceló a mitad, devuelve la conexión al pool desde este hilo
+            filas.close()
+
+    def _mostrar_reporte(self, resultado, rango=None):
+        self.datos_actuales, self.kpis_actuales = resultado
+        self.rango_actual = rango
 
         self._llenar_tabla()
         self._actualizar_kpis()
@@ -235,6 +279,60 @@ class ReporteVentasWindow(QWidget):
         if not self.datos_actuales:
             QMessageBox.information(self, "Sin Resultados", "No se encontraron ventas en el rango seleccionado.")
 
+    def exportar_datos(self):
+        """
+        Exporta TODO el rango elegido (no solo lo que muestra la tabla) a CSV o JSON Lines.
+        Se escribe en segundo plano, fila por fila, directamente desde la base.
+        """
+        f_inicio = self.fecha_inicio.date().toString("yyyy-MM-dd")
+        f_fin = self.fecha_fin.date().toString("yyyy-MM-dd")
+        ruta, filtro = QFileDialog.getSaveFileName(
+            self, "Exportar Ventas", f"Ventas_{f_inicio}_{f_fin}",
+            "CSV (*.csv);;JSON Lines (*.jsonl)"
+        )
+        if not ruta:
+            return
+        if not os.path.splitext(ruta)[1]:
+            ruta += ".jsonl" if "jsonl" in filtro else ".csv"
+
+        self.progreso_exportacion = QProgressDialog("Exportando ventas...", "Cancelar", 0, 100, self)
+        self.progreso_exportacion.setWindowTitle("Exportar Ventas")
+        self.progreso_exportacion.setWindowModality(Qt.WindowModal)
+        self.progreso_exportacion.setMinimumDuration(0)
+        self.progreso_exportacion.canceled.connect(self._cancelar_exportacion)
+        self.btn_datos.setEnabled(False)
+
+        self.tareas.ejecutar(
+            exportar_ventas, f_inicio, f_fin, ruta, formato_por_extension(ruta),
+            clave="exportar",
+            al_progreso=self._on_progreso_exportacion,
+            cancelable=True,
+            al_terminar=self._on_exportacion_terminada,
+            al_fallar=lambda e: self._on_exportacion_terminada({"status": False, "message": str(e)})
+        )
+
+    def _on_progreso_exportacion(self, hechas: int, total: int):
+        if total:
+            self.progreso_exportacion.setValue(min(99, int(100 * hechas / total)))
+
+    def _cancelar_exportacion(self):
+        # La tarea borra el archivo temporal al notar la cancelación
+        self.tareas.cancelar("exportar")
+        self.btn_datos.setEnabled(True)
+
+    def _on_exportacion_terminada(self, resultado):
+        self.progreso_exportacion.canceled.disconnect(self._cancelar_exportacion)
+        self.progreso_exportacion.close()
+        self.btn_datos.setEnabled(True)
+        if resultado.get("status"):
+            QMessageBox.information(self, "Éxito", f"{resultado['message']}\nArchivo: {resultado['ruta']}")
+        else:
+            QMessageBox.critical(self, "Error", resultado.get("message", "No se pudo exportar."))
+
+    def closeEvent(self, event):
+        self.tareas.cancelar_todo()
+        super().closeEvent(event)
+
     def _llenar_tabla(self):
         self.tabla.setRowCount(0)
         for d in self.datos_actuales:
@@ -271,7 +369,7 @@ class ReporteVentasWindow(QWidget):
         self.card_productos.lbl_value_ref.setText(str(prods))
 
     def exportar_pdf(self):
-        if not self.datos_actuales:
+        if not self.rango_actual or not self.datos_actuales:
             return QMessageBox.warning(self, "Error", "No hay datos para exportar. Realice una búsqueda primero.")
 
         ruta, _ = QFileDialog.getSaveFileName(self, "Guardar Reporte PDF", f"Reporte_Ventas_{QDate.currentDate().toString('yyyyMMdd')}", "PDF (*.pdf)")
@@ -290,19 +388,47 @@ class ReporteVentasWindow(QWidget):
             ("total", "Total")
         ]
 
-        exito = PDFReportes.generar_pdf_reporte(
-            "Reporte Detallado de Ventas",
-            self.datos_actuales,
+        self.progreso_pdf = QProgressDialog("Generando PDF...", "Cancelar", 0, 100, self)
+        self.progreso_pdf.setWindowTitle("Exportar a PDF")
+        self.progreso_pdf.setWindowModality(Qt.WindowModal)
+        self.progreso_pdf.setMinimumDuration(0)
+        self.progreso_pdf.canceled.connect(self._cancelar_pdf)
+        self.btn_pdf.setEnabled(False)
+
+        # Tablas por bloques en segundo plano: la ventana no se congela con reportes grandes
+        f_inicio, f_fin = self.rango_actual
+        self.tareas.ejecutar(
+            self._generar_pdf_ventas,
+            f_inicio, f_fin,
             cols_export,
             ruta,
-            resumen=self.kpis_actuales # Pasamos los KPIs para que salgan en el PDF
+            self.kpis_actuales, # Pasamos los KPIs para que salgan en el PDF
+            clave="pdf",
+            al_progreso=self._on_progreso_pdf,
+            cancelable=True,
+            al_terminar=self._on_pdf_terminado,
+            al_fallar=lambda e: self._on_pdf_terminado({"status": False, "message": str(e)})
         )
 
-        if exito:
+    def _on_progreso_pdf(self, hechas: int, total: int):
+        if total:
+            self.progreso_pdf.setValue(min(99, int(100 * hechas / total)))
+
+    def _cancelar_pdf(self):
+        self.tareas.cancelar("pdf")
+        self.btn_pdf.setEnabled(True)
+
+    def _on_pdf_terminado(self, resultado):
+        self.progreso_pdf.canceled.disconnect(self._cancelar_pdf)
+        self.progreso_pdf.close()
+        self.btn_pdf.setEnabled(True)
+
+        if resultado.get("status"):
+            ruta = resultado["ruta"]
             QMessageBox.information(self, "Éxito", f"Reporte guardado correctamente en:\n{ruta}")
             try:
                 os.startfile(ruta)
             except:
                 pass
         else:
-            QMessageBox.critical(self, "Error", "No se pudo generar el PDF. Verifique si el archivo está abierto.")
\ No newline at end of file
+            QMessageBox.critical(self, "Error", f"{resultado.get('message', 'No se pudo generar el PDF.')}\nVerifique si el archivo está abierto.")
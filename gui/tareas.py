@@ -0,0 +1,154 @@
+# gui/tareas.py
+import threading
+import itertools
+from typing import Any, Callable, Dict, Optional
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from database.db import POOL_MAX_CONEXIONES
+
+# Un hilo menos que conexiones en el pool: el hilo de la UI siempre consigue una.
+MAX_HILOS_DB = max(1, POOL_MAX_CONEXIONES - 1)
+
+_pool_hilos: Optional[QThreadPool] = None
+
+def _obtener_pool_hilos() -> QThreadPool:
+    """QThreadPool compartido por todas las ventanas para las llamadas a la DB."""
+    global _pool_hilos
+    if _pool_hilos is None:
+        _pool_hilos = QThreadPool()
+        _pool_hilos.setMaxThreadCount(MAX_HILOS_DB)
+    return _pool_hilos
+
+
+class TokenCancelacion:
+    """Marca compartida entre la UI y la tarea para pedir su cancelación."""
+
+    def __init__(self):
+        self._evento = threading.Event()
+
+    def cancelar(self) -> None:
+        self._evento.set()
+
+    @property
+    def cancelado(self) -> bool:
+        return self._evento.is_set()
+
+
+class _SenalesTarea(QObject):
+    # Se emiten desde el hilo de trabajo; Qt las entrega en el hilo de la UI.
+    terminado = pyqtSignal(object)
+    fallo = pyqtSignal(object)
+    progreso = pyqtSignal(int, int)
+
+
+class _Tarea(QRunnable):
+    def __init__(self, fn: Callable, args, kwargs, token: TokenCancelacion, senales: _SenalesTarea):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.token = token
+        self.senales = senales
+
+    def run(self):
+        # Si se canceló mientras esperaba turno, ni siquiera toca la DB
+        if self.token.cancelado:
+            return
+        try:
+            resultado = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            if not self.token.cancelado:
+                self.senales.fallo.emit(e)
+            return
+        if not self.token.cancelado:
+            self.senales.terminado.emit(resultado)
+
+
+class EjecutorTareas(QObject):
+    """
+    Ejecuta llamadas a controladores fuera del hilo de la UI.
+
+    - Los resultados llegan por señales Qt y los callbacks corren en el hilo de la UI.
+    - `clave` agrupa pedidos equivalentes: un pedido nuevo con la misma clave cancela
+      al anterior y los resultados viejos se descartan (solo se pinta el último).
+    - `cancelar(clave)` / `cancelar_todo()` evitan que corran o se entreguen tareas pendientes.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._vigentes: Dict[str, int] = {}               # clave -> id de la última tarea
+        self._tokens: Dict[int, TokenCancelacion] = {}    # id -> token (tareas vivas)
+        self._senales: Dict[int, _SenalesTarea] = {}      # mantiene vivos los QObject de señales
+
+    def ejecutar(
+        self,
+        fn: Callable,
+        *args,
+        clave: Optional[str] = None,
+        al_terminar: Optional[Callable[[Any], None]] = None,
+        al_fallar: Optional[Callable[[Exception], None]] = None,
+        al_progreso: Optional[Callable[[int, int], None]] = None,
+        cancelable: bool = False,
+        **kwargs
+    ) -> TokenCancelacion:
+        """
+        Programa `fn(*args, **kwargs)` en el pool de hilos.
+
+        :param al_progreso: si se indica, `fn` recibe `progreso=callable(hechos, total)`.
+        :param cancelable: si es True, `fn` recibe `cancelado=callable() -> bool`
+                           para cortar trabajos largos.
+        """
+        tarea_id = next(self._ids)
+        token = TokenCancelacion()
+        senales = _SenalesTarea()
+
+        if clave is not None:
+            anterior = self._vigentes.get(clave)
+            if anterior is not None:
+                self._descartar(anterior)
+            self._vigentes[clave] = tarea_id
+
+        if al_progreso is not None:
+            senales.progreso.connect(al_progreso)
+            kwargs["progreso"] = lambda hechos, total: senales.progreso.emit(int(hechos), int(total))
+        if cancelable:
+            kwargs["cancelado"] = lambda: token.cancelado
+
+        senales.terminado.connect(lambda r: self._entregar(tarea_id, clave, al_terminar, r))
+        senales.fallo.connect(lambda e: self._entregar(tarea_id, clave, al_fallar, e))
+
+        self._tokens[tarea_id] = token
+        self._senales[tarea_id] = senales
+        _obtener_pool_hilos().start(_Tarea(fn, args, kwargs, token, senales))
+        return token
+
+    def cancelar(self, clave: str) -> None:
+        tarea_id = self._vigentes.pop(clave, None)
+        if tarea_id is not None:
+            self._descartar(tarea_id)
+
+    def cancelar_todo(self) -> None:
+        for tarea_id in list(self._tokens):
+            self._descartar(tarea_id)
+        self._vigentes.clear()
+
+    def _descartar(self, tarea_id: int) -> None:
+        """Cancela la tarea y olvida su resultado (la tarea conserva sus propias referencias)."""
+        token = self._tokens.pop(tarea_id, None)
+        self._senales.pop(tarea_id, None)
+        if token is not None:
+            token.cancelar()
+
+    def _entregar(self, tarea_id: int, clave: Optional[str], callback: Optional[Callable], valor: Any) -> None:
+        token = self._tokens.pop(tarea_id, None)
+        self._senales.pop(tarea_id, None)
+        # Resultado obsoleto: llegó una tarea más nueva con la misma clave o se canceló
+        if token is None or token.cancelado:
+            return
+        if clave is not None:
+            if self._vigentes.get(clave) != tarea_id:
+                return
+            del self._vigentes[clave]
+        if callback is not None:
+            callback(valor)
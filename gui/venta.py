@@ -1,15 +1,84 @@
 # gui/venta.py
 import os
+import time
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout,
     QTableWidget, QTableWidgetItem, QMessageBox, QSpinBox,
     QGroupBox, QFormLayout, QHeaderView, QSpacerItem, QSizePolicy, 
-    QFrame, QStyle, QAbstractItemView
+    QFrame, QStyle, QAbstractItemView, QListWidget, QListWidgetItem,
+    QApplication, QCheckBox, QShortcut
 )
-from PyQt5.QtGui import QFont, QIcon, QColor, QBrush, QCursor
-from PyQt5.QtCore import Qt, QLocale, QSize
+from PyQt5.QtGui import QFont, QIcon, QColor, QBrush, QCursor, QKeySequence
+from PyQt5.QtCore import Qt, QLocale, QSize, QTimer, QObject, QEvent, pyqtSignal
+from typing import Dict, Any, List, Optional
 from controllers.producto_controller import ProductoController
 from controllers.venta_controller import VentaController
+from gui.tareas import EjecutorTareas
+
+# Sugerencias al escribir en el buscador (texto completo)
+SUGERENCIAS_DEBOUNCE_MS = 200
+SUGERENCIAS_MIN_CARACTERES = 2
+SUGERENCIAS_LIMITE = 8
+
+# Modo escáner: el lector de códigos de barras "teclea" el código en ráfaga y envía Enter
+ESCANER_MAX_INTERVALO_MS = 35       # Entre teclas; una persona tarda bastante más
+ESCANER_MIN_CARACTERES = 3
+ESCANER_REFRESCO_MS = 30_000        # Relectura de cambios del catálogo (precios, altas, stock)
+
+def _clave_escaner(codigo: str) -> str:
+    # productos.codigo es UNIQUE y distingue mayúsculas: "ab-1" y "AB-1" son productos distintos
+    return str(codigo or "").strip()
+
+def _leer_catalogo_escaner(desde: Optional[str]) -> Dict[str, Any]:
+    """Catálogo para el índice del escáner; la carga completa se arma aquí, fuera del hilo de la UI."""
+    catalogo = ProductoController.catalogo_escaner(desde)
+    if desde is None:
+        catalogo["indice"] = {_clave_escaner(f[1]): f for f in catalogo["productos"]}
+        catalogo["claves"] = {f[0]: _clave_escaner(f[1]) for f in catalogo["productos"]}
+    return catalogo
+
+class _DetectorEscaner(QObject):
+    """
+    Filtro de teclas del buscador: distingue la lectura de un escáner (teclado
+    emulado: caracteres en ráfaga y Enter) del tipeo de una persona. Una lectura
+    emite `escaneado` y consume el Enter (no pasa por buscar_producto).
+    """
+    escaneado = pyqtSignal(str)
+
+    def __init__(self, campo: QLineEdit):
+        super().__init__(campo)
+        self.campo = campo
+        self.activo = True
+        self._rafaga = 0        # Caracteres seguidos llegados a velocidad de escáner
+        self._ultima = 0.0
+
+    def eventFilter(self, obj, event):
+        if event.type() != QEvent.KeyPress:
+            return False
+        ahora = time.perf_counter()
+        rapido = (ahora - self._ultima) * 1000 <= ESCANER_MAX_INTERVALO_MS
+        if event.key() in (Qt.Key_Return, Qt.Key_Enter):
+            texto = self.campo.text().strip()
+            es_lectura = self.activo and rapido and self._rafaga >= len(texto) >= ESCANER_MIN_CARACTERES
+            self._rafaga = 0
+            if es_lectura:
+                self.escaneado.emit(texto)
+                return True
+            return False
+        if event.text() and event.text().isprintable():
+            # El primer carácter de una ráfaga llega después de una pausa
+            self._rafaga = self._rafaga + 1 if rapido else 1
+            self._ultima = ahora
+        else:
+            self._rafaga = 0    # Borrar, flechas...: edición manual
+        return False
+
+def _buscar_codigo_o_referencia(code: str) -> List[Dict[str, Any]]:
+    """Producto con ese código; si no existe, los que tienen ese código OEM / de competencia."""
+    prod = ProductoController.obtener_por_codigo(code)
+    if prod:
+        return [prod]
+    return ProductoController.buscar_por_referencia(code, limit=SUGERENCIAS_LIMITE)
 
 class RegistrarVentaWindow(QWidget):
     """
@@ -22,6 +91,14 @@ class RegistrarVentaWindow(QWidget):
         # Guardamos el ID tal cual llega (puede ser str o int)
         self.usuario_id_raw = usuario_id 
         self.producto_seleccionado = None
+        # Líneas del ticket en curso: {"codigo", "nombre", "cantidad", "precio_unitario", "stock"}
+        self.carrito: List[Dict[str, Any]] = []
+        # Consultas a la DB fuera del hilo de la UI
+        self.tareas = EjecutorTareas(self)
+        # Modo escáner: CÓDIGO -> (id, codigo, nombre, precio, stock), precargado en segundo plano
+        self.indice_escaner: Dict[str, tuple] = {}
+        self._clave_por_id: Dict[int, str] = {}
+        self._marca_escaner: Optional[str] = None
         
         # Configuración de Ventana
         self.setWindowTitle(f"🛒 Punto de Venta Profesional - Usuario: {self.usuario_id_raw}")
@@ -31,6 +108,13 @@ class RegistrarVentaWindow(QWidget):
         self._set_styles()
         self._init_ui()
         self.cargar_historial() 
+        # Índice de "¿Quiso decir...?" listo antes del primer código mal tipeado
+        self.tareas.ejecutar(ProductoController.preparar_sugerencias, clave="indice_sugerencias")
+        self._actualizar_indice_escaner()
+        self.timer_escaner = QTimer(self)
+        self.timer_escaner.setInterval(ESCANER_REFRESCO_MS)
+        self.timer_escaner.timeout.connect(self._actualizar_indice_escaner)
+        self.timer_escaner.start()
 
     def _set_styles(self):
         """
@@ -193,6 +277,36 @@ class RegistrarVentaWindow(QWidget):
         h_search.addWidget(self.input_codigo)
         h_search.addWidget(btn_buscar)
         layout.addLayout(h_search)
+
+        # --- Modo escáner: cada lectura suma 1 unidad al carrito, sin diálogos ---
+        h_escaner = QHBoxLayout()
+        self.chk_escaner = QCheckBox("Modo escáner (cada lectura suma 1 unidad)")
+        self.chk_escaner.setChecked(True)
+        self.lbl_escaner = QLabel("")
+        h_escaner.addWidget(self.chk_escaner)
+        h_escaner.addStretch()
+        h_escaner.addWidget(self.lbl_escaner)
+        layout.addLayout(h_escaner)
+
+        self.detector_escaner = _DetectorEscaner(self.input_codigo)
+        self.input_codigo.installEventFilter(self.detector_escaner)
+        self.detector_escaner.escaneado.connect(self._procesar_escaneo)
+        self.chk_escaner.toggled.connect(lambda activo: setattr(self.detector_escaner, "activo", activo))
+
+        # Sugerencias mientras se escribe (nombre, aplicación, código original...)
+        self.lista_sugerencias = QListWidget()
+        self.lista_sugerencias.setMaximumHeight(160)
+        self.lista_sugerencias.setVisible(False)
+        self.lista_sugerencias.itemActivated.connect(self._elegir_sugerencia)
+        self.lista_sugerencias.itemClicked.connect(self._elegir_sugerencia)
+        layout.addWidget(self.lista_sugerencias)
+
+        self.timer_sugerencias = QTimer(self)
+        self.timer_sugerencias.setSingleShot(True)
+        self.timer_sugerencias.setInterval(SUGERENCIAS_DEBOUNCE_MS)
+        self.timer_sugerencias.timeout.connect(self._buscar_sugerencias)
+        # textEdited (no textChanged): solo lo que teclea el usuario, no setText()
+        self.input_codigo.textEdited.connect(lambda _: self.timer_sugerencias.start())
         
         # --- Detalles del Producto ---
         info_frame = QFrame()
@@ -231,10 +345,18 @@ class RegistrarVentaWindow(QWidget):
         self.spin_cantidad.setMinimumHeight(35)
         self.spin_cantidad.setAlignment(Qt.AlignCenter)
         self.spin_cantidad.valueChanged.connect(self._update_ui_totals)
+        # Enter en la cantidad agrega la línea al carrito
+        self.spin_cantidad.lineEdit().returnPressed.connect(self.agregar_al_carrito)
+        
+        btn_agregar = QPushButton("➕ Agregar al carrito")
+        btn_agregar.setMinimumHeight(35)
+        btn_agregar.setCursor(QCursor(Qt.PointingHandCursor))
+        btn_agregar.clicked.connect(self.agregar_al_carrito)
         
         f_cant.addWidget(lbl_cant)
         f_cant.addWidget(self.spin_cantidad)
         f_cant.addStretch() 
+        f_cant.addWidget(btn_agregar)
         
         layout.addLayout(f_cant)
         layout.addStretch() 
@@ -247,12 +369,27 @@ class RegistrarVentaWindow(QWidget):
         layout.setContentsMargins(20, 25, 20, 20)
         layout.setSpacing(10)
         
-        lbl_info = QLabel("Resumen de Pago")
+        lbl_info = QLabel("Carrito")
         lbl_info.setAlignment(Qt.AlignCenter)
         lbl_info.setStyleSheet("color: #adb5bd; font-size: 10pt; text-transform: uppercase; letter-spacing: 1px;")
         layout.addWidget(lbl_info)
         
-        layout.addStretch()
+        # --- Líneas del ticket ---
+        self.tabla_carrito = QTableWidget(0, 4)
+        self.tabla_carrito.setHorizontalHeaderLabels(["Código", "Producto", "Cant.", "Subtotal"])
+        self.tabla_carrito.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.tabla_carrito.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.tabla_carrito.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tabla_carrito.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.tabla_carrito.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tabla_carrito.verticalHeader().setVisible(False)
+        layout.addWidget(self.tabla_carrito)
+        
+        btn_quitar = QPushButton("Quitar línea")
+        btn_quitar.setCursor(QCursor(Qt.PointingHandCursor))
+        btn_quitar.setStyleSheet("background-color: #6c757d;")
+        btn_quitar.clicked.connect(self.quitar_linea_carrito)
+        layout.addWidget(btn_quitar, 0, Qt.AlignRight)
         
         lbl_total_titulo = QLabel("TOTAL A PAGAR")
         lbl_total_titulo.setAlignment(Qt.AlignCenter)
@@ -271,16 +408,18 @@ class RegistrarVentaWindow(QWidget):
         
         layout.addStretch()
         
-        btn_vender = QPushButton(" CONFIRMAR VENTA")
-        btn_vender.setObjectName("BtnVender")
-        btn_vender.setIcon(self.style().standardIcon(QStyle.SP_DialogApplyButton))
-        btn_vender.setIconSize(QSize(24, 24))
+        self.btn_vender = QPushButton(" CONFIRMAR VENTA (F12)")
+        self.btn_vender.setObjectName("BtnVender")
+        self.btn_vender.setIcon(self.style().standardIcon(QStyle.SP_DialogApplyButton))
+        self.btn_vender.setIconSize(QSize(24, 24))
         # CORRECCIÓN: Cursor de mano via Python
-        btn_vender.setCursor(QCursor(Qt.PointingHandCursor))
-        btn_vender.setMinimumHeight(60) 
-        btn_vender.clicked.connect(self.procesar_venta)
+        self.btn_vender.setCursor(QCursor(Qt.PointingHandCursor))
+        self.btn_vender.setMinimumHeight(60) 
+        self.btn_vender.clicked.connect(self.procesar_venta)
+        # Cobrar sin soltar el escáner
+        QShortcut(QKeySequence(Qt.Key_F12), self, activated=self.procesar_venta)
         
-        layout.addWidget(btn_vender)
+        layout.addWidget(self.btn_vender)
         return box
 
     def _create_history_box(self) -> QGroupBox:
@@ -306,18 +445,218 @@ class RegistrarVentaWindow(QWidget):
         layout.addWidget(self.tabla)
         return box
 
+    def closeEvent(self, event):
+        if self._cobrando():
+            # Cancelar ahora podría dejar el ticket sin registrar (o registrado sin aviso)
+            QMessageBox.information(self, "Venta en curso", "Espere a que termine de registrarse la venta.")
+            event.ignore()
+            return
+        # Los resultados pendientes ya no tienen dónde pintarse
+        self.timer_escaner.stop()
+        self.tareas.cancelar_todo()
+        super().closeEvent(event)
+
     # --- Lógica del Negocio ---
 
+    def _actualizar_indice_escaner(self):
+        self.tareas.ejecutar(
+            _leer_catalogo_escaner, self._marca_escaner,
+            clave="indice_escaner",
+            al_terminar=self._aplicar_catalogo_escaner
+        )
+
+    def _aplicar_catalogo_escaner(self, catalogo: Dict[str, Any]):
+        if "indice" in catalogo:
+            self.indice_escaner = catalogo["indice"]
+            self._clave_por_id = catalogo["claves"]
+        else:
+            for fila in catalogo["productos"]:
+                self._indexar_escaner(fila)
+        self._marca_escaner = catalogo["marca"]
+        if catalogo["total"] != len(self._clave_por_id):
+            # Hubo bajas: se relee todo (ya, o en el próximo ciclo si esta era la lectura completa)
+            self._marca_escaner = None
+            if "indice" not in catalogo:
+                self._actualizar_indice_escaner()
+
+    def _indexar_escaner(self, fila: tuple):
+        clave = _clave_escaner(fila[1])
+        anterior = self._clave_por_id.get(fila[0])
+        if anterior is not None and anterior != clave:
+            # Cambió el código del producto (sin sacar a otro que ya tome ese código)
+            if (self.indice_escaner.get(anterior) or (None,))[0] == fila[0]:
+                self.indice_escaner.pop(anterior)
+        self.indice_escaner[clave] = fila
+        self._clave_por_id[fila[0]] = clave
+
+    def _procesar_escaneo(self, codigo: str):
+        """Lectura del escáner: 1 unidad al carrito desde el índice en memoria, sin esperar a la base."""
+        self.timer_sugerencias.stop()
+        self.tareas.cancelar("sugerencias")
+        self._mostrar_sugerencias([])
+        self.input_codigo.clear()
+        fila = self.indice_escaner.get(_clave_escaner(codigo))
+        if fila is not None:
+            self._agregar_escaneo(fila)
+        else:
+            # Alta reciente, índice aún cargando o código OEM: se consulta la base
+            self._verificar_escaneo(codigo)
+
+    def _verificar_escaneo(self, codigo: str):
+        self.tareas.ejecutar(
+            _buscar_codigo_o_referencia, codigo,
+            al_terminar=lambda productos: self._resultado_escaneo(codigo, productos),
+            al_fallar=lambda e: self._aviso_escaner(f"Error al buscar {codigo}: {e}", error=True)
+        )
+
+    def _resultado_escaneo(self, codigo: str, productos: List[Dict[str, Any]]):
+        if not productos:
+            self._aviso_escaner(f"{codigo}: no existe en el inventario", error=True)
+            return
+        if len(productos) > 1:
+            self._aviso_escaner(f"{codigo}: código original de varios productos, elija uno", error=True)
+            self._mostrar_resultado_busqueda(codigo, productos)
+            return
+        p = productos[0]
+        fila = (p["id"], p["codigo"], p["nombre"], p["precio"], p["stock"])
+        if _clave_escaner(p["codigo"]) == _clave_escaner(codigo):
+            self._indexar_escaner(fila)
+        self._agregar_escaneo(fila, verificado=True)
+
+    def _agregar_escaneo(self, fila: tuple, verificado: bool = False):
+        if self._cobrando():
+            return
+        _id, codigo, nombre, precio, stock = fila
+        fila_carrito = next((i for i, l in enumerate(self.carrito) if l["codigo"] == codigo), None)
+        en_carrito = self.carrito[fila_carrito]["cantidad"] if fila_carrito is not None else 0
+
+        if en_carrito + 1 > stock:
+            if not verificado:
+                # El stock del índice puede ser viejo (reposición): decide el valor actual de la base
+                self._verificar_escaneo(codigo)
+            else:
+                self._aviso_escaner(f"Sin stock: {codigo} (disponible {stock}, en carrito {en_carrito})", error=True)
+            return
+
+        if fila_carrito is None:
+            self.carrito.append({
+                "codigo": codigo,
+                "nombre": nombre,
+                "cantidad": 1,
+                "precio_unitario": float(precio or 0),
+                "stock": stock
+            })
+            fila_carrito = len(self.carrito) - 1
+            self.tabla_carrito.setRowCount(len(self.carrito))
+        else:
+            self.carrito[fila_carrito]["cantidad"] += 1
+            self.carrito[fila_carrito]["stock"] = stock
+
+        # Solo se repinta la línea tocada (no todo el ticket)
+        self._pintar_linea_carrito(fila_carrito)
+        self.tabla_carrito.selectRow(fila_carrito)
+        # Una selección manual a medias queda reemplazada por lo escaneado
+        self.producto_seleccionado = None
+        self._reset_product_ui()
+        self.lbl_nombre.setText(nombre)
+        self.lbl_stock.setText(f"Stock Disponible: <b>{stock}</b>")
+        self.lbl_precio.setText(f"Precio Unit.: {float(precio or 0):.2f} Bs")
+        self._aviso_escaner(f"✔ {codigo}  x{self.carrito[fila_carrito]['cantidad']}")
+
+    def _aviso_escaner(self, texto: str, error: bool = False):
+        self.lbl_escaner.setText(texto)
+        self.lbl_escaner.setStyleSheet(f"color: {'#dc3545' if error else '#28a745'}; font-weight: bold;")
+        if error:
+            QApplication.beep()
+
+    def _buscar_sugerencias(self):
+        texto = self.input_codigo.text().strip()
+        if len(texto) < SUGERENCIAS_MIN_CARACTERES:
+            self.tareas.cancelar("sugerencias")
+            self._mostrar_sugerencias([])
+            return
+        self.tareas.ejecutar(
+            ProductoController.buscar, texto, SUGERENCIAS_LIMITE,
+            clave="sugerencias",
+            al_terminar=self._mostrar_sugerencias
+        )
+
+    def _mostrar_sugerencias(self, filas: List[tuple], titulo: Optional[str] = None):
+        """filas en formato de listado: (codigo, nombre, categoria, stock, precio)."""
+        self.lista_sugerencias.clear()
+        if titulo and filas:
+            encabezado = QListWidgetItem(titulo)
+            encabezado.setFlags(Qt.NoItemFlags)
+            self.lista_sugerencias.addItem(encabezado)
+        for codigo, nombre, _categoria, stock, precio in filas:
+            item = QListWidgetItem(f"{codigo}  —  {nombre}   (stock {stock}, {float(precio or 0):.2f} Bs)")
+            item.setData(Qt.UserRole, codigo)
+            self.lista_sugerencias.addItem(item)
+        self.lista_sugerencias.setVisible(bool(filas))
+
+    def _elegir_sugerencia(self, item: QListWidgetItem):
+        if item.data(Qt.UserRole) is None:
+            return   # Encabezado de la lista
+        self.input_codigo.setText(item.data(Qt.UserRole))
+        self.buscar_producto()
+
     def buscar_producto(self):
         code = self.input_codigo.text().strip()
         if not code: return
         
+        # Búsqueda exacta: las sugerencias pendientes ya no hacen falta
+        self.timer_sugerencias.stop()
+        self.tareas.cancelar("sugerencias")
+        self._mostrar_sugerencias([])
         self.setCursor(Qt.WaitCursor)
-        prod = ProductoController.obtener_por_codigo(code)
+        # Una búsqueda nueva descarta el resultado de la anterior si aún no llegó
+        self.tareas.ejecutar(
+            _buscar_codigo_o_referencia, code,
+            clave="buscar",
+            al_terminar=lambda productos: self._mostrar_resultado_busqueda(code, productos),
+            al_fallar=lambda e: self._mostrar_producto(code, None)
+        )
+
+    def _mostrar_resultado_busqueda(self, code: str, productos: List[Dict[str, Any]]):
+        if len(productos) > 1:
+            # Referencia OEM compartida por varios productos: el vendedor elige en la lista
+            self.setCursor(Qt.ArrowCursor)
+            self._mostrar_sugerencias([
+                (p["codigo"], p["nombre"], p.get("categoria", ""), p["stock"], p["precio"]) for p in productos
+            ])
+            return
+        if not productos:
+            # Ni código ni referencia: códigos / nombres parecidos (errores de tipeo)
+            self.tareas.ejecutar(
+                ProductoController.sugerir_similares, code, SUGERENCIAS_LIMITE,
+                clave="buscar",
+                al_terminar=lambda filas: self._mostrar_similares(code, filas),
+                al_fallar=lambda e: self._mostrar_producto(code, None)
+            )
+            return
+        prod = productos[0]
+        if prod["codigo"] != code:
+            # Encontrado por referencia: el campo pasa a mostrar el código propio
+            self.input_codigo.setText(prod["codigo"])
+        self._mostrar_producto(code, prod)
+
+    def _mostrar_similares(self, code: str, filas: List[tuple]):
+        if not filas:
+            self._mostrar_producto(code, None)
+            return
+        self.setCursor(Qt.ArrowCursor)
+        self.producto_seleccionado = None
+        self._reset_product_ui()
+        self._mostrar_sugerencias(filas, titulo=f"«{code}» no existe. ¿Quiso decir...?")
+        # Enter elige el primero; flechas para los demás
+        self.lista_sugerencias.setCurrentRow(1)
+        self.lista_sugerencias.setFocus()
+
+    def _mostrar_producto(self, code: str, prod: Optional[Dict[str, Any]]):
         self.setCursor(Qt.ArrowCursor)
 
         if not prod:
-            QMessageBox.warning(self, "Producto No Encontrado", f"El código <b>{code}</b> no existe en el inventario.")
+            QMessageBox.warning(self, "Producto No Encontrado", f"El código <b>{code}</b> no existe en el inventario ni como código original.")
             self.producto_seleccionado = None
             self._reset_product_ui()
             self.input_codigo.selectAll()
@@ -344,13 +683,10 @@ class RegistrarVentaWindow(QWidget):
             self.spin_cantidad.selectAll()
 
     def _update_ui_totals(self):
-        if not self.producto_seleccionado: 
-            self.lbl_total_pagar.setText("0.00 Bs")
-            return
-            
-        cant = self.spin_cantidad.value()
-        precio = float(self.producto_seleccionado['precio'])
-        total = cant * precio
+        """Total = líneas del carrito + la línea en curso (si hay producto seleccionado)."""
+        total = sum(l["cantidad"] * l["precio_unitario"] for l in self.carrito)
+        if self.producto_seleccionado:
+            total += self.spin_cantidad.value() * float(self.producto_seleccionado['precio'])
         
         self.lbl_total_pagar.setText(f"{total:,.2f} Bs")
 
@@ -358,13 +694,87 @@ class RegistrarVentaWindow(QWidget):
         self.lbl_nombre.setText("---")
         self.lbl_stock.setText("Stock: 0")
         self.lbl_precio.setText("Precio: 0.00 Bs")
-        self.lbl_total_pagar.setText("0.00 Bs")
         self.spin_cantidad.setValue(1)
         self.spin_cantidad.setEnabled(False)
+        self._update_ui_totals()
 
-    def procesar_venta(self):
+    # --- Carrito ---
+
+    def agregar_al_carrito(self) -> bool:
+        """Pasa el producto seleccionado (con su cantidad) al carrito. Retorna True si se agregó."""
+        if self._cobrando():
+            return False
         if not self.producto_seleccionado:
-            return QMessageBox.warning(self, "Atención", "Por favor, busque y seleccione un producto antes de cobrar.")
+            QMessageBox.warning(self, "Atención", "Busque y seleccione un producto primero.")
+            return False
+        
+        prod = self.producto_seleccionado
+        cantidad = self.spin_cantidad.value()
+        en_carrito = sum(l["cantidad"] for l in self.carrito if l["codigo"] == prod['codigo'])
+        
+        if cantidad <= 0 or cantidad + en_carrito > prod['stock']:
+            QMessageBox.warning(
+                self, "Stock Insuficiente",
+                f"Stock disponible de {prod['codigo']}: {prod['stock']} (en carrito: {en_carrito})."
+            )
+            return False
+        
+        # Si el código ya está en el carrito, se acumula en la misma línea
+        for linea in self.carrito:
+            if linea["codigo"] == prod['codigo']:
+                linea["cantidad"] += cantidad
+                break
+        else:
+            self.carrito.append({
+                "codigo": prod['codigo'],
+                "nombre": prod['nombre'],
+                "cantidad": cantidad,
+                "precio_unitario": float(prod['precio']),
+                "stock": prod['stock']
+            })
+        
+        self.producto_seleccionado = None
+        self._reset_product_ui()
+        self._refrescar_carrito()
+        self.input_codigo.clear()
+        self.input_codigo.setFocus()
+        return True
+
+    def quitar_linea_carrito(self):
+        if self._cobrando():
+            return
+        fila = self.tabla_carrito.currentRow()
+        if 0 <= fila < len(self.carrito):
+            del self.carrito[fila]
+            self._refrescar_carrito()
+
+    def _refrescar_carrito(self):
+        self.tabla_carrito.setRowCount(len(self.carrito))
+        for i in range(len(self.carrito)):
+            self._pintar_linea_carrito(i)
+        self._update_ui_totals()
+
+    def _pintar_linea_carrito(self, i: int):
+        linea = self.carrito[i]
+        self.tabla_carrito.setItem(i, 0, QTableWidgetItem(linea["codigo"]))
+        self.tabla_carrito.setItem(i, 1, QTableWidgetItem(linea["nombre"]))
+        
+        item_cant = QTableWidgetItem(str(linea["cantidad"]))
+        item_cant.setTextAlignment(Qt.AlignCenter)
+        self.tabla_carrito.setItem(i, 2, item_cant)
+        
+        item_sub = QTableWidgetItem(f"{linea['cantidad'] * linea['precio_unitario']:.2f}")
+        item_sub.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.tabla_carrito.setItem(i, 3, item_sub)
+
+    def procesar_venta(self):
+        if self._cobrando():
+            return  # F12 mientras la venta anterior aún se registra
+        # Una línea seleccionada pero no agregada se suma al carrito antes de cobrar
+        if self.producto_seleccionado and not self.agregar_al_carrito():
+            return
+        if not self.carrito:
+            return QMessageBox.warning(self, "Atención", "Por favor, agregue al menos un producto antes de cobrar.")
         
         # --- SOLUCIÓN DEL ERROR DE ID ---
         usuario_final = None
@@ -374,23 +784,43 @@ class RegistrarVentaWindow(QWidget):
             print(f"⚠️ AVISO SISTEMA: El usuario '{self.usuario_id_raw}' es texto. Usando ID 1 por defecto.")
             usuario_final = 1 # ID por defecto (Admin)
         
+        total = sum(l["cantidad"] * l["precio_unitario"] for l in self.carrito)
         confirm = QMessageBox.question(
             self, "Confirmar Venta",
-            f"¿Registrar venta de {self.spin_cantidad.value()} unidad(es) de\n"
-            f"{self.producto_seleccionado['nombre']}?",
+            f"¿Registrar venta de {len(self.carrito)} línea(s) por {total:,.2f} Bs?",
             QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes
         )
         
         if confirm != QMessageBox.Yes:
             return
 
-        resultado = VentaController.registrar_venta(
-            codigo_producto=self.producto_seleccionado['codigo'],
-            cantidad=self.spin_cantidad.value(),
-            precio_unitario=float(self.producto_seleccionado['precio']),
-            vendido_por=usuario_final
+        # Todo el ticket se registra en una sola transacción, fuera del hilo de la UI
+        # (otra terminal puede tener la base bloqueada). Mientras tanto el carrito no cambia.
+        self._bloquear_cobro(True)
+        self.tareas.ejecutar(
+            VentaController.registrar_venta_carrito,
+            items=[
+                {"codigo": l["codigo"], "cantidad": l["cantidad"], "precio_unitario": l["precio_unitario"]}
+                for l in self.carrito
+            ],
+            vendido_por=usuario_final,
+            clave="venta",
+            al_terminar=self._venta_registrada,
+            al_fallar=lambda e: self._venta_registrada({"status": False, "message": str(e)})
         )
 
+    def _cobrando(self) -> bool:
+        """True mientras el ticket se registra: el carrito enviado no debe cambiar."""
+        return not self.btn_vender.isEnabled()
+
+    def _bloquear_cobro(self, bloquear: bool):
+        self.btn_vender.setEnabled(not bloquear)
+        self.input_codigo.setEnabled(not bloquear)
+        if not bloquear:
+            self.input_codigo.setFocus()
+
+    def _venta_registrada(self, resultado: Dict[str, Any]):
+        self._bloquear_cobro(False)
         if resultado["status"]:
             msg = QMessageBox(self)
             msg.setWindowTitle("Venta Exitosa")
@@ -399,7 +829,11 @@ class RegistrarVentaWindow(QWidget):
             msg.exec_()
             
             self.cargar_historial()
+            # El stock vendido se refleja en el índice del escáner
+            self._actualizar_indice_escaner()
             
+            self.carrito.clear()
+            self._refrescar_carrito()
             self.input_codigo.clear()
             self.input_codigo.setFocus()
             self.producto_seleccionado = None
@@ -408,7 +842,13 @@ class RegistrarVentaWindow(QWidget):
             QMessageBox.critical(self, "Error de Transacción", f"❌ No se pudo registrar:\n{resultado['message']}")
 
     def cargar_historial(self):
-        ventas = VentaController.obtener_historial()
+        self.tareas.ejecutar(
+            VentaController.obtener_historial,
+            clave="historial",
+            al_terminar=self._llenar_historial
+        )
+
+    def _llenar_historial(self, ventas: List[Dict[str, Any]]):
         self.tabla.setRowCount(len(ventas))
         
         for i, v in enumerate(ventas):
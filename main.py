@@ -1,9 +1,11 @@
 # main.py
 import sys
 import os
+import multiprocessing
 from PyQt5.QtWidgets import QApplication, QMessageBox
 from PyQt5.QtGui import QFont, QIcon
 from gui.login import LoginWindow
+from database.db import close_log
 
 # Función para aplicar estilos externos (si existieran en el futuro)
 def aplicar_estilos(app):
@@ -35,6 +37,9 @@ def main():
         # Fuente Global Moderna
         app.setFont(QFont("Segoe UI", 10))
 
+        # Vaciar el log pendiente antes de que Qt destruya las ventanas
+        app.aboutToQuit.connect(close_log)
+
         # 2. ICONO DE LA VENTANA (Barra de tareas)
         icon_path = os.path.join("assets", "logo.ico")
         if os.path.exists(icon_path):
@@ -54,4 +59,6 @@ def main():
         mostrar_error(e)
 
 if __name__ == "__main__":
+    # Necesario en Windows empaquetado: las fichas PDF en lote usan procesos hijos
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,94 @@
+# models/medidas.py
+"""
+Campos de medidas por categoría: una sola definición para los formularios,
+la ficha técnica, la búsqueda por medidas y las migraciones.
+
+- productos.medidas guarda un JSON {campo: valor} con los campos de la categoría.
+- Cada campo tiene en productos una columna generada VIRTUAL (med_<campo>) con
+  su índice parcial (migración 6), así los filtros por medida corren en SQLite
+  sin decodificar el JSON de cada fila en Python.
+- Si se agrega un campo aquí, crear sus columnas con:
+    python -m database.migraciones --sincronizar-medidas
+"""
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+MEDIDAS_POR_CATEGORIA: Dict[str, List[str]] = {
+    "Palier": ["A", "B", "C", "H", "L", "ABS"],
+    "Amortiguador": ["Largo Extendido", "Largo Comprimido", "Rosca", "Tipo"],
+    "Bieleta": ["Largo", "Rosca", "Tipo"],
+    "Terminal": ["Rosca", "Largo", "Cono"],
+    "Filtro": ["Diámetro", "Altura", "Rosca"],
+    "Otro": []
+}
+
+# Campos que se comparan como texto (el resto como número)
+CAMPOS_TEXTO = {"Tipo"}
+
+PREFIJO_COLUMNA = "med_"
+
+def normalizar_clave(clave: Any) -> str:
+    """'Diámetro ' -> 'diametro': minúsculas, sin tildes ni espacios en los extremos."""
+    texto = unicodedata.normalize("NFKD", str(clave).strip().lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+def campos_medidas() -> List[str]:
+    """Todos los campos de todas las categorías, sin repetir y en orden de aparición."""
+    campos: List[str] = []
+    for lista in MEDIDAS_POR_CATEGORIA.values():
+        for campo in lista:
+            if campo not in campos:
+                campos.append(campo)
+    return campos
+
+def campo_por_clave(clave: str) -> Optional[str]:
+    """Campo canónico para una clave escrita de cualquier forma ('largo extendido', 'DIAMETRO')."""
+    buscada = normalizar_clave(clave)
+    for campo in campos_medidas():
+        if normalizar_clave(campo) == buscada:
+            return campo
+    return None
+
+def columna_medida(campo: str) -> str:
+    """'Largo Extendido' -> 'med_largo_extendido'."""
+    return PREFIJO_COLUMNA + re.sub(r"\W+", "_", normalizar_clave(campo), flags=re.ASCII).strip("_")
+
+def valor_numerico(valor: Any) -> Optional[float]:
+    """
+    Misma conversión que la columna generada: 20 -> 20.0, 'M20' -> 20.0,
+    '62,8' -> 62.8, '20x1.5' -> 20.0; None si no empieza con un número.
+    """
+    if isinstance(valor, bool) or valor is None:
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    texto = str(valor).strip().upper().lstrip("M").replace(",", ".")
+    coincidencia = re.match(r"\d+(\.\d+)?", texto)
+    return float(coincidencia.group()) if coincidencia else None
+
+def expresion_medida(campo: str) -> str:
+    """
+    Expresión SQL de la columna generada de `campo`.
+    Prueba la clave tal cual y sus variantes (minúsculas, sin tildes), ignora
+    los JSON inválidos y convierte a número salvo en CAMPOS_TEXTO.
+    """
+    claves = []
+    for clave in (campo, campo.lower(), normalizar_clave(campo), campo.upper()):
+        if clave not in claves:
+            claves.append(clave)
+
+    valores = []
+    for clave in claves:
+        # Cada variante se convierte por separado: un "N/A" no tapa a otra clave con valor
+        crudo = "json_extract(medidas, '$.\"{}\"')".format(clave.replace("'", "''"))
+        if campo in CAMPOS_TEXTO:
+            valores.append(f"NULLIF(lower(trim({crudo})), '')")
+        else:
+            texto = f"replace(ltrim(upper(trim({crudo})), 'M'), ',', '.')"
+            valores.append(
+                f"CASE WHEN typeof({crudo}) IN ('integer', 'real') THEN {crudo} "
+                f"WHEN {texto} GLOB '[0-9]*' THEN CAST({texto} AS REAL) END"
+            )
+    valor = valores[0] if len(valores) == 1 else f"COALESCE({', '.join(valores)})"
+    return f"CASE WHEN json_valid(medidas) THEN {valor} END"
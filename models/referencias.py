@@ -0,0 +1,48 @@
+# models/referencias.py
+"""
+Códigos de referencia cruzada (OEM / competencia) a partir de productos.cod_original.
+
+cod_original es texto libre, p. ej. "Ford 1234 / Mitsubishi MB-998" o
+"1758156/1818933/AV613B437AA". Se separa en referencias (una por segmento entre
+'/', ',', ';', '|' o salto de línea) y cada código se normaliza para buscarlo
+exacto en la tabla producto_codigos (migración 7): "MB-998", "mb 998" y
+"MB998" son la misma referencia.
+"""
+import re
+import unicodedata
+from typing import List, Optional, Tuple
+
+SEPARADORES = re.compile(r"[/,;|\n]+")
+# Una palabra solo de letras (3 o más) al inicio del segmento se toma como fabricante.
+# Con menos letras se considera parte del código ("MB 998" -> MB998).
+MIN_LETRAS_FABRICANTE = 3
+MIN_LARGO_CODIGO = 3
+
+def normalizar_codigo(texto: str) -> str:
+    """'mb-998 ' -> 'MB998': mayúsculas, sin tildes, solo letras y números."""
+    texto = unicodedata.normalize("NFKD", str(texto or ""))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r"[^0-9A-Z]", "", texto.upper())
+
+def extraer_referencias(cod_original: Optional[str]) -> List[Tuple[str, Optional[str]]]:
+    """
+    [(codigo_norm, fabricante)] sin repetir. El fabricante de un segmento se
+    hereda a los siguientes que no nombran otro ("Ford 1234 / 5678").
+    Se descartan los códigos sin dígitos o de menos de MIN_LARGO_CODIGO caracteres.
+    """
+    referencias: List[Tuple[str, Optional[str]]] = []
+    vistos = set()
+    fabricante: Optional[str] = None
+    for segmento in SEPARADORES.split(cod_original or ""):
+        palabras = segmento.replace(":", " ").split()
+        nombre = []
+        while palabras and palabras[0].isalpha() and len(palabras[0]) >= MIN_LETRAS_FABRICANTE and len(palabras) > 1:
+            nombre.append(palabras.pop(0))
+        if nombre:
+            fabricante = " ".join(nombre).title()
+        codigo = normalizar_codigo("".join(palabras))
+        if len(codigo) < MIN_LARGO_CODIGO or not any(c.isdigit() for c in codigo) or codigo in vistos:
+            continue
+        vistos.add(codigo)
+        referencias.append((codigo, fabricante))
+    return referencias
@@ -6,13 +6,14 @@ a partir del archivo database/esquemas.sql.
 - Hace backup de inventario.db si ya existe (en carpeta data/backups).
 - Activa PRAGMA foreign_keys = ON.
 - Ejecuta todo el SQL en esquemas.sql usando executescript.
+- Aplica las migraciones incrementales de database/migraciones.py.
 - Uso: python reset_db.py
 """
 
 import os
-import shutil
 import sqlite3
 from datetime import datetime
+from database.migraciones import aplicar_migraciones
 
 # --- Ajusta aquí si tu estructura es distinta ---
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))            # carpeta autopa rtes_ventas
@@ -34,7 +35,15 @@ def backup_db():
         base = os.path.basename(DB_PATH)
         backup_name = f"{os.path.splitext(base)[0]}_{ts}.db"
         backup_path = os.path.join(BACKUPS_DIR, backup_name)
-        shutil.copy2(DB_PATH, backup_path)
+        # API de backup de SQLite: en modo WAL copiar solo el .db perdería lo que
+        # aún está en inventario.db-wal
+        origen = sqlite3.connect(DB_PATH)
+        destino = sqlite3.connect(backup_path)
+        try:
+            origen.backup(destino)
+        finally:
+            destino.close()
+            origen.close()
         print(f"[INFO] Backup creado: {backup_path}")
     else:
         print("[INFO] No existe inventario.db previo — no se crea backup.")
@@ -55,6 +64,8 @@ def apply_schema(sql_script):
         # Ejecutar todo el script
         cur.executescript(sql_script)
         conn.commit()
+        # Objetos posteriores al esquema base (agregados, triggers, índices...)
+        aplicar_migraciones(conn)
     finally:
         conn.close()
 
@@ -0,0 +1,15 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# Los módulos de la app se importan desde la raíz del repositorio (como main.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True, scope="session")
+def log_temporal(tmp_path_factory):
+    """Las pruebas no escriben en data/system_log.txt."""
+    from database.db import configure_log
+    configure_log(path=str(tmp_path_factory.mktemp("log") / "system_log.txt"), to_table=False)
@@ -0,0 +1,47 @@
+# tests/test_indices.py
+"""
+Planes de ejecución de las consultas de reportes sobre una base nueva
+(esquema + migraciones), independientes de la base local de cada desarrollador.
+"""
+import os
+import sqlite3
+
+import pytest
+
+from controllers.reporte_controller import SQL_KPIS, SQL_VENTAS_POR_FECHA
+from database.migraciones import aplicar_migraciones
+from database.verificar_indices import CONSULTAS, plan_de, verificar
+
+ESQUEMA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database", "esquemas.sql")
+RANGO = ("2024-01-01", "2024-02-01")
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "inventario.db"))
+    with open(ESQUEMA, encoding="utf-8") as f:
+        conn.executescript(f.read())
+    aplicar_migraciones(conn)
+    yield conn
+    conn.close()
+
+
+def _sin_scan_ventas(plan):
+    return not any(linea.split()[:2] in (["SCAN", "v"], ["SCAN", "ventas"]) for linea in plan)
+
+
+def test_ventas_por_fecha_usa_idx_ventas_fecha(conn):
+    plan = plan_de(conn, SQL_VENTAS_POR_FECHA, RANGO)
+    assert any(linea.startswith("SEARCH v USING INDEX idx_ventas_fecha") for linea in plan), plan
+    assert _sin_scan_ventas(plan), plan
+
+
+def test_obtener_kpis_no_recorre_ventas(conn):
+    # Los KPIs se leen del acumulado por día (migración 9), buscado por su clave
+    plan = plan_de(conn, SQL_KPIS, RANGO)
+    assert any(linea.startswith("SEARCH ventas_totales_diarias USING PRIMARY KEY") for linea in plan), plan
+    assert _sin_scan_ventas(plan), plan
+
+
+def test_consultas_criticas_usan_sus_indices(conn):
+    assert verificar(conn) == [], [nombre for nombre, *_ in CONSULTAS]
@@ -0,0 +1,297 @@
+# utils/busqueda_difusa.py
+"""
+Búsqueda tolerante a errores de tipeo ("GSP-21832" -> "GSP-218322").
+
+- Códigos: índice en memoria de trigramas del código normalizado (solo letras y
+  números). Los candidatos son los que comparten más trigramas con lo escrito
+  y se ordenan por distancia de edición acotada (Damerau-Levenshtein: letras
+  cambiadas, faltantes, sobrantes o invertidas).
+- Nombres: vocabulario de palabras de los nombres, también indexado por
+  trigramas. Cada palabra mal escrita se corrige a la más parecida del
+  vocabulario y la búsqueda final la hace FTS5 (ProductoController.buscar).
+- La distancia se calcula en paralelo de bits (comparador), así revisar
+  MAX_CANDIDATOS códigos toma alrededor de un milisegundo.
+- El índice se construye en el primer uso (RegistrarVentaWindow lo precalienta
+  en segundo plano) y luego se actualiza por partes: cada INTERVALO_REFRESCO
+  segundos como máximo se leen solo los productos con updated_at reciente
+  (idx_productos_updated_at, migración 8).
+"""
+import heapq
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+INTERVALO_REFRESCO = 2.0     # Segundos entre lecturas de cambios en la base
+MARGEN_REFRESCO = 5          # Segundos que se releen hacia atrás (transacciones que tardan en confirmar)
+MAX_CANDIDATOS = 150         # Candidatos (por trigramas) que se comparan con distancia de edición
+MAX_POSTINGS = 3000          # Trigramas presentes en más códigos que esto no discriminan: se omiten
+MIN_TRIGRAMAS = 2            # ...salvo que queden menos que esto
+MIN_LARGO_PALABRA = 3        # Palabras más cortas no se corrigen ni se agregan al vocabulario
+
+# Productos modificados después de la marca (usa idx_productos_updated_at)
+SQL_CAMBIOS = "SELECT id, codigo, nombre FROM productos WHERE updated_at > ?"
+
+def _plano(texto: str) -> str:
+    """Mayúsculas sin tildes (camino rápido si ya es ASCII)."""
+    texto = str(texto or "")
+    if not texto.isascii():
+        texto = unicodedata.normalize("NFKD", texto)
+        texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return texto.upper()
+
+_NO_ALFANUMERICO = re.compile(r"[^0-9A-Z]")
+_PALABRA = re.compile(r"[0-9A-Z]+")
+
+def normalizar(texto: str) -> str:
+    """'gsp-21832' -> 'GSP21832'"""
+    return _NO_ALFANUMERICO.sub("", _plano(texto))
+
+def palabras(texto: str) -> List[str]:
+    """'Amortiguador Delantero' -> ['AMORTIGUADOR', 'DELANTERO']"""
+    return _PALABRA.findall(_plano(texto))
+
+@lru_cache(maxsize=8192)
+def _palabras_vocabulario(nombre: str) -> FrozenSet[str]:
+    """Palabras de un nombre que entran al vocabulario (los nombres se repiten mucho en un catálogo)."""
+    return frozenset(p for p in palabras(nombre) if len(p) >= MIN_LARGO_PALABRA and not p.isdigit())
+
+def trigramas(texto: str) -> List[str]:
+    """Trigramas sin repetir; '^' marca el inicio (pesa más coincidir al principio)."""
+    relleno = f"^{texto}"
+    return list(dict.fromkeys(relleno[i:i + 3] for i in range(len(relleno) - 2))) if len(relleno) >= 3 else [relleno]
+
+def distancia_maxima(largo: int) -> int:
+    """Errores tolerados según el largo de lo escrito."""
+    return 1 if largo <= 4 else 2 if largo <= 8 else 3
+
+def comparador(patron: str) -> Callable[[str], int]:
+    """
+    Distancia de edición con trasposición de letras vecinas (OSA) entre
+    `patron` y cualquier texto, en paralelo de bits (Myers / Hyyrö): una
+    pasada por letra del texto en vez de la tabla completa. Las máscaras del
+    patrón se arman una vez por búsqueda y se reusan con cada candidato.
+    """
+    largo = len(patron)
+    if not largo:
+        return len
+    mascaras: Dict[str, int] = {}
+    for i, c in enumerate(patron):
+        mascaras[c] = mascaras.get(c, 0) | (1 << i)
+    todos = (1 << largo) - 1
+    ultimo = 1 << (largo - 1)
+
+    def distancia(texto: str) -> int:
+        vp, vn, d = todos, 0, largo
+        d0_previo = pm_previo = 0
+        for c in texto:
+            pm = mascaras.get(c, 0)
+            tr = (((~d0_previo) & pm) << 1) & pm_previo
+            d0 = ((((pm & vp) + vp) ^ vp) | pm | vn | tr) & todos
+            hp = (vn | ~(d0 | vp)) & todos
+            hn = d0 & vp
+            if hp & ultimo:
+                d += 1
+            elif hn & ultimo:
+                d -= 1
+            hp = ((hp << 1) | 1) & todos
+            hn = (hn << 1) & todos
+            vp = (hn | ~(d0 | hp)) & todos
+            vn = hp & d0
+            d0_previo, pm_previo = d0, pm
+        return d
+
+    return distancia
+
+def distancia_acotada(a: str, b: str, limite: int) -> int:
+    """Distancia OSA entre a y b; limite + 1 si la supera."""
+    if abs(len(a) - len(b)) > limite:
+        return limite + 1
+    return min(comparador(a)(b), limite + 1)
+
+class _Trigramas:
+    """Índice invertido trigrama -> ids (array compacto; se aceptan entradas viejas)."""
+
+    def __init__(self):
+        self.postings: Dict[str, array] = {}
+
+    def agregar(self, ident: int, texto: str) -> None:
+        for t in trigramas(texto):
+            lista = self.postings.get(t)
+            if lista is None:
+                lista = self.postings[t] = array("l")
+            lista.append(ident)
+
+    def candidatos(self, texto: str, cantidad: int) -> List[Tuple[int, int]]:
+        """[(id, trigramas en común)] de los `cantidad` ids con más coincidencias."""
+        listas = sorted(
+            (self.postings[t] for t in trigramas(texto) if t in self.postings), key=len
+        )
+        usadas = [l for l in listas if len(l) <= MAX_POSTINGS]
+        if len(usadas) < MIN_TRIGRAMAS:
+            usadas = listas[:MIN_TRIGRAMAS]
+        conteo: Counter = Counter()
+        for lista in usadas:
+            conteo.update(lista)
+        return heapq.nlargest(cantidad, conteo.items(), key=lambda par: par[1])
+
+class IndiceDifuso:
+    """Índice en memoria de códigos y palabras de nombres de productos."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._codigos: Dict[int, str] = {}          # id -> código original
+        self._normalizados: Dict[int, str] = {}     # id -> código normalizado
+        self._firmas: Dict[int, int] = {}           # id -> hash de (código, nombre) ya indexado
+        self._trigramas_codigo = _Trigramas()
+        self._vocabulario: Counter = Counter()      # palabra -> productos que la usan
+        self._trigramas_palabra = _Trigramas()
+        self._palabras: List[str] = []              # id de palabra -> palabra
+        self._obsoletas = 0                         # entradas viejas en los postings de códigos
+        self._marca: Optional[str] = None           # updated_at hasta el que ya se leyó todo
+        self._ultimo_refresco = 0.0
+
+    @property
+    def listo(self) -> bool:
+        """True si ya se hizo la construcción completa."""
+        return self._marca is not None
+
+    # ------------------ Mantenimiento ------------------
+    def refrescar(self, conn: sqlite3.Connection, forzar: bool = False) -> None:
+        """Lee los cambios de la base (todo la primera vez; luego solo lo reciente)."""
+        with self._lock:
+            if not forzar and self._marca is not None and \
+                    time.monotonic() - self._ultimo_refresco < INTERVALO_REFRESCO:
+                return
+            if self._marca is None or self._obsoletas > len(self._codigos) // 5:
+                self._reconstruir(conn)
+            else:
+                self._aplicar_cambios(conn)
+            self._ultimo_refresco = time.monotonic()
+
+    def _corte(self, conn: sqlite3.Connection) -> str:
+        """
+        updated_at hasta el que se considera todo confirmado (ahora - MARGEN_REFRESCO).
+        Lo posterior se vuelve a leer en el próximo refresco, por si una transacción
+        con esa hora todavía no había confirmado.
+        """
+        return conn.execute("SELECT datetime('now', ?)", (f"-{MARGEN_REFRESCO} seconds",)).fetchone()[0]
+
+    def _reconstruir(self, conn: sqlite3.Connection) -> None:
+        self._codigos.clear()
+        self._normalizados.clear()
+        self._firmas.clear()
+        self._trigramas_codigo = _Trigramas()
+        self._vocabulario = Counter()
+        self._trigramas_palabra = _Trigramas()
+        self._palabras = []
+        self._obsoletas = 0
+        corte = self._corte(conn)
+        for ident, codigo, nombre in conn.execute("SELECT id, codigo, nombre FROM productos"):
+            self._indexar(ident, codigo, nombre, contar=True)
+        self._marca = corte
+
+    def _aplicar_cambios(self, conn: sqlite3.Connection) -> None:
+        corte = self._corte(conn)
+        filas = conn.execute(SQL_CAMBIOS, (self._marca,)).fetchall()
+        for ident, codigo, nombre in filas:
+            self._indexar(ident, codigo, nombre, contar=False)
+        self._marca = max(self._marca, corte)
+        # Bajas: updated_at no las muestra; el conteo sí
+        total = conn.execute("SELECT COUNT(*) FROM productos").fetchone()[0]
+        if total != len(self._codigos):
+            vigentes = {r[0] for r in conn.execute("SELECT id FROM productos")}
+            for ident in [i for i in self._codigos if i not in vigentes]:
+                del self._codigos[ident]
+                del self._normalizados[ident]
+                del self._firmas[ident]
+                self._obsoletas += 1
+
+    def _indexar(self, ident: int, codigo: str, nombre: str, contar: bool) -> None:
+        firma = hash((codigo, nombre))
+        if self._firmas.get(ident) == firma:
+            return   # Cambió otra cosa (stock, precio): nada que reindexar
+        self._firmas[ident] = firma
+        normalizado = normalizar(codigo)
+        if self._normalizados.get(ident) != normalizado:
+            if ident in self._normalizados:
+                self._obsoletas += 1   # Los postings del código anterior quedan; se filtran al buscar
+            self._trigramas_codigo.agregar(ident, normalizado)
+            self._normalizados[ident] = normalizado
+        self._codigos[ident] = codigo
+        # El vocabulario solo crece (una palabra que ya nadie usa no da resultados en FTS).
+        # Los conteos (desempate entre correcciones) se calculan en la construcción completa.
+        for palabra in _palabras_vocabulario(nombre or ""):
+            if palabra not in self._vocabulario:
+                self._trigramas_palabra.agregar(len(self._palabras), palabra)
+                self._palabras.append(palabra)
+                self._vocabulario[palabra] = 0
+            if contar:
+                self._vocabulario[palabra] += 1
+
+    # ------------------ Consultas ------------------
+    def sugerir_codigos(self, texto: str, limite: int = 5) -> List[Tuple[int, str, int]]:
+        """[(id, código, distancia)] de los códigos más parecidos, dentro de la distancia tolerada."""
+        buscado = normalizar(texto)
+        if len(buscado) < 2:
+            return []
+        tope = distancia_maxima(len(buscado))
+        distancia = comparador(buscado)
+        with self._lock:
+            resultado = []
+            for ident, comunes in self._trigramas_codigo.candidatos(buscado, MAX_CANDIDATOS):
+                normalizado = self._normalizados.get(ident)
+                if normalizado is None:
+                    continue   # Producto borrado
+                if abs(len(normalizado) - len(buscado)) > tope:
+                    continue
+                d = distancia(normalizado)
+                if d <= tope:
+                    resultado.append((d, -comunes, abs(len(normalizado) - len(buscado)), self._codigos[ident], ident))
+        resultado.sort()
+        return [(ident, codigo, d) for d, _, _, codigo, ident in resultado[:limite]]
+
+    def corregir_palabras(self, texto: str) -> Optional[str]:
+        """
+        Reemplaza cada palabra que no está en el vocabulario por la más parecida.
+        Retorna None si no hubo nada que corregir (o nada parecido).
+        """
+        corregidas, cambios = [], 0
+        with self._lock:
+            for palabra in palabras(texto):
+                if len(palabra) < MIN_LARGO_PALABRA or palabra.isdigit() or palabra in self._vocabulario:
+                    corregidas.append(palabra)
+                    continue
+                tope = distancia_maxima(len(palabra))
+                distancia = comparador(palabra)
+                mejores = []
+                for ident, comunes in self._trigramas_palabra.candidatos(palabra, MAX_CANDIDATOS):
+                    candidata = self._palabras[ident]
+                    if abs(len(candidata) - len(palabra)) > tope:
+                        continue
+                    d = distancia(candidata)
+                    if d <= tope:
+                        mejores.append((d, -self._vocabulario[candidata], candidata))
+                if mejores:
+                    corregidas.append(min(mejores)[2])
+                    cambios += 1
+                else:
+                    corregidas.append(palabra)
+        return " ".join(corregidas) if cambios else None
+
+_indice: Optional[IndiceDifuso] = None
+_indice_lock = threading.Lock()
+
+def get_indice(db_path: str) -> IndiceDifuso:
+    """Índice del proceso para esta base (se descarta si el pool apunta a otra)."""
+    global _indice
+    with _indice_lock:
+        if _indice is None or _indice.db_path != db_path:
+            _indice = IndiceDifuso(db_path)
+        return _indice
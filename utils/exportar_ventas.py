@@ -0,0 +1,113 @@
+# utils/exportar_ventas.py
+"""
+Exportación de ventas a CSV o JSON Lines para contabilidad.
+
+- Las filas salen de ReporteVentasController.iterar_ventas (fetchmany) y se
+  escriben una por una: la memoria no depende del tamaño del rango.
+- Se escribe a un archivo temporal que se renombra al final: si falla o se
+  cancela no queda un archivo a medias con el nombre final.
+
+Uso:
+    python -m utils.exportar_ventas 2024-01-01 2024-12-31 ventas_2024.csv [--formato csv|jsonl] [--db ruta]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Any, Callable, Dict, Optional
+
+from controllers.reporte_controller import ReporteVentasController, COLUMNAS_EXPORTACION
+from database.db import log_db
+
+FORMATOS = ("csv", "jsonl")
+AVISO_CADA = 1000   # Filas entre avisos de progreso
+
+def formato_por_extension(ruta: str) -> str:
+    return "jsonl" if os.path.splitext(ruta)[1].lower() in (".jsonl", ".json", ".ndjson") else "csv"
+
+def exportar_ventas(
+    fecha_inicio: str,
+    fecha_fin: str,
+    ruta: str,
+    formato: Optional[str] = None,
+    progreso: Optional[Callable[[int, int], None]] = None,
+    cancelado: Optional[Callable[[], bool]] = None
+) -> Dict[str, Any]:
+    """
+    Escribe las ventas del rango inclusivo [fecha_inicio, fecha_fin] en `ruta`.
+
+    :param formato: "csv" o "jsonl" (por defecto según la extensión de `ruta`).
+    :param progreso: callable(filas_escritas, total_estimado) cada AVISO_CADA filas.
+    :param cancelado: callable() -> bool; si devuelve True se aborta sin dejar archivo.
+    """
+    formato = (formato or formato_por_extension(ruta)).lower()
+    if formato not in FORMATOS:
+        return {"status": False, "message": f"Formato no soportado: {formato}", "filas": 0}
+
+    total = ReporteVentasController.contar_ventas(fecha_inicio, fecha_fin)
+    temporal = f"{ruta}.tmp"
+    filas = 0
+    cortado = False
+    try:
+        # utf-8-sig: Excel abre el CSV con acentos correctos
+        codificacion = "utf-8-sig" if formato == "csv" else "utf-8"
+        with open(temporal, "w", encoding=codificacion, newline="") as f:
+            if formato == "csv":
+                escritor = csv.DictWriter(f, fieldnames=COLUMNAS_EXPORTACION, extrasaction="ignore")
+                escritor.writeheader()
+                escribir = escritor.writerow
+            else:
+                escribir = lambda fila: f.write(json.dumps(fila, ensure_ascii=False) + "\n")
+
+            ventas = ReporteVentasController.iterar_ventas(fecha_inicio, fecha_fin)
+            try:
+                for fila in ventas:
+                    escribir(fila)
+                    filas += 1
+                    if filas % AVISO_CADA == 0:
+                        if cancelado and cancelado():
+                            cortado = True
+                            break
+                        if progreso:
+                            progreso(filas, max(total, filas))
+            finally:
+                ventas.close()   # Devuelve la conexión al pool también si se corta antes
+
+        if cortado:
+            os.remove(temporal)
+            return {"status": False, "message": "Exportación cancelada.", "filas": filas}
+        os.replace(temporal, ruta)
+    except Exception as e:
+        log_db(f"Error exportando ventas a '{ruta}': {e}")
+        if os.path.exists(temporal):
+            try:
+                os.remove(temporal)
+            except OSError:
+                pass
+        return {"status": False, "message": f"No se pudo exportar: {e}", "filas": filas}
+
+    if progreso:
+        progreso(filas, filas)
+    log_db(f"Exportadas {filas} ventas ({fecha_inicio} a {fecha_fin}) a {formato.upper()}: {ruta}")
+    return {"status": True, "message": f"{filas} ventas exportadas.", "filas": filas, "ruta": ruta}
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta ventas de un rango de fechas a CSV o JSON Lines.")
+    parser.add_argument("desde", help="Fecha inicial YYYY-MM-DD (inclusive)")
+    parser.add_argument("hasta", help="Fecha final YYYY-MM-DD (inclusive)")
+    parser.add_argument("archivo", help="Archivo de salida (.csv o .jsonl)")
+    parser.add_argument("--formato", choices=FORMATOS, help="Por defecto según la extensión")
+    parser.add_argument("--db", help="Ruta de la base de datos (por defecto data/inventario.db)")
+    args = parser.parse_args()
+
+    if args.db:
+        from database.db import configure_pool
+        configure_pool(db_path=args.db)
+
+    resultado = exportar_ventas(args.desde, args.hasta, args.archivo, args.formato)
+    print(("[OK] " if resultado["status"] else "[ERROR] ") + resultado["message"])
+    sys.exit(0 if resultado["status"] else 1)
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,216 @@
 # utils/file_manager.py
-import os, shutil
+"""
+Almacén de imágenes de productos por contenido.
+
+- Cada imagen se guarda una sola vez como <hash><ext> en assets/imagenes_productos:
+  la misma foto usada por 40 variantes ocupa un solo archivo, y guardar una
+  imagen nueva nunca pisa un archivo del que dependa otro producto.
+- productos.imagen sigue guardando solo el nombre del archivo; la tabla
+  `imagenes` (migración 5) cuenta cuántos productos usan cada archivo.
+- recolectar_imagenes() borra los archivos que ya nadie usa (y sus miniaturas);
+  recorre todo el almacén, por eso se corre desde la línea de comandos.
+- asignar_imagen_async() copia en segundo plano: el formulario no espera la copia,
+  y al reemplazar una imagen borra solo la anterior si quedó sin referencias.
+
+Uso (recolección manual de huérfanas):
+    python -m utils.file_manager --recolectar [--simular] [--db ruta]
+"""
+import argparse
+import glob
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from utils.miniaturas import MINIATURAS_DIR, generar_miniaturas, hash_archivo
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 IMG_DIR = os.path.join(BASE_DIR, "assets", "imagenes_productos")
 
-def guardar_imagen_producto(ruta_origen, codigo_producto):
+# Archivos administrados por el almacén: 32 hex + extensión
+PATRON_ALMACEN = re.compile(r"^[0-9a-f]{32}\.[a-z0-9]+$")
+# Un archivo recién copiado aún puede no estar referenciado (el producto se guarda después)
+GRACIA_SEGUNDOS = 3600
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="imagenes")
+    return _executor
+
+def guardar_imagen_producto(ruta_origen, codigo_producto=None):
     """
-    Copia la imagen seleccionada a /assets/imagenes_productos/
-    Renombra con el código del producto.
-    Retorna la ruta relativa.
+    Guarda la imagen en /assets/imagenes_productos/ con nombre = hash del contenido.
+    Si ya existe (misma foto), no se copia de nuevo.
+    Retorna el nombre del archivo, que es lo que se guarda en productos.imagen.
+    (`codigo_producto` ya no determina el nombre; se conserva por compatibilidad.)
     """
-    if not os.path.exists(IMG_DIR):
-        os.makedirs(IMG_DIR)
+    os.makedirs(IMG_DIR, exist_ok=True)
 
-    ext = os.path.splitext(ruta_origen)[1].lower()
-    nombre_destino = f"{codigo_producto}{ext}"
+    ext = os.path.splitext(ruta_origen)[1].lower() or ".img"
+    nombre_destino = f"{hash_archivo(ruta_origen)}{ext}"
     ruta_destino = os.path.join(IMG_DIR, nombre_destino)
-    shutil.copy(ruta_origen, ruta_destino)
 
-    # Guardamos ruta relativa para la BD
-    ruta_relativa = os.path.relpath(ruta_destino, BASE_DIR)
-    return ruta_relativa
+    if os.path.exists(ruta_destino):
+        # Ya almacenada: renovar la fecha para que la recolección no la borre
+        # justo antes de que el producto la referencie
+        os.utime(ruta_destino)
+    else:
+        temporal = f"{ruta_destino}.tmp"
+        shutil.copyfile(ruta_origen, temporal)
+        os.replace(temporal, ruta_destino)
+
+    # Miniaturas listas antes de la primera vez que se abra la ficha
+    try:
+        generar_miniaturas(ruta_destino)
+    except Exception:
+        pass
+
+    return nombre_destino
+
+def asignar_imagen_async(
+    codigo_producto: str,
+    ruta_origen: str,
+    al_terminar: Optional[Callable[[Optional[str]], None]] = None
+) -> Future:
+    """
+    Guarda la imagen en segundo plano y luego la asigna al producto (productos.imagen).
+    El Future devuelve el nombre del archivo (None si falló; el error queda en el log).
+    `al_terminar` se llama desde el hilo de trabajo: en la interfaz, re-emitir con una señal.
+    """
+    def tarea():
+        from controllers.producto_controller import ProductoController
+        from database.db import log_db
+        try:
+            nombre = guardar_imagen_producto(ruta_origen)
+            producto = ProductoController.obtener_por_codigo(codigo_producto)
+            anterior = producto.get("imagen") if producto else None
+            ProductoController.actualizar(codigo_producto, imagen=nombre)
+        except Exception as e:
+            log_db(f"Error guardando imagen de '{codigo_producto}' ({ruta_origen}): {e}")
+            nombre = None
+        else:
+            # Solo la imagen que se reemplazó pudo quedar sin referencias
+            if anterior and anterior != nombre:
+                descartar_si_huerfana(anterior)
+        if al_terminar:
+            al_terminar(nombre)
+        return nombre
+
+    return _get_executor().submit(tarea)
+
+def _borrar_archivo(nombre: str) -> None:
+    """Borra la imagen del almacén y sus miniaturas (OSError si no se pudo borrar la imagen)."""
+    ruta = os.path.join(IMG_DIR, os.path.basename(nombre))
+    digest = hash_archivo(ruta)
+    os.remove(ruta)
+    for miniatura in glob.glob(os.path.join(MINIATURAS_DIR, digest[:2], f"{digest}_*")):
+        try:
+            os.remove(miniatura)
+        except OSError:
+            pass
+
+def descartar_si_huerfana(nombre: str, gracia_segundos: int = GRACIA_SEGUNDOS) -> bool:
+    """
+    Borra una sola imagen si ningún producto la usa (referencias <= 0) y no se
+    modificó hace menos de `gracia_segundos`. Retorna True si la borró.
+    """
+    from database.db import pooled_connection, log_db
+
+    ruta = os.path.join(IMG_DIR, os.path.basename(nombre))
+    with pooled_connection() as conn:
+        fila = conn.execute("SELECT referencias FROM imagenes WHERE archivo = ?", (nombre,)).fetchone()
+        if fila is None or fila[0] > 0:
+            return False
+        if not os.path.exists(ruta) or os.path.getmtime(ruta) > time.time() - gracia_segundos:
+            return False
+        try:
+            _borrar_archivo(nombre)
+        except OSError as e:
+            log_db(f"No se pudo borrar la imagen huérfana '{nombre}': {e}")
+            return False
+        # Condición repetida: un producto pudo volver a usarla mientras se borraba
+        conn.execute("DELETE FROM imagenes WHERE archivo = ? AND referencias <= 0", (nombre,))
+        conn.commit()
+    return True
+
+def recolectar_imagenes(gracia_segundos: int = GRACIA_SEGUNDOS, simular: bool = False) -> Dict[str, Any]:
+    """
+    Borra del disco las imágenes que ningún producto usa:
+    - archivos con referencias = 0 en la tabla imagenes;
+    - archivos del almacén (<hash><ext>) que no figuran en la tabla
+      (copias de un guardado que no llegó a completarse).
+    Solo toca archivos sin modificar hace más de `gracia_segundos`.
+    """
+    from database.db import pooled_connection, log_db
+
+    limite = time.time() - gracia_segundos
+    borrados, liberados = [], 0
+
+    with pooled_connection() as conn:
+        huerfanas = {r[0] for r in conn.execute("SELECT archivo FROM imagenes WHERE referencias <= 0")}
+        conocidas = {r[0] for r in conn.execute("SELECT archivo FROM imagenes")}
+
+    candidatas = set(huerfanas)
+    if os.path.isdir(IMG_DIR):
+        candidatas.update(
+            n for n in os.listdir(IMG_DIR) if PATRON_ALMACEN.match(n) and n not in conocidas
+        )
+
+    for nombre in sorted(candidatas):
+        ruta = os.path.join(IMG_DIR, os.path.basename(nombre))
+        if not os.path.exists(ruta):
+            continue
+        if os.path.getmtime(ruta) > limite:
+            continue
+        tamano = os.path.getsize(ruta)
+        if not simular:
+            try:
+                _borrar_archivo(nombre)
+            except OSError as e:
+                log_db(f"No se pudo borrar la imagen huérfana '{nombre}': {e}")
+                continue
+        borrados.append(nombre)
+        liberados += tamano
+
+    if not simular and huerfanas:
+        with pooled_connection() as conn:
+            # Condición repetida: un producto pudo volver a usarla mientras se borraba
+            conn.executemany(
+                "DELETE FROM imagenes WHERE archivo = ? AND referencias <= 0",
+                [(n,) for n in borrados if n in huerfanas]
+            )
+            conn.commit()
+
+    if borrados and not simular:
+        log_db(f"Imágenes huérfanas borradas: {len(borrados)} ({liberados // 1024} KB)")
+    return {"borrados": borrados, "bytes": liberados}
+
+def main():
+    parser = argparse.ArgumentParser(description="Mantenimiento del almacén de imágenes de productos.")
+    parser.add_argument("--recolectar", action="store_true", help="Borra las imágenes que ningún producto usa")
+    parser.add_argument("--simular", action="store_true", help="Solo listar lo que se borraría")
+    parser.add_argument("--gracia", type=int, default=GRACIA_SEGUNDOS,
+                        help="No tocar archivos modificados hace menos de N segundos")
+    parser.add_argument("--db", help="Ruta de la base de datos (por defecto data/inventario.db)")
+    args = parser.parse_args()
+
+    if not args.recolectar:
+        parser.print_help()
+        sys.exit(0)
+    if args.db:
+        from database.db import configure_pool
+        configure_pool(db_path=args.db)
+
+    resultado = recolectar_imagenes(args.gracia, args.simular)
+    for nombre in resultado["borrados"]:
+        print(("  (simulado) " if args.simular else "  borrada: ") + nombre)
+    print(f"[OK] {len(resultado['borrados'])} imágenes, {resultado['bytes'] // 1024} KB.")
+
+if __name__ == "__main__":
+    main()
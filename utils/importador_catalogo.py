@@ -0,0 +1,335 @@
+# utils/importador_catalogo.py
+"""
+Importación masiva del catálogo de productos desde CSV o XLSX (listas de proveedores).
+
+- El archivo se lee fila por fila (csv / openpyxl en modo read_only): nunca se
+  carga completo en memoria.
+- Las filas válidas se insertan por lotes con executemany en una transacción
+  por lote: INSERT ... ON CONFLICT(codigo) DO UPDATE (upsert por código).
+- Solo se actualizan las columnas presentes en el archivo, y las filas idénticas
+  a lo que ya está en la base no se reescriben.
+- Las filas rechazadas se escriben (también en streaming) a un CSV con el motivo.
+
+Uso:
+    python -m utils.importador_catalogo lista.csv [--db ruta] [--lote 1000] [--rechazos rechazos.csv]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import unicodedata
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from database.db import pooled_connection, log_db
+from database.schema_cache import columnas_productos
+from database.migraciones import actualizar_referencias
+
+try:
+    import openpyxl
+except ImportError:  # Solo hace falta para .xlsx
+    openpyxl = None
+
+TAMANO_LOTE = 1000
+
+# Columnas de productos que se pueden importar (codigo es la clave del upsert)
+COLUMNAS_IMPORTABLES = (
+    "codigo", "nombre", "descripcion", "cod_original", "tipo_repuesto",
+    "categoria", "aplicacion", "medidas", "stock", "precio", "imagen",
+)
+
+# Encabezados habituales en listas de proveedores -> columna de productos
+ALIAS_ENCABEZADOS = {
+    "sku": "codigo",
+    "cod": "codigo",
+    "producto": "nombre",
+    "descripcion_corta": "nombre",
+    "detalle": "descripcion",
+    "codigo_original": "cod_original",
+    "oem": "cod_original",
+    "tipo": "tipo_repuesto",
+    "cantidad": "stock",
+    "existencia": "stock",
+    "precio_venta": "precio",
+    "pvp": "precio",
+}
+
+def _normalizar_encabezado(texto: Any) -> str:
+    """'Código Original ' -> 'codigo_original'"""
+    texto = unicodedata.normalize("NFKD", str(texto or "")).encode("ascii", "ignore").decode()
+    clave = "_".join(texto.strip().lower().replace("-", " ").split())
+    return ALIAS_ENCABEZADOS.get(clave, clave)
+
+def _a_numero(valor: Any) -> float:
+    """Acepta 1234.5, '1234,5', '1.234,50' y '1,234.50'."""
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    texto = str(valor).strip().replace(" ", "")
+    if "," in texto and "." in texto:
+        # El último separador es el decimal
+        if texto.rfind(",") > texto.rfind("."):
+            texto = texto.replace(".", "").replace(",", ".")
+        else:
+            texto = texto.replace(",", "")
+    else:
+        texto = texto.replace(",", ".")
+    return float(texto)
+
+# ------------------ Lectura en streaming ------------------
+def _leer_csv(ruta: str) -> Iterator[Tuple[List[Any], int, int]]:
+    """Genera (valores, bytes leídos, bytes totales)."""
+    total = os.path.getsize(ruta)
+    crudo = open(ruta, "rb")
+    texto = io.TextIOWrapper(crudo, encoding="utf-8-sig", newline="")
+    try:
+        muestra = texto.read(4096)
+        texto.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t|")
+        except csv.Error:
+            dialecto = csv.excel
+        for fila in csv.reader(texto, dialecto):
+            # La posición del buffer binario alcanza para informar el avance
+            yield fila, crudo.tell(), total
+    finally:
+        texto.close()
+
+def _leer_xlsx(ruta: str) -> Iterator[Tuple[List[Any], int, int]]:
+    """Genera (valores, filas leídas, filas totales)."""
+    if openpyxl is None:
+        raise ValueError("Para importar archivos .xlsx instale openpyxl (pip install openpyxl).")
+    libro = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        hoja = libro.active
+        total = hoja.max_row or 0
+        for i, fila in enumerate(hoja.iter_rows(values_only=True), start=1):
+            yield list(fila), i, max(total, i)
+    finally:
+        libro.close()
+
+def leer_filas(ruta: str) -> Iterator[Tuple[int, Dict[str, Any], int, int]]:
+    """
+    Recorre el archivo y genera (número de fila, {columna: valor}, hecho, total).
+    La primera fila no vacía se toma como encabezado.
+    """
+    ext = os.path.splitext(ruta)[1].lower()
+    lector = _leer_xlsx(ruta) if ext in (".xlsx", ".xlsm") else _leer_csv(ruta)
+
+    encabezados: Optional[List[str]] = None
+    for num, (valores, hecho, total) in enumerate(lector, start=1):
+        if not any(v not in (None, "") for v in valores):
+            continue
+        if encabezados is None:
+            encabezados = [_normalizar_encabezado(v) for v in valores]
+            continue
+        yield num, dict(zip(encabezados, valores)), hecho, total
+
+# ------------------ Validación ------------------
+def _validar(fila: Dict[str, Any], columnas: List[str]) -> Tuple[Optional[Tuple], Optional[str]]:
+    """Retorna (valores en el orden de `columnas`, None) o (None, motivo del rechazo)."""
+    valores = []
+    for col in columnas:
+        v = fila.get(col)
+        if isinstance(v, str):
+            v = v.strip()
+        if col in ("codigo", "nombre"):
+            if v in (None, ""):
+                return None, f"Falta {col}."
+            v = str(v)
+        elif col == "stock":
+            try:
+                v = int(_a_numero(v)) if v not in (None, "") else 0
+            except ValueError:
+                return None, f"Stock inválido: {v!r}."
+            if v < 0:
+                return None, "Stock negativo."
+        elif col == "precio":
+            try:
+                v = round(_a_numero(v), 2) if v not in (None, "") else 0.0
+            except ValueError:
+                return None, f"Precio inválido: {v!r}."
+            if v < 0:
+                return None, "Precio negativo."
+        elif col == "medidas":
+            if v in (None, ""):
+                v = "{}"
+            else:
+                try:
+                    json.loads(v)
+                except (TypeError, ValueError):
+                    return None, "Medidas no es JSON válido."
+        else:
+            v = "" if v is None else str(v)
+        valores.append(v)
+    return tuple(valores), None
+
+def _sql_upsert(columnas: List[str]) -> str:
+    actualizables = [c for c in columnas if c != "codigo"]
+    sql = (
+        f"INSERT INTO productos ({', '.join(columnas)}) "
+        f"VALUES ({', '.join('?' for _ in columnas)}) "
+        "ON CONFLICT(codigo) DO "
+    )
+    if not actualizables:
+        return sql + "NOTHING"
+    # El WHERE evita reescribir (y disparar triggers) si la fila no cambió
+    return (
+        sql + "UPDATE SET "
+        + ", ".join(f"{c} = excluded.{c}" for c in actualizables)
+        + " WHERE " + " OR ".join(f"productos.{c} IS NOT excluded.{c}" for c in actualizables)
+    )
+
+# ------------------ Importación ------------------
+def importar_catalogo(
+    ruta: str,
+    tamano_lote: int = TAMANO_LOTE,
+    ruta_rechazos: Optional[str] = None,
+    progreso: Optional[Callable[[int, int], None]] = None,
+    cancelado: Optional[Callable[[], bool]] = None
+) -> Dict[str, Any]:
+    """
+    Importa (upsert por código) un CSV/XLSX de productos.
+
+    :param ruta_rechazos: CSV donde se guardan las filas rechazadas con su motivo
+                          (por defecto <archivo>.rechazos.csv, solo si hay rechazos).
+    :param progreso: callable(hecho, total) llamado tras cada lote (bytes o filas).
+    :param cancelado: callable() -> bool; se consulta entre lotes. Los lotes ya
+                      confirmados se conservan.
+    """
+    if not os.path.exists(ruta):
+        return {"status": False, "message": f"No existe el archivo: {ruta}"}
+
+    resumen = {
+        "status": True, "message": "", "leidas": 0, "insertados": 0, "actualizados": 0,
+        "sin_cambios": 0, "rechazados": 0, "ruta_rechazos": None, "cancelado": False,
+    }
+    ruta_rechazos = ruta_rechazos or f"{os.path.splitext(ruta)[0]}.rechazos.csv"
+    archivo_rechazos = None
+    escritor_rechazos = None
+
+    def rechazar(num: int, motivo: str, fila: Dict[str, Any]) -> None:
+        nonlocal archivo_rechazos, escritor_rechazos
+        resumen["rechazados"] += 1
+        if escritor_rechazos is None:
+            archivo_rechazos = open(ruta_rechazos, "w", encoding="utf-8", newline="")
+            escritor_rechazos = csv.writer(archivo_rechazos)
+            escritor_rechazos.writerow(["fila", "motivo", "datos"])
+        escritor_rechazos.writerow([num, motivo, json.dumps(fila, ensure_ascii=False, default=str)])
+
+    try:
+        with pooled_connection() as conn:
+            existentes = columnas_productos(conn)
+            columnas: Optional[List[str]] = None
+            sql = ""
+            lote: List[Tuple] = []
+            hecho = total = 0
+
+            def confirmar_lote() -> None:
+                if not lote:
+                    return
+                cur = conn.cursor()
+                # BEGIN IMMEDIATE: el conteo antes/después es exacto (nadie más escribe)
+                cur.execute("BEGIN IMMEDIATE")
+                try:
+                    antes = cur.execute("SELECT COUNT(*) FROM productos").fetchone()[0]
+                    cur.executemany(sql, lote)
+                    cambios = cur.rowcount
+                    despues = cur.execute("SELECT COUNT(*) FROM productos").fetchone()[0]
+                    if "cod_original" in columnas:
+                        # Referencias OEM del lote (el upsert no pasa por ProductoController)
+                        codigos = [fila[columnas.index("codigo")] for fila in lote]
+                        ids = []
+                        for i in range(0, len(codigos), 500):
+                            tanda = codigos[i:i + 500]
+                            ids += [r[0] for r in cur.execute(
+                                f"SELECT id FROM productos WHERE codigo IN ({','.join('?' * len(tanda))})", tanda
+                            )]
+                        actualizar_referencias(conn, ids)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                resumen["insertados"] += despues - antes
+                resumen["actualizados"] += cambios - (despues - antes)
+                resumen["sin_cambios"] += len(lote) - cambios
+                lote.clear()
+                if progreso:
+                    progreso(hecho, total)
+
+            aplicacion_en_descripcion = False
+            for num, fila, hecho, total in leer_filas(ruta):
+                if columnas is None:
+                    # Igual que el formulario: sin columna propia, la aplicación va en descripcion
+                    aplicacion_en_descripcion = (
+                        "aplicacion" in fila and "aplicacion" not in existentes and "descripcion" not in fila
+                    )
+                if aplicacion_en_descripcion:
+                    fila["descripcion"] = fila.pop("aplicacion")
+                if columnas is None:
+                    columnas = [c for c in COLUMNAS_IMPORTABLES if c in fila and c in existentes]
+                    if "codigo" not in columnas or "nombre" not in columnas:
+                        return {"status": False, "message": "El archivo debe tener columnas 'codigo' y 'nombre'."}
+                    ignoradas = sorted(set(fila) - set(columnas))
+                    if ignoradas:
+                        resumen["message"] = f"Columnas ignoradas: {', '.join(ignoradas)}. "
+                    sql = _sql_upsert(columnas)
+
+                resumen["leidas"] += 1
+                valores, motivo = _validar(fila, columnas)
+                if motivo:
+                    rechazar(num, motivo, fila)
+                    continue
+                lote.append(valores)
+
+                if len(lote) >= tamano_lote:
+                    confirmar_lote()
+                    if cancelado and cancelado():
+                        resumen["cancelado"] = True
+                        break
+            else:
+                confirmar_lote()
+    except Exception as e:
+        log_db(f"Error importando catálogo '{ruta}': {e}")
+        resumen["status"] = False
+        resumen["message"] += f"Importación interrumpida: {e}"
+        return resumen
+    finally:
+        if archivo_rechazos is not None:
+            archivo_rechazos.close()
+            resumen["ruta_rechazos"] = ruta_rechazos
+
+    resumen["message"] += (
+        f"{resumen['leidas']} filas leídas: {resumen['insertados']} nuevas, "
+        f"{resumen['actualizados']} actualizadas, {resumen['sin_cambios']} sin cambios, "
+        f"{resumen['rechazados']} rechazadas."
+        + (" Importación cancelada (los lotes anteriores quedaron guardados)." if resumen["cancelado"] else "")
+    )
+    log_db(f"Importación de catálogo '{os.path.basename(ruta)}': {resumen['message']}")
+    return resumen
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa productos desde CSV/XLSX (upsert por código).")
+    parser.add_argument("archivo", help="Ruta del .csv o .xlsx")
+    parser.add_argument("--db", help="Ruta de la base de datos (por defecto data/inventario.db)")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Filas por transacción")
+    parser.add_argument("--rechazos", help="CSV de filas rechazadas (por defecto <archivo>.rechazos.csv)")
+    args = parser.parse_args()
+
+    if args.db:
+        from database.db import configure_pool
+        configure_pool(db_path=args.db)
+
+    def mostrar(hecho: int, total: int) -> None:
+        porcentaje = 100 * hecho / total if total else 0
+        print(f"\r  {porcentaje:5.1f}%", end="", flush=True)
+
+    resumen = importar_catalogo(args.archivo, args.lote, args.rechazos, progreso=mostrar)
+    print()
+    print(("[OK] " if resumen["status"] else "[ERROR] ") + resumen["message"])
+    if resumen.get("ruta_rechazos"):
+        print(f"[INFO] Rechazos en: {resumen['ruta_rechazos']}")
+    sys.exit(0 if resumen["status"] else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# utils/miniaturas.py
+"""
+Caché en disco de miniaturas de imágenes (productos y logo).
+
+- Clave: hash del contenido del archivo + lado máximo de la miniatura, así un
+  archivo reemplazado con el mismo nombre no muestra la miniatura vieja.
+- Tamaños estándar (TAMANOS): cada pedido usa el menor tamaño que alcance, de
+  modo que pocas miniaturas cubren todas las ventanas.
+- Las miniaturas se generan con Pillow (ver requirements.txt). Sin Pillow, o si
+  la imagen no se puede leer, se devuelve la ruta original.
+
+Uso (pre-generar las miniaturas de todas las imágenes de productos):
+    python -m utils.miniaturas [carpeta]
+"""
+import hashlib
+import os
+import sys
+import threading
+from typing import Dict, Optional, Tuple
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMG_DIR = os.path.join(BASE_DIR, "assets", "imagenes_productos")
+MINIATURAS_DIR = os.path.join(BASE_DIR, "assets", "miniaturas")
+
+# Lado máximo (px) de las miniaturas que se guardan
+TAMANOS = (32, 128, 512, 1024)
+EXTENSIONES = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif", ".ico")
+CALIDAD_JPEG = 85
+
+# (ruta, tamaño, mtime) -> hash: evita releer el archivo entero en cada apertura
+_hashes: Dict[Tuple[str, int, int], str] = {}
+_lock = threading.Lock()
+
+def hash_archivo(ruta: str) -> str:
+    """Hash (blake2b, 16 bytes) del contenido; memorizado mientras el archivo no cambie."""
+    info = os.stat(ruta)
+    clave = (os.path.abspath(ruta), info.st_size, info.st_mtime_ns)
+    with _lock:
+        if clave in _hashes:
+            return _hashes[clave]
+    h = hashlib.blake2b(digest_size=16)
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloque)
+    digest = h.hexdigest()
+    with _lock:
+        _hashes[clave] = digest
+    return digest
+
+def tamano_estandar(ancho: int, alto: int) -> int:
+    """Menor tamaño estándar que cubre el recuadro pedido (o el mayor disponible)."""
+    lado = max(int(ancho), int(alto))
+    for tamano in TAMANOS:
+        if tamano >= lado:
+            return tamano
+    return TAMANOS[-1]
+
+def _rutas_cache(digest: str, tamano: int) -> Tuple[str, str]:
+    # Subcarpeta por los 2 primeros caracteres: carpetas chicas aunque haya miles de imágenes
+    base = os.path.join(MINIATURAS_DIR, digest[:2], f"{digest}_{tamano}")
+    return f"{base}.jpg", f"{base}.png"
+
+def _guardar(imagen, destino: str) -> None:
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporal = f"{destino}.tmp"
+    if destino.endswith(".png"):
+        imagen.save(temporal, "PNG", optimize=True)
+    else:
+        imagen.convert("RGB").save(temporal, "JPEG", quality=CALIDAD_JPEG, optimize=True)
+    os.replace(temporal, destino)   # Otro hilo nunca ve un archivo a medio escribir
+
+def generar_miniaturas(ruta: str, tamanos=TAMANOS) -> Dict[int, str]:
+    """
+    Genera (si faltan) las miniaturas de `ruta` en los tamaños pedidos,
+    decodificando el original una sola vez. Retorna {tamaño: ruta_miniatura}.
+    """
+    digest = hash_archivo(ruta)
+    rutas: Dict[int, str] = {}
+    faltan = []
+    for tamano in sorted(tamanos, reverse=True):
+        jpg, png = _rutas_cache(digest, tamano)
+        existente = jpg if os.path.exists(jpg) else png if os.path.exists(png) else None
+        if existente:
+            rutas[tamano] = existente
+        else:
+            faltan.append(tamano)
+    if not faltan:
+        return rutas
+
+    from PIL import Image
+
+    with Image.open(ruta) as original:
+        # En JPEG, draft() decodifica directamente a 1/2, 1/4 u 1/8 de resolución
+        original.draft("RGB", (faltan[0], faltan[0]))
+        imagen = original.convert("RGBA") if _tiene_transparencia(original) else original.convert("RGB")
+
+    # De mayor a menor: cada miniatura sale de la anterior, no del original
+    for tamano in faltan:
+        imagen.thumbnail((tamano, tamano), Image.LANCZOS)
+        jpg, png = _rutas_cache(digest, tamano)
+        destino = png if imagen.mode == "RGBA" else jpg
+        _guardar(imagen, destino)
+        rutas[tamano] = destino
+    return rutas
+
+def _tiene_transparencia(imagen) -> bool:
+    return imagen.mode in ("RGBA", "LA", "PA") or (imagen.mode == "P" and "transparency" in imagen.info)
+
+def ruta_miniatura(ruta: str, ancho: int, alto: int) -> Optional[str]:
+    """
+    Ruta de una miniatura que cubre ancho x alto (generándola si hace falta).
+    Retorna la ruta original si no se pudo generar y None si el archivo no existe.
+    """
+    if not ruta or not os.path.exists(ruta):
+        return None
+    try:
+        # Primera vez: se generan todos los tamaños con una sola decodificación
+        return generar_miniaturas(ruta)[tamano_estandar(ancho, alto)]
+    except Exception:
+        # Sin Pillow o formato no soportado: Qt decodifica el original
+        return ruta
+
+def main():
+    carpeta = sys.argv[1] if len(sys.argv) > 1 else IMG_DIR
+    hechas, fallidas = 0, 0
+    for nombre in sorted(os.listdir(carpeta)):
+        if not nombre.lower().endswith(EXTENSIONES):
+            continue
+        try:
+            generar_miniaturas(os.path.join(carpeta, nombre))
+            hechas += 1
+        except Exception as e:
+            fallidas += 1
+            print(f"[ERROR] {nombre}: {e}")
+    print(f"[OK] Miniaturas listas para {hechas} imágenes ({fallidas} con error) en {MINIATURAS_DIR}")
+    sys.exit(0 if not fallidas else 1)
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,96 @@
 # utils/pdf_generator.py
+"""
+Fichas técnicas en PDF.
+
+- generar_ficha_pdf: una ficha (la usa la ventana de Ficha Técnica).
+- generar_fichas_lote: fichas de una categoría o lista de códigos, repartidas
+  entre los núcleos con ProcessPoolExecutor. Omite las fichas al día y
+  opcionalmente las une en un catálogo.
+- "Al día" = la huella (hash de los campos que la ficha muestra) guardada junto
+  al PDF coincide con la del producto. No se usa productos.updated_at: cambia con
+  cada venta (stock), que la ficha no muestra.
+
+Uso:
+    python -m utils.pdf_generator --categoria Palier [--unir catalogo.pdf] [--forzar] [--procesos N] [--db ruta]
+    python -m utils.pdf_generator --codigos GSP-2183 GSP-2184
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
 import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageBreak
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 REPORTES_DIR = os.path.join(BASE_DIR, "reportes")
+IMG_DIR = os.path.join(BASE_DIR, "assets", "imagenes_productos")
 os.makedirs(REPORTES_DIR, exist_ok=True)
 
-def generar_ficha_pdf(producto: dict):
-    """
-    Genera un PDF con la ficha técnica del producto.
-    Retorna la ruta del archivo generado.
-    """
-    filename = f"ficha_{producto.get('codigo','SIN_CODIGO')}.pdf"
-    path = os.path.join(REPORTES_DIR, filename)
+# Con pocas fichas no conviene pagar el arranque de los procesos
+MIN_FICHAS_PARALELO = 8
 
-    doc = SimpleDocTemplate(path, pagesize=A4)
-    styles = getSampleStyleSheet()
+# Subir al cambiar el diseño de la ficha: invalida todas las huellas guardadas
+VERSION_FICHA = 1
+
+# Estilos creados una vez por proceso (y no en cada ficha)
+ESTILOS = getSampleStyleSheet()
+ESTILO_TABLA_MEDIDAS = TableStyle([
+    ("BACKGROUND", (0,0), (-1,0), colors.grey),
+    ("TEXTCOLOR",(0,0),(-1,0),colors.whitesmoke),
+    ("ALIGN",(0,0),(-1,-1),"CENTER"),
+    ("GRID",(0,0),(-1,-1),1,colors.black),
+])
+
+def ruta_ficha(codigo: str, carpeta: str = REPORTES_DIR) -> str:
+    """Ruta del PDF de un producto (el código se limpia para usarlo como nombre de archivo)."""
+    seguro = re.sub(r"[^\w.-]", "_", codigo or "SIN_CODIGO")
+    return os.path.join(carpeta, f"ficha_{seguro}.pdf")
+
+def ruta_huella(ruta_pdf: str) -> str:
+    return ruta_pdf + ".huella"
+
+def huella_ficha(producto: dict) -> str:
+    """Hash de lo que la ficha muestra (textos, medidas e imagen); no incluye stock ni precio."""
+    imagen = _ruta_imagen(producto)
+    datos = [
+        VERSION_FICHA,
+        *(str(producto.get(campo, "")) for campo in ("codigo", "nombre", "aplicacion", "cod_original")),
+        [[str(k), str(v)] for k, v in (producto.get("medidas") or {}).items()],
+        [imagen, os.path.getsize(imagen), os.path.getmtime(imagen)] if imagen else None,
+    ]
+    return hashlib.sha1(json.dumps(datos, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def _ruta_imagen(producto: dict) -> Optional[str]:
+    ruta = producto.get("imagen_path") or producto.get("imagen")
+    if not ruta:
+        return None
+    if os.path.exists(ruta):
+        return ruta
+    # En la base se guarda solo el nombre del archivo
+    candidata = os.path.join(IMG_DIR, os.path.basename(ruta))
+    return candidata if os.path.exists(candidata) else None
+
+def _contenido_ficha(producto: dict) -> list:
+    """Flowables de una ficha (se reusan para el PDF suelto y para el catálogo)."""
     story = []
 
     # Título
-    story.append(Paragraph(f"Ficha Técnica - {producto.get('codigo','')}", styles["Title"]))
+    story.append(Paragraph(f"Ficha Técnica - {escape(str(producto.get('codigo','')))}", ESTILOS["Title"]))
     story.append(Spacer(1, 12))
 
     # Datos básicos
-    story.append(Paragraph(f"<b>Nombre:</b> {producto.get('nombre','')}", styles["Normal"]))
-    story.append(Paragraph(f"<b>Aplicación:</b> {producto.get('aplicacion','')}", styles["Normal"]))
-    story.append(Paragraph(f"<b>Cód. Original:</b> {producto.get('cod_original','')}", styles["Normal"]))
+    story.append(Paragraph(f"<b>Nombre:</b> {escape(str(producto.get('nombre','')))}", ESTILOS["Normal"]))
+    story.append(Paragraph(f"<b>Aplicación:</b> {escape(str(producto.get('aplicacion','')))}", ESTILOS["Normal"]))
+    story.append(Paragraph(f"<b>Cód. Original:</b> {escape(str(producto.get('cod_original','')))}", ESTILOS["Normal"]))
     story.append(Spacer(1, 12))
 
     # Medidas
@@ -37,19 +99,196 @@ def generar_ficha_pdf(producto: dict):
         for k, v in producto["medidas"].items():
             data.append([k, str(v)])
         tabla = Table(data)
-        tabla.setStyle(TableStyle([
-            ("BACKGROUND", (0,0), (-1,0), colors.grey),
-            ("TEXTCOLOR",(0,0),(-1,0),colors.whitesmoke),
-            ("ALIGN",(0,0),(-1,-1),"CENTER"),
-            ("GRID",(0,0),(-1,-1),1,colors.black),
-        ]))
+        tabla.setStyle(ESTILO_TABLA_MEDIDAS)
         story.append(tabla)
         story.append(Spacer(1, 12))
 
     # Imagen
-    if producto.get("imagen_path") and os.path.exists(producto["imagen_path"]):
-        img = Image(producto["imagen_path"], width=200, height=200)
-        story.append(img)
+    imagen = _ruta_imagen(producto)
+    if imagen:
+        story.append(Image(imagen, width=200, height=200))
 
-    doc.build(story)
+    return story
+
+def generar_ficha_pdf(producto: dict, carpeta: str = REPORTES_DIR):
+    """
+    Genera un PDF con la ficha técnica del producto.
+    Retorna la ruta del archivo generado.
+    """
+    path = ruta_ficha(producto.get("codigo", "SIN_CODIGO"), carpeta)
+    huella = ruta_huella(path)
+    # Si la generación falla a mitad, sin huella el PDF no se toma como vigente
+    if os.path.exists(huella):
+        os.remove(huella)
+    doc = SimpleDocTemplate(path, pagesize=A4)
+    doc.build(_contenido_ficha(producto))
+    with open(huella, "w", encoding="utf-8") as f:
+        f.write(huella_ficha(producto))
     return path
+
+def ficha_vigente(producto: dict, carpeta: str = REPORTES_DIR) -> bool:
+    """True si el PDF existe y se generó con los mismos datos que el producto muestra hoy."""
+    path = ruta_ficha(producto.get("codigo", "SIN_CODIGO"), carpeta)
+    if not os.path.exists(path):
+        return False
+    try:
+        with open(ruta_huella(path), "r", encoding="utf-8") as f:
+            guardada = f.read().strip()
+    except OSError:
+        return False
+    return guardada == huella_ficha(producto)
+
+def _generar_en_proceso(producto: dict, carpeta: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """Trabajo de cada proceso: (codigo, ruta, error). Nunca lanza, para no cortar el lote."""
+    codigo = producto.get("codigo", "")
+    try:
+        return codigo, generar_ficha_pdf(producto, carpeta), None
+    except Exception as e:
+        return codigo, None, str(e)
+
+def _unir_fichas(rutas: List[str], productos: List[dict], destino: str) -> None:
+    """Catálogo único: une los PDFs con pypdf si está instalado; si no, lo compone con ReportLab."""
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        PdfWriter = None
+
+    if PdfWriter is not None:
+        escritor = PdfWriter()
+        for ruta in rutas:
+            escritor.append(ruta)
+        with open(destino, "wb") as f:
+            escritor.write(f)
+        return
+
+    story = []
+    for producto in productos:
+        if story:
+            story.append(PageBreak())
+        story.extend(_contenido_ficha(producto))
+    SimpleDocTemplate(destino, pagesize=A4).build(story)
+
+def generar_fichas_lote(
+    codigos: Optional[List[str]] = None,
+    categoria: Optional[str] = None,
+    carpeta: str = REPORTES_DIR,
+    procesos: Optional[int] = None,
+    forzar: bool = False,
+    unir_en: Optional[str] = None,
+    progreso: Optional[Callable[[int, int], None]] = None,
+    cancelado: Optional[Callable[[], bool]] = None
+) -> Dict[str, Any]:
+    """
+    Genera las fichas de una categoría y/o lista de códigos (sin filtros: todo el catálogo).
+
+    :param procesos: procesos de trabajo (por defecto, uno por núcleo).
+    :param forzar: regenerar aunque el PDF esté al día.
+    :param unir_en: ruta del catálogo PDF con todas las fichas, en orden de nombre.
+    :param progreso: callable(fichas_listas, total).
+    :param cancelado: callable() -> bool; detiene el lote (las fichas ya hechas se conservan).
+    """
+    # Import diferido: los procesos hijos solo necesitan ReportLab, no la base
+    from controllers.producto_controller import ProductoController
+    from database.db import log_db
+
+    productos = ProductoController.obtener_varios(codigos=codigos, categoria=categoria)
+    if not productos:
+        return {"status": False, "message": "No hay productos para generar fichas.",
+                "generadas": 0, "omitidas": 0, "errores": []}
+
+    os.makedirs(carpeta, exist_ok=True)
+    pendientes = productos if forzar else [p for p in productos if not ficha_vigente(p, carpeta)]
+    omitidas = len(productos) - len(pendientes)
+    total = len(pendientes)
+    generadas = 0
+    errores: List[Tuple[str, str]] = []
+    cortado = False
+
+    def registrar(resultado):
+        nonlocal generadas
+        codigo, _ruta, error = resultado
+        if error:
+            errores.append((codigo, error))
+        else:
+            generadas += 1
+        if progreso:
+            progreso(generadas + len(errores), total)
+
+    procesos = max(1, procesos or os.cpu_count() or 1)
+    if procesos == 1 or total < MIN_FICHAS_PARALELO:
+        for producto in pendientes:
+            if cancelado and cancelado():
+                cortado = True
+                break
+            registrar(_generar_en_proceso(producto, carpeta))
+    else:
+        # spawn, no fork: se llama desde hilos de la GUI con conexiones SQLite abiertas en el pool
+        pool = ProcessPoolExecutor(max_workers=min(procesos, total), mp_context=multiprocessing.get_context("spawn"))
+        try:
+            futuros = [pool.submit(_generar_en_proceso, p, carpeta) for p in pendientes]
+            for futuro in as_completed(futuros):
+                registrar(futuro.result())
+                if cancelado and cancelado():
+                    cortado = True
+                    break
+        finally:
+            # Al cancelar se descartan las fichas que aún no empezaron
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    for codigo, error in errores:
+        log_db(f"Error generando ficha PDF de '{codigo}': {error}")
+
+    resumen = {
+        "generadas": generadas,
+        "omitidas": omitidas,
+        "errores": errores,
+        "carpeta": carpeta,
+    }
+    if cortado:
+        resumen.update(status=False, message=f"Generación cancelada ({generadas} fichas listas).")
+        return resumen
+
+    mensaje = f"{generadas} fichas generadas, {omitidas} ya estaban al día"
+    if errores:
+        mensaje += f", {len(errores)} con error"
+
+    if unir_en:
+        con_error = {c for c, _ in errores}
+        incluidos = [p for p in productos if p.get("codigo") not in con_error]
+        try:
+            _unir_fichas([ruta_ficha(p.get("codigo", "SIN_CODIGO"), carpeta) for p in incluidos], incluidos, unir_en)
+            resumen["ruta_catalogo"] = unir_en
+            mensaje += f". Catálogo: {unir_en}"
+        except Exception as e:
+            log_db(f"Error uniendo catálogo PDF '{unir_en}': {e}")
+            resumen.update(status=False, message=f"{mensaje}. No se pudo armar el catálogo: {e}")
+            return resumen
+
+    log_db(f"Fichas PDF: {mensaje}")
+    resumen.update(status=not errores, message=mensaje + ".")
+    return resumen
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera fichas técnicas PDF en lote.")
+    parser.add_argument("--categoria", help="Solo los productos de esta categoría")
+    parser.add_argument("--codigos", nargs="+", help="Lista de códigos de producto")
+    parser.add_argument("--carpeta", default=REPORTES_DIR, help="Carpeta de salida (por defecto reportes/)")
+    parser.add_argument("--unir", metavar="CATALOGO", help="Además, unir todas las fichas en este PDF")
+    parser.add_argument("--forzar", action="store_true", help="Regenerar aunque el PDF esté al día")
+    parser.add_argument("--procesos", type=int, help="Procesos de trabajo (por defecto, uno por núcleo)")
+    parser.add_argument("--db", help="Ruta de la base de datos (por defecto data/inventario.db)")
+    args = parser.parse_args()
+
+    if args.db:
+        from database.db import configure_pool
+        configure_pool(db_path=args.db)
+
+    resultado = generar_fichas_lote(
+        codigos=args.codigos, categoria=args.categoria, carpeta=args.carpeta,
+        procesos=args.procesos, forzar=args.forzar, unir_en=args.unir
+    )
+    print(("[OK] " if resultado["status"] else "[ERROR] ") + resultado["message"])
+    sys.exit(0 if resultado["status"] else 1)
+
+if __name__ == "__main__":
+    main()
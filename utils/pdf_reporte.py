@@ -5,8 +5,107 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT
 from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 import os
 
+from database.db import log_db
+
+# Filas por tabla: ~una página A4 con letra de 9pt. Muchas tablas chicas en vez de
+# una gigante: ReportLab parte una tabla larga página por página y cada corte
+# vuelve a medir todas las filas restantes (costo cuadrático).
+FILAS_POR_BLOQUE = 45
+ALTO_FILA = 15            # Alto fijo (pt): evita medir cada celda para calcular alturas
+ALTO_ENCABEZADO = 22
+AVISO_CADA = 1000         # Filas entre avisos de progreso
+
+# ID, Fecha, Cod, Prod, Cant, Unit, Total (A4 ~19cm útiles)
+ANCHOS_DETALLE = [1.2*cm, 2.5*cm, 2.5*cm, 6*cm, 1.5*cm, 2.5*cm, 2.5*cm]
+
+# Estilos armados una sola vez por proceso y compartidos por todos los bloques
+ESTILO_TABLA_DATOS = TableStyle([
+    ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#343a40")), # Header Oscuro
+    ('TEXTCOLOR', (0,0), (-1,0), colors.white),
+    ('ALIGN', (0,0), (-1,0), 'CENTER'),
+    ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0,0), (-1,0), 10),
+
+    ('BOTTOMPADDING', (0,0), (-1,0), 8),
+    ('BACKGROUND', (0,1), (-1,-1), colors.white),
+    ('GRID', (0,0), (-1,-1), 0.5, colors.HexColor("#dee2e6")),
+    ('ALIGN', (-2,1), (-1,-1), 'RIGHT'), # Alinear precios a la derecha
+    ('FONTSIZE', (0,1), (-1,-1), 9),
+    ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor("#f8f9fa")]), # Filas Zebra
+])
+
+ESTILO_TABLA_KPI = TableStyle([
+    ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#e9ecef")),
+    ('TEXTCOLOR', (0,0), (-1,0), colors.black),
+    ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+    ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0,1), (-1,1), 12),
+    ('BOTTOMPADDING', (0,0), (-1,-1), 10),
+    ('TOPPADDING', (0,0), (-1,-1), 10),
+    ('GRID', (0,0), (-1,-1), 1, colors.white),
+    ('BOX', (0,0), (-1,-1), 1, colors.HexColor("#ced4da")),
+])
+
+_estilos = getSampleStyleSheet()
+
+ESTILO_TITULO = ParagraphStyle(
+    'TituloPersonalizado',
+    parent=_estilos['Title'],
+    fontSize=18,
+    textColor=colors.HexColor("#0056b3"),
+    spaceAfter=10
+)
+
+ESTILO_SUBTITULO = ParagraphStyle(
+    'Subtitulo',
+    parent=_estilos['Normal'],
+    fontSize=10,
+    textColor=colors.gray,
+    alignment=TA_RIGHT
+)
+
+ESTILO_NORMAL = _estilos['Normal']
+
+
+class ReporteCancelado(Exception):
+    """Se lanza dentro de doc.build para cortar la generación."""
+
+
+class _FlowablesPerezosos(list):
+    """
+    Lista de flowables que se rellena desde un generador a medida que
+    SimpleDocTemplate.build la consume: en memoria solo hay un bloque a la vez.
+    """
+
+    def __init__(self, iniciales, generador):
+        super().__init__(iniciales)
+        self._generador = generador
+
+    def _rellenar(self):
+        if not list.__len__(self) and self._generador is not None:
+            try:
+                self.append(next(self._generador))
+            except StopIteration:
+                self._generador = None
+
+    def __len__(self):
+        self._rellenar()
+        return list.__len__(self)
+
+    def __getitem__(self, indice):
+        self._rellenar()
+        return list.__getitem__(self, indice)
+
+
+def _texto_celda(valor) -> str:
+    # Formato básico para números
+    if isinstance(valor, float):
+        return f"{valor:.2f}"
+    return "" if valor is None else str(valor)
+
 class PDFReportes:
     """
     Generador de Reportes PDF Profesionales usando ReportLab.
@@ -14,124 +113,142 @@ class PDFReportes:
     """
 
     @staticmethod
-    def generar_pdf_reporte(titulo, datos, columnas, ruta_salida, resumen=None):
+    def _encabezado(titulo: str, resumen: Optional[Dict[str, Any]]) -> List[Any]:
+        """Fecha de generación, título y tarjeta de KPIs."""
+        elementos = []
+
+        # --- 1. Encabezado ---
+        fecha_gen = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+        elementos.append(Paragraph(f"Generado el: {fecha_gen}", ESTILO_SUBTITULO))
+        elementos.append(Spacer(1, 10))
+
+        # Título Principal
+        elementos.append(Paragraph(titulo, ESTILO_TITULO))
+        elementos.append(Spacer(1, 20))
+
+        # --- 2. Sección de Resumen (KPIs) ---
+        if resumen:
+            kpi_data = [
+                ["Ingresos Totales", "Transacciones", "Productos Vendidos"],
+                [
+                    f"{resumen.get('ingresos', 0):,.2f} Bs",
+                    str(resumen.get('transacciones', 0)),
+                    str(resumen.get('productos', 0))
+                ]
+            ]
+            tabla_kpi = Table(kpi_data, colWidths=[6*cm, 5*cm, 5*cm])
+            tabla_kpi.setStyle(ESTILO_TABLA_KPI)
+            elementos.append(tabla_kpi)
+            elementos.append(Spacer(1, 20))
+        return elementos
+
+    @staticmethod
+    def _bloques(
+        filas: Iterable[Dict[str, Any]],
+        columnas: List[Tuple[str, str]],
+        filas_por_bloque: int,
+        total: Optional[int],
+        progreso: Optional[Callable[[int, int], None]],
+        cancelado: Optional[Callable[[], bool]],
+        contador: Dict[str, int]
+    ):
+        """Genera una Table por cada `filas_por_bloque` filas (con el encabezado repetido)."""
+        keys_columnas = [col[0] for col in columnas]
+        labels_columnas = [col[1] for col in columnas]
+        anchos = ANCHOS_DETALLE if len(columnas) == len(ANCHOS_DETALLE) else None
+
+        def tabla(matriz):
+            alturas = [ALTO_ENCABEZADO] + [ALTO_FILA] * (len(matriz) - 1)
+            t = Table(matriz, colWidths=anchos, rowHeights=alturas, repeatRows=1)
+            t.setStyle(ESTILO_TABLA_DATOS)
+            return t
+
+        matriz = [labels_columnas]
+        for d in filas:
+            matriz.append([_texto_celda(d.get(key, "")) for key in keys_columnas])
+            contador["filas"] += 1
+            if contador["filas"] % AVISO_CADA == 0:
+                if cancelado and cancelado():
+                    raise ReporteCancelado()
+                if progreso:
+                    progreso(contador["filas"], max(total or 0, contador["filas"]))
+            if len(matriz) > filas_por_bloque:
+                yield tabla(matriz)
+                matriz = [labels_columnas]
+
+        if len(matriz) > 1:
+            yield tabla(matriz)
+        elif contador["filas"] == 0:
+            yield Paragraph("No se encontraron registros para este periodo.", ESTILO_NORMAL)
+
+    @staticmethod
+    def generar_pdf_por_bloques(
+        titulo: str,
+        filas: Iterable[Dict[str, Any]],
+        columnas: List[Tuple[str, str]],
+        ruta_salida: str,
+        resumen: Optional[Dict[str, Any]] = None,
+        total: Optional[int] = None,
+        filas_por_bloque: int = FILAS_POR_BLOQUE,
+        progreso: Optional[Callable[[int, int], None]] = None,
+        cancelado: Optional[Callable[[], bool]] = None
+    ) -> Dict[str, Any]:
         """
-        Genera el archivo PDF.
-        :param resumen: Diccionario opcional con KPIs para mostrar al inicio.
+        Genera el reporte partiendo los datos en tablas de una página.
+
+        `filas` puede ser una lista o un generador (p. ej. ReporteVentasController.iterar_ventas):
+        las tablas se arman a medida que ReportLab las pide, así el tiempo crece
+        en forma lineal y en memoria queda solo el bloque en curso.
+        Pensado para correr en un hilo de trabajo (ver gui/tareas.py).
+
+        :param columnas: lista de (clave del diccionario, título en el PDF).
+        :param total: número de filas esperado, solo para informar el progreso.
+        :param progreso: callable(filas_procesadas, total) cada AVISO_CADA filas.
+        :param cancelado: callable() -> bool; si devuelve True se aborta sin dejar archivo.
         """
+        temporal = f"{ruta_salida}.tmp"
+        contador = {"filas": 0}
         try:
             doc = SimpleDocTemplate(
-                ruta_salida, 
+                temporal,
                 pagesize=A4,
                 rightMargin=30, leftMargin=30,
                 topMargin=30, bottomMargin=30
             )
-            
-            elementos = []
-            estilos = getSampleStyleSheet()
-
-            # --- 1. Encabezado ---
-            estilo_titulo = ParagraphStyle(
-                'TituloPersonalizado', 
-                parent=estilos['Title'], 
-                fontSize=18, 
-                textColor=colors.HexColor("#0056b3"),
-                spaceAfter=10
+            bloques = PDFReportes._bloques(
+                filas, columnas, max(1, int(filas_por_bloque)), total, progreso, cancelado, contador
             )
-            
-            estilo_subtitulo = ParagraphStyle(
-                'Subtitulo', 
-                parent=estilos['Normal'], 
-                fontSize=10, 
-                textColor=colors.gray, 
-                alignment=TA_RIGHT
-            )
-
-            # Fecha de generación
-            fecha_gen = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-            elementos.append(Paragraph(f"Generado el: {fecha_gen}", estilo_subtitulo))
-            elementos.append(Spacer(1, 10))
-            
-            # Título Principal
-            elementos.append(Paragraph(titulo, estilo_titulo))
-            elementos.append(Spacer(1, 20))
+            doc.build(_FlowablesPerezosos(PDFReportes._encabezado(titulo, resumen), bloques))
+            os.replace(temporal, ruta_salida)
+        except ReporteCancelado:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            return {"status": False, "message": "Generación cancelada.", "filas": contador["filas"]}
+        except Exception as e:
+            log_db(f"Error generando PDF '{ruta_salida}': {e}")
+            if os.path.exists(temporal):
+                try:
+                    os.remove(temporal)
+                except OSError:
+                    pass
+            return {"status": False, "message": f"No se pudo generar el PDF: {e}", "filas": contador["filas"]}
 
-            # --- 2. Sección de Resumen (KPIs) ---
-            if resumen:
-                kpi_data = [
-                    ["Ingresos Totales", "Transacciones", "Productos Vendidos"],
-                    [
-                        f"{resumen.get('ingresos', 0):,.2f} Bs", 
-                        str(resumen.get('transacciones', 0)), 
-                        str(resumen.get('productos', 0))
-                    ]
-                ]
-                
-                tabla_kpi = Table(kpi_data, colWidths=[6*cm, 5*cm, 5*cm])
-                tabla_kpi.setStyle(TableStyle([
-                    ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#e9ecef")),
-                    ('TEXTCOLOR', (0,0), (-1,0), colors.black),
-                    ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-                    ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0,1), (-1,1), 12),
-                    ('BOTTOMPADDING', (0,0), (-1,-1), 10),
-                    ('TOPPADDING', (0,0), (-1,-1), 10),
-                    ('GRID', (0,0), (-1,-1), 1, colors.white),
-                    ('BOX', (0,0), (-1,-1), 1, colors.HexColor("#ced4da")),
-                ]))
-                elementos.append(tabla_kpi)
-                elementos.append(Spacer(1, 20))
-
-            # --- 3. Tabla de Datos ---
-            if datos:
-                # Extraer encabezados y filas
-                keys_columnas = [col[0] for col in columnas]
-                labels_columnas = [col[1] for col in columnas]
-                
-                data_matriz = [labels_columnas]
-                
-                for d in datos:
-                    fila = []
-                    for key in keys_columnas:
-                        valor = d.get(key, "")
-                        # Formato básico para números
-                        if isinstance(valor, float):
-                            valor = f"{valor:.2f}"
-                        fila.append(str(valor))
-                    data_matriz.append(fila)
-
-                # Definir anchos de columna dinámicos (ajuste simple)
-                # Se asume A4 ancho ~ 19cm útiles. Repartimos.
-                # ID, Fecha, Cod, Prod, Cant, Unit, Total
-                anchos = [1.2*cm, 2.5*cm, 2.5*cm, 6*cm, 1.5*cm, 2.5*cm, 2.5*cm]
-                
-                tabla_datos = Table(data_matriz, colWidths=anchos, repeatRows=1)
-                
-                # Estilo Profesional
-                estilo_tabla = TableStyle([
-                    ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#343a40")), # Header Oscuro
-                    ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-                    ('ALIGN', (0,0), (-1,0), 'CENTER'),
-                    ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0,0), (-1,0), 10),
-                    
-                    ('BOTTOMPADDING', (0,0), (-1,0), 8),
-                    ('BACKGROUND', (0,1), (-1,-1), colors.white),
-                    ('GRID', (0,0), (-1,-1), 0.5, colors.HexColor("#dee2e6")),
-                    ('ALIGN', (-2,1), (-1,-1), 'RIGHT'), # Alinear precios a la derecha
-                    ('FONTSIZE', (0,1), (-1,-1), 9),
-                    ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor("#f8f9fa")]), # Filas Zebra
-                ])
-                
-                tabla_datos.setStyle(estilo_tabla)
-                elementos.append(tabla_datos)
-            else:
-                elementos.append(Paragraph("No se encontraron registros para este periodo.", estilos['Normal']))
-
-            # --- 4. Generar ---
-            doc.build(elementos)
-            return True
+        if progreso:
+            progreso(contador["filas"], contador["filas"])
+        return {
+            "status": True,
+            "message": f"Reporte de {contador['filas']} filas generado.",
+            "filas": contador["filas"],
+            "ruta": ruta_salida,
+        }
 
-        except Exception as e:
-            print(f"Error generando PDF: {e}")
-            return False
\ No newline at end of file
+    @staticmethod
+    def generar_pdf_reporte(titulo, datos, columnas, ruta_salida, resumen=None):
+        """
+        Genera el archivo PDF.
+        :param resumen: Diccionario opcional con KPIs para mostrar al inicio.
+        """
+        resultado = PDFReportes.generar_pdf_por_bloques(
+            titulo, datos or [], columnas, ruta_salida, resumen=resumen, total=len(datos or [])
+        )
+        return resultado["status"]